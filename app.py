@@ -34,7 +34,7 @@ COMPANION is a flask application to perform C.R.U.D. actions on the new version
 HTTP GEt, POST, DELETE, And PUT are demonstrated.
 
 '''
-from flask import Flask, request, render_template, abort, redirect, url_for
+from flask import Flask, request, render_template, abort, redirect, url_for, jsonify
 import pymongo
 import datetime
 import os
@@ -45,6 +45,7 @@ import uuid
 from jinja2 import Environment, FileSystemLoader
 from utility.get_client_api import get_client
 from utility.api_caller import api_caller
+from utility.site_store import SiteStore, write_through, COLUMNS
 import json
 
 #
@@ -63,6 +64,14 @@ config = {
 connector = "mongodb://{}:{}@{}".format(config["username"], config["password"], config["server"])
 client = pymongo.MongoClient(connector)
 db = client["demo"]
+# Sites are read from Mongo, kept in sync with Central in the background.
+site_store = SiteStore(db)
+
+@app.before_request
+def start_site_store():
+    # The refresher starts with the first request, not on import, so
+    # importing the app neither writes to Mongo nor calls Central.
+    site_store.start()
 '''
 #-------------------------------------------------------------------------------
 Login and Test Page Section
@@ -118,16 +127,45 @@ Log Section
 
 @app.route("/get_sites", methods=('GET', 'POST'))
 def get_sites():
-    client = get_client()
-
-    api_method = "GET"
-
-    api_path="network-config/v1alpha1/sites"
-
-    sites = api_caller(client,api_method,api_path)
-
-    # Check user credentials
-    return render_template('get_sites.html', sites=sites)
+    # The table loads its rows page by page from /sites_data
+    return render_template('get_sites.html', freshness=site_store.freshness())
+
+@app.route("/sites_data", methods=('GET', 'POST'))
+def sites_data():
+    # DataTables server-side processing of the sites table
+    args = request.values
+    try:
+        draw = int(args.get('draw', 0))
+        start = int(args.get('start', 0))
+        length = int(args.get('length', 10))
+        order = []
+        i = 0
+        while 'order[{}][column]'.format(i) in args:
+            column = int(args['order[{}][column]'.format(i)])
+            if 0 <= column < len(COLUMNS):
+                order.append((column, args.get('order[{}][dir]'.format(i), 'asc')))
+            i += 1
+    except ValueError:
+        abort(400)
+
+    total, filtered, sites = site_store.page(start, length, args.get('search[value]'), order)
+
+    return jsonify({
+        "draw": draw,
+        "recordsTotal": total,
+        "recordsFiltered": filtered,
+        "data": sites,
+    })
+
+@app.route("/refresh_sites", methods=('GET', 'POST'))
+def refresh_sites():
+    # Reload the sites from Central now
+    try:
+        site_store.refresh()
+    except Exception as e:
+        message = 'Site refresh failed: {}'.format(e)
+        return render_template('home.html', message=message)
+    return redirect(url_for('get_sites'))
 
 @app.route("/create_site", methods=('GET', 'POST'))
 def create_site():
@@ -165,6 +203,7 @@ def add_site():
         api_path="network-config/v1alpha1/sites"
 
         new_site = api_caller(client,api_method,api_path,api_data)
+        write_through(site_store, new_site, api_data)
 
     # Check user credentials
     message = new_site
@@ -174,13 +213,7 @@ def add_site():
 @app.route("/update_site", methods=('GET', 'POST'))
 def update_site():
     # This is the site chooser
-    client = get_client()
-
-    api_method = "GET"
-
-    api_path="network-config/v1alpha1/sites"
-
-    sites = api_caller(client,api_method,api_path)
+    sites = site_store.choices()
 
     return render_template('update_site.html', sites=sites)
 
@@ -194,20 +227,14 @@ def site_update():
     if request.method == 'POST':
         scopeName = request.form['scopeName'].replace('"', "")
 
-        # This is the site chooser
-        client = get_client()
-
-        api_method = "GET"
-
-        api_path="network-config/v1alpha1/sites"
-
-        sites = api_caller(client,api_method,api_path)
+        site = site_store.get_by_name(scopeName)
 
-        for site in sites:
+        if site is not None:
 
-            if str(site['scopeName']) == str(scopeName):
+            return render_template('update.html', site=site)
 
-                return render_template('update.html', site=site)
+    message = 'Site not found: {}'.format(request.form.get('scopeName'))
+    return render_template('home.html', message=message)
 
 @app.route("/update", methods=('GET', 'POST'))
 def update():
@@ -235,6 +262,7 @@ def update():
     api_path="network-config/v1alpha1/sites"
 
     new_site = api_caller(client,api_method,api_path,api_data)
+    write_through(site_store, new_site, api_data)
 
     # Return Message
     message = new_site
@@ -244,29 +272,19 @@ def update():
 @app.route("/delete_site", methods=('GET', 'POST'))
 def delete_site():
     # This is the site chooser
-    client = get_client()
-
-    api_method = "GET"
+    sites = site_store.choices()
 
-    api_path="network-config/v1alpha1/sites"
-
-    sites = api_caller(client,api_method,api_path)
-
-    list_of_sites = []
-
-    for site in sites:
-        entry = site['scopeName'] + '*' + site['scopeId']
-        list_of_sites.append(entry)
-
-
-    return render_template('delete_site.html', sites=list_of_sites)
+    return render_template('delete_site.html', sites=sites)
 
 
 @app.route("/site_delete", methods=('GET', 'POST'))
 def site_delete():
     # Send up the warning flares
-    name, id = request.form['scopeName'].split('*')
-    return render_template('delete.html', scopeId=id)
+    site = site_store.get_by_id(request.form['scopeId'])
+    if site is None:
+        message = 'Site not found: {}'.format(request.form['scopeId'])
+        return render_template('home.html', message=message)
+    return render_template('delete.html', scopeId=site['scopeId'], scopeName=site['scopeName'])
 
 @app.route("/delete", methods=('GET', 'POST'))
 def delete():
@@ -281,6 +299,7 @@ def delete():
     api_method = "DELETE"
     
     response = api_caller(client,api_method,api_path,api_data)
+    write_through(site_store, response, scopeId=scopeId)
 
     # Return Message
     message = response
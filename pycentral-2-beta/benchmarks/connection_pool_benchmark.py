@@ -0,0 +1,123 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+
+"""
+Benchmark comparing `NewCentralBase.command()` with pooled keep-alive
+connections against a fresh connection per call (`keep_alive=False`, which
+matches the previous one-session-per-request behaviour).
+
+A local stub API gateway is started on 127.0.0.1, so the numbers only include
+TCP handshakes & request handling, not TLS. Against the real gateway the gap
+is larger since every new connection also pays a TLS handshake.
+
+Usage:
+    python benchmarks/connection_pool_benchmark.py [--calls 1000] [--workers 16]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pycentral import NewCentralBase
+
+BODY = b'{"items": [], "count": 0, "total": 0}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        if self.headers.get("Connection", "").lower() == "close":
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 128
+
+
+def start_stub_server():
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def build_client(port, keep_alive, workers):
+    token_info = {
+        "new_central": {
+            "base_url": f"http://127.0.0.1:{port}",
+            "access_token": "benchmark-token",
+        }
+    }
+    return NewCentralBase(
+        token_info=token_info,
+        log_level="ERROR",
+        keep_alive=keep_alive,
+        pool_maxsize=workers,
+    )
+
+
+def timed_call(conn):
+    start = time.perf_counter()
+    resp = conn.command("GET", "network-config/v1alpha1/sites")
+    assert resp["code"] == 200
+    return time.perf_counter() - start
+
+
+def run(conn, calls, workers):
+    start = time.perf_counter()
+    if workers == 1:
+        latencies = [timed_call(conn) for _ in range(calls)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(lambda _: timed_call(conn), range(calls)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput": calls / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    port = server.server_address[1]
+
+    print(f"{'mode':<24}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for workers in (1, args.workers):
+        label = "sequential" if workers == 1 else f"concurrent x{workers}"
+        for keep_alive in (False, True):
+            conn = build_client(port, keep_alive, workers)
+            stats = run(conn, args.calls, workers)
+            conn.close()
+            mode = f"{label} {'pooled' if keep_alive else 'fresh'}"
+            print(
+                f"{mode:<24}{stats['throughput']:>10.0f}"
+                f"{stats['p50']:>10.2f}{stats['p99']:>10.2f}"
+            )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+
+"""
+Upstream call counts of the GLP subscription key and user email lookups
+with and without the ID caches.
+
+A local stub of the GLP subscriptions and users APIs counts the calls it
+serves. The client-side rate limiter is disabled, only call counts matter
+here. Each scenario runs three times: with the caches disabled (the
+previous behaviour, one filtered call per lookup), with the caches filled
+as lookups happen, and with the caches prefetched in bulk first.
+
+1. Subscriptions - `--lookups` calls of `get_sub_id()` over `--keys`
+   distinct keys, as done by `Devices.add_sub(key=True)` in a loop.
+2. Users - `get_user()` twice for each of `--users` users, then
+   `delete_user()` by email for each, as done by user-management flows.
+   The get and delete calls themselves, 3 per user, remain.
+
+Usage:
+    python benchmarks/lookup_cache_calls.py [--keys 20] [--lookups 200]
+"""
+
+import argparse
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from pycentral import NewCentralBase
+from pycentral.glp import Subscriptions, UserMgmt
+from pycentral.glp import subscriptions, user_management
+
+SUBSCRIPTIONS_PATH = "/subscriptions/v1/subscriptions"
+USERS_PATH = "/identity/v1/users"
+
+
+class StubState(object):
+    def __init__(self, keys, users):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.subscriptions = [
+            {"id": f"sub-id-{i}", "key": f"KEY{i:06d}"} for i in range(keys)
+        ]
+        self.users = [
+            {"id": f"user-id-{i}", "username": f"user{i}@example.com"}
+            for i in range(users)
+        ]
+
+    def count(self):
+        with self.lock:
+            self.calls += 1
+
+    def reset(self):
+        with self.lock:
+            calls, self.calls = self.calls, 0
+            return calls
+
+
+STATE = StubState(0, 0)
+
+
+def _filtered(items, field, filter):
+    match = re.match(r"\w+ eq '(.*)'$", filter)
+    return [item for item in items if item[field] == match.group(1)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        STATE.count()
+        url = urlparse(self.path)
+        if url.path.startswith(USERS_PATH + "/"):
+            user_id = url.path.rsplit("/", 1)[1]
+            users = [u for u in STATE.users if u["id"] == user_id]
+            return self._reply(users[0] if users else {})
+        query = parse_qs(url.query)
+        limit = int(query["limit"][0])
+        offset = int(query["offset"][0])
+        if url.path.rstrip("/") == SUBSCRIPTIONS_PATH:
+            items, field = STATE.subscriptions, "key"
+        else:
+            # The users API counts offset in pages.
+            items, field = STATE.users, "username"
+            offset *= limit
+        if "filter" in query:
+            items = _filtered(items, field, query["filter"][0])
+        page = items[offset:offset + limit]
+        self._reply(
+            {
+                "items": page,
+                "count": len(page),
+                "offset": offset,
+                "total": len(items),
+            }
+        )
+
+    def do_DELETE(self):
+        STATE.count()
+        self._reply({})
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def subscription_lookups(conn, args, prefetch):
+    s = Subscriptions()
+    if prefetch:
+        s.prefetch_sub_ids(conn)
+    for i in range(args.lookups):
+        key = STATE.subscriptions[i % args.keys]["key"]
+        assert s.get_sub_id(conn, key) == (True, f"sub-id-{i % args.keys}")
+
+
+def user_flows(conn, args, prefetch):
+    u = UserMgmt()
+    if prefetch:
+        u.prefetch_user_ids(conn)
+    for _ in range(2):
+        for user in STATE.users:
+            assert u.get_user(conn, email=user["username"])["code"] == 200
+    for user in STATE.users:
+        assert u.delete_user(conn, email=user["username"])["code"] == 200
+
+
+def main():
+    global STATE
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+    STATE = StubState(args.keys, args.users)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    token_info = {
+        "glp": {
+            "base_url": f"http://127.0.0.1:{server.server_address[1]}",
+            "access_token": "benchmark-token",
+        }
+    }
+
+    caches = [subscriptions.sub_id_cache, user_management.user_id_cache]
+    ttl = caches[0].ttl
+    print(f"{'scenario':<16}{'mode':<12}{'calls':>8}")
+    for name, scenario in [
+        ("subscriptions", subscription_lookups),
+        ("users", user_flows),
+    ]:
+        for mode in ["no cache", "cache", "prefetch"]:
+            for cache in caches:
+                cache.ttl = 0 if mode == "no cache" else ttl
+            # A new client per run, so every run starts with empty caches.
+            conn = NewCentralBase(
+                token_info=token_info,
+                log_level="ERROR",
+                token_store=False,
+                rate_limiter=False,
+            )
+            STATE.reset()
+            scenario(conn, args, prefetch=mode == "prefetch")
+            print(f"{name:<16}{mode:<12}{STATE.reset():>8}")
+            conn.close()
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+
+"""
+Benchmark of serial against fan-out pagination with
+`glp.Devices.get_all_devices()`.
+
+A local stub of the GLP devices API serves `--devices` devices in pages of
+2000 and adds `--latency` milliseconds to every call to stand in for the
+round trip to the real API gateway. The client-side rate limiter stays
+enabled, so the fan-out numbers include its pacing.
+
+Usage:
+    python benchmarks/pagination_benchmark.py [--devices 60000] [--latency 400]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from pycentral import NewCentralBase
+from pycentral.glp import Devices
+
+TOTAL = {"devices": 0, "latency": 0.0}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        limit = int(query.get("limit", ["2000"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        end = min(offset + limit, TOTAL["devices"])
+        items = [
+            {"id": f"id-{i}", "serialNumber": f"SN{i:08d}"}
+            for i in range(offset, end)
+        ]
+        body = json.dumps(
+            {
+                "items": items,
+                "count": len(items),
+                "offset": offset,
+                "total": TOTAL["devices"],
+            }
+        ).encode("utf-8")
+        time.sleep(TOTAL["latency"])
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=60000)
+    parser.add_argument("--latency", type=float, default=400)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 4, 8]
+    )
+    args = parser.parse_args()
+    TOTAL["devices"] = args.devices
+    TOTAL["latency"] = args.latency / 1000
+
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    token_info = {
+        "glp": {
+            "base_url": f"http://127.0.0.1:{server.server_address[1]}",
+            "access_token": "benchmark-token",
+        }
+    }
+
+    print(f"{'workers':<10}{'pages':>8}{'devices':>10}{'seconds':>10}")
+    for workers in args.workers:
+        # A new client per run, so every run starts with a full rate budget.
+        conn = NewCentralBase(
+            token_info=token_info,
+            log_level="ERROR",
+            token_store=False,
+            pool_maxsize=max(workers, 10),
+        )
+        start = time.perf_counter()
+        resp = Devices().get_all_devices(conn, workers=workers)
+        elapsed = time.perf_counter() - start
+        conn.close()
+        assert resp["msg"]["count"] == args.devices
+        pages = -(-args.devices // 2000)
+        print(
+            f"{workers:<10}{pages:>8}{resp['msg']['count']:>10}"
+            f"{elapsed:>10.2f}"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+
+"""
+Benchmark of sequential against pipelined chunk submission with
+`glp.Devices.assign_devices()`.
+
+A local stub of the GLP devices API accepts PATCH requests of up to five
+devices and completes each async transaction `--completion` seconds after
+it was submitted. The PATCH rate limit is scaled to `--rpm` requests per
+minute, without burst, so a run takes seconds rather than minutes.
+
+- sequential: one `assign_devices()` call per chunk, each waiting for its
+  transaction before the next chunk is submitted (the previous behaviour).
+- pipelined: a single `assign_devices(pipelined=True)` call.
+- bound: time to submit every chunk at the rate limit plus the completion
+  time of the last one, the best any client can do.
+
+Usage:
+    python benchmarks/pipelined_chunks_benchmark.py [--devices 50] [--rpm 120]
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pycentral import NewCentralBase
+from pycentral.glp import Devices
+from pycentral.utils.rate_limiter import RateLimiter
+
+SETTINGS = {"completion": 0.0}
+TRANSACTIONS = {}
+IDS = itertools.count()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_PATCH(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        transaction_id = f"t{next(IDS)}"
+        TRANSACTIONS[transaction_id] = (
+            time.monotonic() + SETTINGS["completion"]
+        )
+        self._reply(202, {"transactionId": transaction_id})
+
+    def do_GET(self):
+        transaction_id = self.path.rstrip("/").rsplit("/", 1)[1]
+        done = time.monotonic() >= TRANSACTIONS[transaction_id]
+        status = "SUCCEEDED" if done else "IN_PROGRESS"
+        self._reply(200, {"id": transaction_id, "status": status})
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_conn(token_info, rpm):
+    limiter = RateLimiter(
+        [
+            ("glp", "PATCH", "/devices/v1/devices", rpm),
+            ("glp", "GET", "/devices/v1/async-operations", 600),
+        ]
+    )
+    # No burst, chunks are paced from the first one.
+    bucket = limiter.get_bucket("glp", "PATCH", "/devices/v1/devices")
+    bucket.capacity = bucket.tokens = 1
+    return NewCentralBase(
+        token_info=token_info,
+        log_level="ERROR",
+        token_store=False,
+        rate_limiter=limiter,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--rpm", type=float, default=120)
+    parser.add_argument("--completion", type=float, default=3)
+    args = parser.parse_args()
+    SETTINGS["completion"] = args.completion
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    token_info = {
+        "glp": {
+            "base_url": f"http://127.0.0.1:{server.server_address[1]}",
+            "access_token": "benchmark-token",
+        }
+    }
+    devices = [f"device-{i}" for i in range(args.devices)]
+    chunks = [devices[i : i + 5] for i in range(0, len(devices), 5)]
+
+    print(f"{'mode':<12}{'chunks':>8}{'seconds':>10}")
+    bound = (len(chunks) - 1) * 60 / args.rpm + args.completion
+    print(f"{'bound':<12}{len(chunks):>8}{bound:>10.2f}")
+
+    conn = make_conn(token_info, args.rpm)
+    start = time.perf_counter()
+    for chunk in chunks:
+        resp = Devices().assign_devices(conn, chunk, application="app")
+        assert resp["msg"]["status"] == "SUCCEEDED"
+    elapsed = time.perf_counter() - start
+    print(f"{'sequential':<12}{len(chunks):>8}{elapsed:>10.2f}")
+    conn.close()
+
+    conn = make_conn(token_info, args.rpm)
+    start = time.perf_counter()
+    report = Devices().assign_devices(
+        conn, devices, application="app", pipelined=True
+    )
+    elapsed = time.perf_counter() - start
+    assert all(result.success for result in report)
+    print(f"{'pipelined':<12}{len(report):>8}{elapsed:>10.2f}")
+    conn.close()
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
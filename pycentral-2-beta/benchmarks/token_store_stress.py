@@ -0,0 +1,220 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+
+"""
+Multi-process stress test of the classic `ArubaCentralBase` token store.
+
+A local stub of the Aruba Central OAuth APIs counts how often the three-step
+login (`createToken`) and the refresh token API are called, and only accepts
+each refresh token once like the real API Gateway.
+
+1. Cold start - all workers start together with an empty token store and
+   must end up sharing a single token created by one of them.
+2. Expiry - the stub revokes the shared token, every worker gets HTTP 401 at
+   the same time and exactly one of them may refresh it.
+
+Usage:
+    python benchmarks/token_store_stress.py [--workers 16] [--store local]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import secrets
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from pycentral.classic.base import ArubaCentralBase
+
+
+class StubState(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.logins = 0
+        self.refreshes = 0
+        self.rejected_refreshes = 0
+        self.access_token = None
+        self.refresh_token = None
+
+    def issue(self):
+        self.access_token = secrets.token_hex(8)
+        self.refresh_token = secrets.token_hex(8)
+        return {
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "expires_in": 7200,
+            "token_type": "bearer",
+        }
+
+
+STATE = StubState()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def send_json(self, code, body, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/oauth2/authorize/central/api/login":
+            self.send_json(
+                200,
+                {"status": True},
+                [
+                    ("Set-Cookie", "csrftoken=csrf"),
+                    ("Set-Cookie", "session=session"),
+                ],
+            )
+        elif url.path == "/oauth2/authorize/central/api":
+            self.send_json(200, {"auth_code": "code"})
+        elif url.path == "/oauth2/token":
+            with STATE.lock:
+                if query.get("grant_type") == "authorization_code":
+                    STATE.logins += 1
+                    self.send_json(200, STATE.issue())
+                elif query.get("refresh_token") == STATE.refresh_token:
+                    STATE.refreshes += 1
+                    self.send_json(200, STATE.issue())
+                else:
+                    STATE.rejected_refreshes += 1
+                    self.send_json(400, {"error": "invalid_grant"})
+        else:
+            self.send_json(404, {})
+
+    def do_GET(self):
+        auth = self.headers.get("Authorization", "")
+        with STATE.lock:
+            valid = auth == "Bearer %s" % STATE.access_token
+        if valid:
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(401, {"error": "invalid_token"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def worker(port, store, barrier, results):
+    central_info = {
+        "base_url": "http://127.0.0.1:%d" % port,
+        "username": "user",
+        "password": "password",
+        "client_id": "client",
+        "client_secret": "secret",
+        "customer_id": "customer",
+    }
+    barrier.wait()
+    conn = ArubaCentralBase(
+        central_info=central_info,
+        token_store=store,
+        logger=_quiet_logger(),
+    )
+    barrier.wait()
+    resp = conn.command("GET", "/monitoring/v1/aps")
+    results.put(
+        (resp["code"], conn.central_info["token"]["access_token"])
+    )
+    conn.close()
+
+
+def _quiet_logger():
+    logger = logging.getLogger("TOKEN_STORE_STRESS")
+    logger.setLevel(logging.CRITICAL)
+    return logger
+
+
+def run_phase(port, store, workers):
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(
+            target=worker, args=(port, store, barrier, results)
+        )
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    codes = [results.get(timeout=120) for _ in procs]
+    for proc in procs:
+        proc.join()
+    return codes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument(
+        "--store", choices=("local", "sqlite"), default="local"
+    )
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    store = {"type": args.store, "path": tempfile.mkdtemp()}
+
+    failures = 0
+    results = run_phase(port, store, args.workers)
+    tokens = {token for _, token in results}
+    print(
+        "cold start: %d workers, %d logins, %d distinct tokens, %d ok"
+        % (
+            args.workers,
+            STATE.logins,
+            len(tokens),
+            sum(code == 200 for code, _ in results),
+        )
+    )
+    failures += STATE.logins != 1 or len(tokens) != 1
+
+    with STATE.lock:
+        # Revoke the shared access token, its refresh token stays valid.
+        STATE.access_token = secrets.token_hex(8)
+    logins = STATE.logins
+    results = run_phase(port, store, args.workers)
+    tokens = {token for _, token in results}
+    print(
+        "expiry: %d workers, %d refreshes, %d rejected refreshes, "
+        "%d logins, %d distinct tokens, %d ok"
+        % (
+            args.workers,
+            STATE.refreshes,
+            STATE.rejected_refreshes,
+            STATE.logins - logins,
+            len(tokens),
+            sum(code == 200 for code, _ in results),
+        )
+    )
+    failures += (
+        STATE.refreshes != 1
+        or STATE.logins != logins
+        or len(tokens) != 1
+    )
+    server.shutdown()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from .base import NewCentralBase
+from .async_base import AsyncNewCentralBase
 # Manually import each module in the legacy Central folder
 import importlib
 import sys
@@ -0,0 +1,589 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import asyncio
+import json
+import time
+from .base import SUPPORTED_API_METHODS, TOKEN_REFRESH_MARGIN, urls
+from .utils.base_utils import get_url, new_parse_input_args, console_logger
+from .utils.rate_limiter import RateLimiter
+from .utils.retry_utils import RetryPolicy
+from .utils.coalesce_utils import AsyncSingleFlight, request_key
+from .exceptions import LoginError, ResponseError
+
+try:
+    import aiohttp  # type: ignore
+
+    AIOHTTP = True
+except (ImportError, ModuleNotFoundError):
+    AIOHTTP = False
+
+# Total number of connections the client keeps open.
+DEFAULT_ASYNC_POOL_SIZE = 100
+
+
+class AsyncNewCentralBase:
+    def __init__(
+        self,
+        token_info,
+        logger=None,
+        log_level="DEBUG",
+        pool_size=DEFAULT_ASYNC_POOL_SIZE,
+        pool_maxsize=0,
+        keep_alive=True,
+        timeout=None,
+        rate_limiter=None,
+        retry_policy=None,
+        refresh_margin=TOKEN_REFRESH_MARGIN,
+        single_flight=None,
+    ):
+        """
+        Initialize the AsyncNewCentralBase class. This is the asyncio
+        counterpart of class: `pycentral.NewCentralBase` and requires the
+        aiohttp package (pip install pycentral[async]).
+
+        Access tokens are not created here. Apps without an access_token get
+        one on the first awaited API call, or by awaiting `create_token()`.
+
+        :param token_info: Dictionary containing token information for supported applications - new_central, glp.
+        :type token_info: dict
+        :param logger: Logger instance, defaults to None.
+        :type logger: logging.Logger, optional
+        :param log_level: Logging level, defaults to "DEBUG".
+        :type log_level: str, optional
+        :param pool_size: Maximum number of simultaneous connections, defaults to 100.
+        :type pool_size: int, optional
+        :param pool_maxsize: Maximum number of simultaneous connections per host, 0 for no per-host limit, defaults to 0.
+        :type pool_maxsize: int, optional
+        :param keep_alive: Reuse connections across API calls, defaults to True.
+        :type keep_alive: bool, optional
+        :param timeout: Seconds to wait for a response from the API gateway, defaults to None.
+        :type timeout: float, optional
+        :param rate_limiter: Client-side rate limiter shared by all API calls. Defaults to a RateLimiter seeded with the documented limits, pass False to disable it. The same instance can be shared with a NewCentralBase object.
+        :type rate_limiter: class: `pycentral.utils.rate_limiter.RateLimiter`, optional
+        :param retry_policy: Policy for retrying 429, 5xx and connection failures. Defaults to a RetryPolicy retrying idempotent methods, pass False to disable retries.
+        :type retry_policy: class: `pycentral.utils.retry_utils.RetryPolicy`, optional
+        :param refresh_margin: Seconds before expiry at which a token created by the SDK is refreshed in background, defaults to 120.
+        :type refresh_margin: float, optional
+        :param single_flight: Coalescer making concurrent tasks that send identical GET requests (same app, path, params and headers) share one upstream call. Defaults to an AsyncSingleFlight, pass False to disable it.
+        :type single_flight: class: `pycentral.utils.coalesce_utils.AsyncSingleFlight`, optional
+        """
+        if not AIOHTTP:
+            raise ImportError(
+                "AsyncNewCentralBase requires aiohttp. Install it with "
+                "pip install pycentral[async]"
+            )
+        self.token_info = new_parse_input_args(token_info)
+        self.logger = self.set_logger(log_level, logger)
+        self.pool_size = pool_size
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        if rate_limiter is None:
+            rate_limiter = RateLimiter()
+        self.rate_limiter = rate_limiter or None
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy or None
+        if single_flight is None:
+            single_flight = AsyncSingleFlight()
+        self.single_flight = single_flight or None
+        self.refresh_margin = refresh_margin
+        self._session = None
+        self._token_locks = {}
+        self._token_expiry = {}
+        self._refresh_tasks = {}
+
+    def set_logger(self, log_level, logger=None):
+        """
+        Set the logger for the class.
+
+        :param log_level: Logging level.
+        :type log_level: str
+        :param logger: Logger instance, defaults to None.
+        :type logger: logging.Logger, optional
+        :return: Logger instance.
+        :rtype: logging.Logger
+        """
+        if logger:
+            return logger
+        else:
+            return console_logger("ASYNC NEW CENTRAL BASE", log_level)
+
+    @property
+    def session(self):
+        """
+        Return the aiohttp session of the client, creating it on first use.
+        Must be accessed from within a running event loop.
+
+        :return: Session with a pooled connector.
+        :rtype: aiohttp.ClientSession
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_maxsize,
+                force_close=not self.keep_alive,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def create_token(self, app_name):
+        """
+        Create a new access token for the specified application with the
+        OAUTH2.0 client credentials grant.
+
+        :param app_name: Name of the application.
+        :type app_name: str
+        :return: Access token.
+        :rtype: str
+        :raises LoginError: If there is an error during token creation.
+        """
+        client_id, client_secret = self._return_client_credentials(app_name)
+        if any(
+            credential is None for credential in [client_id, client_secret]
+        ):
+            raise LoginError(
+                f"Please provide client_id and client_secret in {app_name} required to generate an access token"
+            )
+        self.logger.info(f"Attempting to create new token from {app_name}")
+        try:
+            async with self.session.post(
+                urls.Authentication["OAUTH"],
+                data={"grant_type": "client_credentials"},
+                auth=aiohttp.BasicAuth(client_id, client_secret),
+                headers={"Accept": "application/json"},
+            ) as resp:
+                text = await resp.text()
+        except Exception as e:
+            raise LoginError(e)
+
+        try:
+            token = json.loads(text)
+        except ValueError:
+            token = {}
+        if resp.status == 200 and "access_token" in token:
+            self.logger.info(
+                f"{app_name} Login Successful.. Obtained Access Token!"
+            )
+            self.token_info[app_name]["access_token"] = token["access_token"]
+            if token.get("expires_in"):
+                self._token_expiry[app_name] = time.time() + float(
+                    token["expires_in"]
+                )
+            else:
+                self._token_expiry.pop(app_name, None)
+            return token["access_token"]
+        if token.get("error") == "invalid_client":
+            raise LoginError(
+                "Invalid client_id or client_secret provided for "
+                + app_name
+                + ". Please provide valid credentials to create an access token",
+                resp.status,
+            )
+        raise LoginError(
+            f"Unable to create access token for {app_name}: {text}",
+            resp.status,
+        )
+
+    async def handle_expired_token(self, app_name, expired_token=None):
+        """
+        Handle expired access token for the specified application. Concurrent
+        callers that hit the same expired token share a single new token.
+
+        :param app_name: Name of the application.
+        :type app_name: str
+        :param expired_token: Access token that was rejected, defaults to None.
+        :type expired_token: str, optional
+        """
+        lock = self._token_locks.setdefault(app_name, asyncio.Lock())
+        async with lock:
+            current = self.token_info[app_name]["access_token"]
+            if current is not None and current != expired_token:
+                # Another task already replaced the token.
+                return
+            if expired_token is not None:
+                self.logger.info(f"{app_name} access Token has expired.")
+                self.logger.info("Handling Token Expiry...")
+            await self.create_token(app_name)
+
+    async def check_token_expiry(self, app_name):
+        """
+        Refresh the access token of the specified application ahead of its
+        expiry. Within refresh_margin seconds of expiry a single background
+        task fetches the new token while API calls keep using the current,
+        still valid one. An already expired token is refreshed before
+        returning.
+
+        :param app_name: Name of the application.
+        :type app_name: str
+        """
+        expiry = self._token_expiry.get(app_name)
+        if expiry is None:
+            return
+        remaining = expiry - time.time()
+        if remaining > self.refresh_margin:
+            return
+        token = self.token_info[app_name]["access_token"]
+        if remaining <= 0:
+            await self.handle_expired_token(app_name, token)
+            return
+        task = self._refresh_tasks.get(app_name)
+        if task is None or task.done():
+            self._refresh_tasks[app_name] = asyncio.ensure_future(
+                self._refresh_token_ahead(app_name, token)
+            )
+
+    async def _refresh_token_ahead(self, app_name, token):
+        """
+        Background task of check_token_expiry.
+        """
+        try:
+            self.logger.info(
+                f"{app_name} access Token expires soon, refreshing..."
+            )
+            await self.handle_expired_token(app_name, token)
+        except Exception as err:
+            self.logger.error(
+                f"Refreshing {app_name} access token failed: {err}"
+            )
+
+    async def command(
+        self,
+        api_method,
+        api_path,
+        app_name="new_central",
+        api_data={},
+        api_params={},
+        headers={},
+        files={},
+    ):
+        """
+        Execute an API command. Identical GET requests made while one of them is in flight share its response, see the single_flight argument.
+
+        :param api_method: HTTP method for the API request.
+        :type api_method: str
+        :param api_path: API endpoint path.
+        :type api_path: str
+        :param app_name: Name of the application, defaults to "new_central".
+        :type app_name: str, optional
+        :param api_data: Data to be sent in the API request, defaults to {}.
+        :type api_data: dict, optional
+        :param api_params: URL query parameters for the API request, defaults to {}.
+        :type api_params: dict, optional
+        :param headers: HTTP headers for the API request, defaults to {}.
+        :type headers: dict, optional
+        :param files: Files to be sent in the API request, defaults to {}.
+        :type files: dict, optional
+        :return: API response.
+        :rtype: dict
+        :raises ResponseError: If there is an error during the API request.
+        """
+        if self.single_flight and api_method == "GET" and not files:
+            key = request_key(
+                app_name, api_method, api_path, api_params, headers
+            )
+            return await self.single_flight.do(
+                key,
+                lambda: self._command(
+                    api_method,
+                    api_path,
+                    app_name,
+                    api_data,
+                    api_params,
+                    headers,
+                    files,
+                ),
+            )
+        return await self._command(
+            api_method, api_path, app_name, api_data, api_params, headers, files
+        )
+
+    async def _command(
+        self,
+        api_method,
+        api_path,
+        app_name="new_central",
+        api_data={},
+        api_params={},
+        headers={},
+        files={},
+    ):
+        """Execute an API command, see `command()`."""
+        retry = 0
+        attempt = 0
+        start = time.monotonic()
+        self._validate_method(api_method)
+        if self.token_info[app_name]["access_token"] is None:
+            await self.handle_expired_token(app_name)
+        try:
+            url = get_url(self.token_info[app_name]["base_url"], api_path)
+
+            if not headers and not files:
+                headers = {
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                }
+            if api_data and headers["Content-Type"] == "application/json":
+                api_data = json.dumps(api_data)
+
+            while True:
+                await self.check_token_expiry(app_name)
+                access_token = self.token_info[app_name]["access_token"]
+                if self.rate_limiter:
+                    wait = self.rate_limiter.reserve(
+                        app_name, api_method, api_path
+                    )
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                try:
+                    status, text, resp_headers = await self.request_url(
+                        url=url,
+                        data=api_data,
+                        method=api_method,
+                        headers=headers,
+                        params=api_params,
+                        files=files,
+                        access_token=access_token,
+                    )
+                except ResponseError as err:
+                    wait = self._get_retry_wait(
+                        app_name, api_method, api_path, attempt, start,
+                        error=err,
+                    )
+                    if wait is None:
+                        raise
+                    await asyncio.sleep(wait)
+                    attempt += 1
+                    continue
+                if self.rate_limiter:
+                    self.rate_limiter.update(
+                        app_name, api_method, api_path, status, resp_headers
+                    )
+                if status == 401:
+                    self.logger.error(
+                        "Received error 401 on requesting url "
+                        "%s with resp %s" % (str(url), str(text))
+                    )
+                    if retry >= 1:
+                        break
+                    await self.handle_expired_token(app_name, access_token)
+                    retry += 1
+                    continue
+
+                wait = self._get_retry_wait(
+                    app_name, api_method, api_path, attempt, start,
+                    status_code=status, headers=resp_headers,
+                )
+                if wait is None:
+                    break
+                self.logger.warning(
+                    "Received error %s on requesting url %s. Retrying in "
+                    "%.1f seconds" % (status, str(url), wait)
+                )
+                await asyncio.sleep(wait)
+                attempt += 1
+
+            result = {
+                "code": status,
+                "msg": text,
+                "headers": resp_headers,
+            }
+
+            try:
+                result["msg"] = json.loads(result["msg"])
+            except BaseException:
+                result["msg"] = str(text)
+
+            return result
+
+        except Exception as err:
+            err_str = f"{api_method} FAILURE "
+            self.logger.error(err)
+            raise ResponseError(err_str, err)
+
+    async def request_url(
+        self,
+        url,
+        access_token,
+        data={},
+        method="GET",
+        headers={},
+        params={},
+        files={},
+    ):
+        """
+        Make an API call to New Central or GLP.
+
+        :param url: HTTP Request URL string.
+        :type url: str
+        :param access_token: Access token for authentication.
+        :type access_token: str
+        :param data: HTTP Request payload, defaults to {}.
+        :type data: dict, optional
+        :param method: HTTP Request Method supported by New Central & GLP, defaults to "GET".
+        :type method: str, optional
+        :param headers: HTTP Request headers, defaults to {}.
+        :type headers: dict, optional
+        :param params: HTTP url query parameters, defaults to {}.
+        :type params: dict, optional
+        :param files: Files dictionary with file pointer depending on API endpoint as accepted by New Central or GLP, defaults to {}.
+        :type files: dict, optional
+        :return: HTTP status code, response text and response headers.
+        :rtype: tuple
+        :raises ResponseError: If there is an error during the API request.
+        """
+        req_headers = dict(headers)
+        req_headers["authorization"] = "Bearer " + access_token
+        if files:
+            form = aiohttp.FormData()
+            for key, value in (data or {}).items():
+                form.add_field(key, str(value))
+            for key, value in files.items():
+                if isinstance(value, tuple):
+                    form.add_field(key, value[1], filename=value[0])
+                else:
+                    form.add_field(key, value)
+            data = form
+        try:
+            async with self.session.request(
+                method,
+                url,
+                params=self._encode_params(params),
+                data=data or None,
+                headers=req_headers,
+            ) as resp:
+                text = await resp.text()
+                return resp.status, text, dict(resp.headers)
+        except Exception as err:
+            str1 = "Failed making request to URL %s " % url
+            str2 = "with error %s" % str(err)
+            err_str = f"{str1} {str2}"
+            self.logger.error(str1 + str2)
+            raise ResponseError(err_str, err)
+
+    async def close(self):
+        """
+        Close the aiohttp session and all pooled connections.
+        """
+        for task in self._refresh_tasks.values():
+            task.cancel()
+        self._refresh_tasks = {}
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_retry_wait(
+        self,
+        app_name,
+        api_method,
+        api_path,
+        attempt,
+        start,
+        status_code=None,
+        headers=None,
+        error=None,
+    ):
+        """
+        Ask the retry policy whether a failed attempt is retried and record
+        the retry.
+
+        :return: Seconds to wait before retrying, None if it is not retried.
+        :rtype: float
+        """
+        if not self.retry_policy:
+            return None
+        wait = self.retry_policy.get_wait(
+            api_method,
+            attempt,
+            start,
+            status_code=status_code,
+            headers=headers,
+            error=error,
+        )
+        if wait is not None:
+            self.retry_policy.record(
+                app_name,
+                api_method,
+                api_path,
+                attempt,
+                wait,
+                status_code=status_code,
+                error=error,
+            )
+        return wait
+
+    def _encode_params(self, params):
+        """
+        Convert query parameters to the form accepted by aiohttp. List values
+        are sent as repeated keys, matching the requests library.
+
+        :param params: URL query parameters.
+        :type params: dict
+        :return: List of (key, value) string pairs.
+        :rtype: list
+        """
+        encoded = []
+        for key, value in (params or {}).items():
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple)) else [value]
+            encoded.extend((key, str(v)) for v in values)
+        return encoded
+
+    def _validate_method(self, method):
+        """
+        Validate the HTTP method.
+
+        :param method: HTTP method.
+        :type method: str
+        :raises SystemExit: If the method is not supported.
+        """
+        if method not in SUPPORTED_API_METHODS:
+            str1 = "HTTP method '%s' not supported.. " % method
+            self.logger.error(str1)
+            exit(
+                f'Please provide an API with one of the supported methods - {", ".join(SUPPORTED_API_METHODS)}'
+            )
+
+    def _return_client_credentials(self, app_name):
+        """
+        Return client credentials for the specified application.
+
+        :param app_name: Name of the application.
+        :type app_name: str
+        :return: Client ID and client secret.
+        :rtype: tuple
+        """
+        app_token_info = self.token_info[app_name]
+        return (
+            app_token_info.get("client_id"),
+            app_token_info.get("client_secret"),
+        )
@@ -24,17 +24,48 @@ from requests_oauthlib import OAuth2Session
 from requests.auth import HTTPBasicAuth
 from oauthlib.oauth2 import BackendApplicationClient
 import json
+import sqlite3
+import threading
+import time
 import requests
 from .utils.base_utils import get_url, new_parse_input_args, console_logger
 from .utils.url_utils import NewCentralURLs
+from .utils.session_utils import (
+    ConnectionPool,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+)
+from .utils.rate_limiter import RateLimiter
+from .utils.retry_utils import RetryPolicy
+from .utils.token_store import FileTokenStore, token_store_key
+from .utils.cache_utils import ResponseCache
+from .utils.coalesce_utils import SingleFlight, request_key
 from .exceptions import LoginError, ResponseError
 
 urls = NewCentralURLs()
 SUPPORTED_API_METHODS = ("POST", "PATCH", "DELETE", "GET", "PUT")
+# Seconds before expiry at which an access token is refreshed in background.
+TOKEN_REFRESH_MARGIN = 120
 
 
 class NewCentralBase:
-    def __init__(self, token_info, logger=None, log_level="DEBUG"):
+    def __init__(
+        self,
+        token_info,
+        logger=None,
+        log_level="DEBUG",
+        pool_connections=DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        pool_block=False,
+        keep_alive=True,
+        timeout=None,
+        rate_limiter=None,
+        retry_policy=None,
+        refresh_margin=TOKEN_REFRESH_MARGIN,
+        token_store=None,
+        response_cache=None,
+        single_flight=None,
+    ):
         """
         Initialize the NewCentralBase class.
 
@@ -44,16 +75,65 @@ class NewCentralBase:
         :type logger: logging.Logger, optional
         :param log_level: Logging level, defaults to "DEBUG".
         :type log_level: str, optional
+        :param pool_connections: Number of per-host connection pools to keep, defaults to 10.
+        :type pool_connections: int, optional
+        :param pool_maxsize: Maximum number of connections kept open per host, defaults to 10.
+        :type pool_maxsize: int, optional
+        :param pool_block: Wait for a free pooled connection instead of opening extra ones once pool_maxsize is reached, defaults to False.
+        :type pool_block: bool, optional
+        :param keep_alive: Reuse connections across API calls, defaults to True.
+        :type keep_alive: bool, optional
+        :param timeout: Seconds to wait for a response from the API gateway, defaults to None.
+        :type timeout: float, optional
+        :param rate_limiter: Client-side rate limiter shared by all API calls. Defaults to a RateLimiter seeded with the documented limits, pass False to disable it.
+        :type rate_limiter: class: `pycentral.utils.rate_limiter.RateLimiter`, optional
+        :param retry_policy: Policy for retrying 429, 5xx and connection failures. Defaults to a RetryPolicy retrying idempotent methods, pass False to disable retries.
+        :type retry_policy: class: `pycentral.utils.retry_utils.RetryPolicy`, optional
+        :param refresh_margin: Seconds before expiry at which a token created by the SDK is refreshed in background, defaults to 120.
+        :type refresh_margin: float, optional
+        :param token_store: Store sharing access tokens between processes on the host, so only one of them runs the OAuth exchange. Defaults to a FileTokenStore under ./temp, pass False to disable it.
+        :type token_store: class: `pycentral.utils.token_store.TokenStore`, optional
+        :param response_cache: Cache of GET responses of slowly changing endpoints. Disabled by default, pass True for a ResponseCache with the default rules or a ResponseCache instance.
+        :type response_cache: class: `pycentral.utils.cache_utils.ResponseCache`, optional
+        :param single_flight: Coalescer making concurrent threads that send identical GET requests (same app, path, params and headers) share one upstream call. Defaults to a SingleFlight, pass False to disable it.
+        :type single_flight: class: `pycentral.utils.coalesce_utils.SingleFlight`, optional
         """
         self.token_info = new_parse_input_args(token_info)
         self.logger = self.set_logger(log_level, logger)
+        self.timeout = timeout
+        self.connection_pool = ConnectionPool(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keep_alive=keep_alive,
+        )
+        if rate_limiter is None:
+            rate_limiter = RateLimiter()
+        self.rate_limiter = rate_limiter or None
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy or None
+        self.refresh_margin = refresh_margin
+        self._token_expiry = {}
+        self._token_locks = {app: threading.Lock() for app in self.token_info}
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        if token_store is None:
+            token_store = FileTokenStore()
+        self.token_store = token_store or None
+        if response_cache is True:
+            response_cache = ResponseCache()
+        self.response_cache = response_cache or None
+        if single_flight is None:
+            single_flight = SingleFlight()
+        self.single_flight = single_flight or None
         for app in self.token_info:
             app_token_info = self.token_info[app]
             if (
                 "access_token" not in app_token_info
                 or app_token_info["access_token"] is None
             ):
-                self.token_info[app]["access_token"] = self.create_token(app)
+                self.token_info[app]["access_token"] = self.get_token(app)
 
     def set_logger(self, log_level, logger=None):
         """
@@ -85,6 +165,8 @@ class NewCentralBase:
         client = BackendApplicationClient(client_id)
 
         oauth = OAuth2Session(client=client)
+        # Reuse pooled connections to the SSO endpoint as well.
+        oauth.mount("https://", self.connection_pool.adapter)
         auth = HTTPBasicAuth(client_id, client_secret)
 
         try:
@@ -97,6 +179,12 @@ class NewCentralBase:
                 self.logger.info(
                     f"{app_name} Login Successful.. Obtained Access Token!"
                 )
+                if token.get("expires_in"):
+                    self._token_expiry[app_name] = time.time() + float(
+                        token["expires_in"]
+                    )
+                else:
+                    self._token_expiry.pop(app_name, None)
                 return token["access_token"]
         except oauthlib.oauth2.rfc6749.errors.InvalidClientError:
             exitString = (
@@ -108,26 +196,135 @@ class NewCentralBase:
         except Exception as e:
             raise LoginError(e)
 
-    def handle_expired_token(self, app_name):
+    def get_token(self, app_name, expired_token=None):
         """
-        Handle expired access token for the specified application.
+        Return a valid access token for the specified application. A token
+        saved in the token store by another process is reused when it is not
+        the expired token and not about to expire. Otherwise a new token is
+        created under the store lock and saved for the other processes.
 
         :param app_name: Name of the application.
         :type app_name: str
+        :param expired_token: Access token that must not be reused, defaults to None.
+        :type expired_token: str, optional
+        :return: Access token.
+        :rtype: str
         """
-        self.logger.info(f"{app_name} access Token has expired.")
-        self.logger.info("Handling Token Expiry...")
-        client_id, client_secret = self._return_client_credentials(app_name)
-        if any(
-            credential is None for credential in [client_id, client_secret]
-        ):
-            exit(
-                f"Please provide client_id and client_secret in {app_name} required to generate an access token"
-            )
-        else:
-            self.token_info[app_name]["access_token"] = self.create_token(
+        if not self.token_store:
+            return self.create_token(app_name)
+        client_id, _ = self._return_client_credentials(app_name)
+        key = token_store_key(
+            app_name, self.token_info[app_name]["base_url"], client_id
+        )
+        try:
+            with self.token_store.lock(key):
+                stored = self.token_store.load(key)
+                if (
+                    self.token_store.is_fresh(stored, self.refresh_margin)
+                    and stored["access_token"] != expired_token
+                ):
+                    self.logger.info(
+                        f"Loaded {app_name} access token from token store"
+                    )
+                    if stored.get("expires_at"):
+                        self._token_expiry[app_name] = stored["expires_at"]
+                    return stored["access_token"]
+                access_token = self.create_token(app_name)
+                self.token_store.save(
+                    key,
+                    {
+                        "access_token": access_token,
+                        "expires_at": self._token_expiry.get(app_name),
+                    },
+                )
+                return access_token
+        except (OSError, sqlite3.Error) as err:
+            self.logger.warning(f"Token store unavailable: {err}")
+            return self.create_token(app_name)
+
+    def handle_expired_token(self, app_name, expired_token=None):
+        """
+        Handle expired access token for the specified application. Only one
+        thread creates the new token, threads that hit the same expired
+        token wait for it and reuse it.
+
+        :param app_name: Name of the application.
+        :type app_name: str
+        :param expired_token: Access token that was rejected or is about to expire, defaults to None.
+        :type expired_token: str, optional
+        """
+        with self._token_locks[app_name]:
+            if (
+                expired_token is not None
+                and self.token_info[app_name]["access_token"] != expired_token
+            ):
+                # Another thread already replaced the token.
+                return
+            self.logger.info(f"{app_name} access Token has expired.")
+            self.logger.info("Handling Token Expiry...")
+            client_id, client_secret = self._return_client_credentials(
                 app_name
             )
+            if any(
+                credential is None
+                for credential in [client_id, client_secret]
+            ):
+                exit(
+                    f"Please provide client_id and client_secret in {app_name} required to generate an access token"
+                )
+            else:
+                self.token_info[app_name]["access_token"] = self.get_token(
+                    app_name, expired_token
+                )
+
+    def check_token_expiry(self, app_name):
+        """
+        Refresh the access token of the specified application ahead of its
+        expiry. Within refresh_margin seconds of expiry a single background
+        thread fetches the new token while API calls keep using the current,
+        still valid one. An already expired token is refreshed before
+        returning.
+
+        :param app_name: Name of the application.
+        :type app_name: str
+        """
+        expiry = self._token_expiry.get(app_name)
+        if expiry is None:
+            return
+        remaining = expiry - time.time()
+        if remaining > self.refresh_margin:
+            return
+        token = self.token_info[app_name]["access_token"]
+        if remaining <= 0:
+            self.handle_expired_token(app_name, token)
+            return
+        with self._refreshing_lock:
+            if app_name in self._refreshing:
+                return
+            self._refreshing.add(app_name)
+        thread = threading.Thread(
+            target=self._refresh_token_ahead,
+            args=(app_name, token),
+            daemon=True,
+        )
+        thread.start()
+
+    def _refresh_token_ahead(self, app_name, token):
+        """
+        Background target of check_token_expiry.
+        """
+        try:
+            self.logger.info(
+                f"{app_name} access Token expires soon, refreshing..."
+            )
+            self.handle_expired_token(app_name, token)
+        except Exception as err:
+            self.logger.error(
+                f"Refreshing {app_name} access token failed: {err}"
+            )
+        finally:
+            with self._refreshing_lock:
+                self._refreshing.discard(app_name)
 
     def command(
         self,
@@ -140,7 +337,7 @@ class NewCentralBase:
         files={},
     ):
         """
-        Execute an API command.
+        Execute an API command. Identical GET requests made while one of them is in flight share its response, see the single_flight argument.
 
         :param api_method: HTTP method for the API request.
         :type api_method: str
@@ -160,43 +357,141 @@ class NewCentralBase:
         :rtype: dict
         :raises ResponseError: If there is an error during the API request.
         """
+        if self.single_flight and api_method == "GET" and not files:
+            key = request_key(
+                app_name, api_method, api_path, api_params, headers
+            )
+            return self.single_flight.do(
+                key,
+                lambda: self._command(
+                    api_method,
+                    api_path,
+                    app_name,
+                    api_data,
+                    api_params,
+                    headers,
+                    files,
+                ),
+            )
+        return self._command(
+            api_method, api_path, app_name, api_data, api_params, headers, files
+        )
+
+    def _command(
+        self,
+        api_method,
+        api_path,
+        app_name="new_central",
+        api_data={},
+        api_params={},
+        headers={},
+        files={},
+    ):
+        """Execute an API command, see `command()`."""
         retry = 0
+        attempt = 0
+        start = time.monotonic()
         result = ""
         self._validate_method(api_method)
         limit_reached = False
         try:
-            while not limit_reached:
-                url = get_url(self.token_info[app_name]["base_url"], api_path)
-
-                if not headers and not files:
-                    headers = {
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                    }
-                if api_data and headers["Content-Type"] == "application/json":
-                    api_data = json.dumps(api_data)
-
-                resp = self.request_url(
-                    url=url,
-                    data=api_data,
-                    method=api_method,
-                    headers=headers,
-                    params=api_params,
-                    files=files,
-                    access_token=self.token_info[app_name]["access_token"],
+            url = get_url(self.token_info[app_name]["base_url"], api_path)
+
+            if not headers and not files:
+                headers = {
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                }
+            if api_data and headers["Content-Type"] == "application/json":
+                api_data = json.dumps(api_data)
+
+            cache_key = etag = None
+            if self.response_cache and api_method == "GET":
+                cache_key = self.response_cache.make_key(
+                    app_name, api_path, api_params
                 )
-                if resp.status_code == 401:
-                    self.logger.error(
-                        "Received error 401 on requesting url "
-                        "%s with resp %s" % (str(url), str(resp.text))
+                cached, etag = self.response_cache.lookup(cache_key)
+                if cached is not None:
+                    return cached
+                if etag:
+                    headers = dict(headers, **{"If-None-Match": etag})
+
+            while True:
+                while not limit_reached:
+                    self.check_token_expiry(app_name)
+                    access_token = self.token_info[app_name]["access_token"]
+                    if self.rate_limiter:
+                        self.rate_limiter.acquire(app_name, api_method, api_path)
+                    try:
+                        resp = self.request_url(
+                            url=url,
+                            data=api_data,
+                            method=api_method,
+                            headers=headers,
+                            params=api_params,
+                            files=files,
+                            access_token=access_token,
+                        )
+                    except ResponseError as err:
+                        wait = self._get_retry_wait(
+                            app_name, api_method, api_path, attempt, start,
+                            error=err,
+                        )
+                        if wait is None:
+                            raise
+                        time.sleep(wait)
+                        attempt += 1
+                        continue
+                    if self.rate_limiter:
+                        self.rate_limiter.update(
+                            app_name,
+                            api_method,
+                            api_path,
+                            resp.status_code,
+                            resp.headers,
+                        )
+                    if resp.status_code == 401:
+                        self.logger.error(
+                            "Received error 401 on requesting url "
+                            "%s with resp %s" % (str(url), str(resp.text))
+                        )
+                        if retry >= 1:
+                            limit_reached = True
+                            break
+                        self.handle_expired_token(app_name, access_token)
+                        retry += 1
+                        continue
+
+                    wait = self._get_retry_wait(
+                        app_name, api_method, api_path, attempt, start,
+                        status_code=resp.status_code, headers=resp.headers,
                     )
-                    if retry >= 1:
-                        limit_reached = True
+                    if wait is None:
                         break
-                    self.handle_expired_token(app_name)
-                    retry += 1
-                else:
-                    break
+                    self.logger.warning(
+                        "Received error %s on requesting url %s. Retrying in "
+                        "%.1f seconds" % (resp.status_code, str(url), wait)
+                    )
+                    time.sleep(wait)
+                    attempt += 1
+
+                if cache_key and etag and resp.status_code == 304:
+                    cached = self.response_cache.revalidated(
+                        cache_key, resp.headers
+                    )
+                    if cached is not None:
+                        return cached
+                    # Evicted since the lookup, the 304 has no body to
+                    # return, ask again without the ETag.
+                    headers = {
+                        k: v for k, v in headers.items() if k != "If-None-Match"
+                    }
+                    etag = None
+                    continue
+                break
+
+            if self.response_cache and api_method != "GET":
+                self.response_cache.invalidate(app_name, api_path)
 
             result = {
                 "code": resp.status_code,
@@ -209,6 +504,8 @@ class NewCentralBase:
             except BaseException:
                 result["msg"] = str(resp.text)
 
+            if cache_key:
+                self.response_cache.store(cache_key, result, len(resp.content))
             return result
 
         except Exception as err:
@@ -250,7 +547,6 @@ class NewCentralBase:
         resp = None
 
         auth = BearerAuth(access_token)
-        s = requests.Session()
         req = requests.Request(
             method=method,
             url=url,
@@ -260,12 +556,8 @@ class NewCentralBase:
             params=params,
             data=data,
         )
-        prepped = s.prepare_request(req)
-        settings = s.merge_environment_settings(
-            prepped.url, {}, None, True, None
-        )
         try:
-            resp = s.send(prepped, **settings)
+            resp = self.connection_pool.send(req, timeout=self.timeout)
             return resp
         except Exception as err:
             str1 = "Failed making request to URL %s " % url
@@ -274,6 +566,58 @@ class NewCentralBase:
             self.logger.error(str1 + str2)
             raise ResponseError(err_str, err)
 
+    def _get_retry_wait(
+        self,
+        app_name,
+        api_method,
+        api_path,
+        attempt,
+        start,
+        status_code=None,
+        headers=None,
+        error=None,
+    ):
+        """
+        Ask the retry policy whether a failed attempt is retried and record
+        the retry.
+
+        :return: Seconds to wait before retrying, None if it is not retried.
+        :rtype: float
+        """
+        if not self.retry_policy:
+            return None
+        wait = self.retry_policy.get_wait(
+            api_method,
+            attempt,
+            start,
+            status_code=status_code,
+            headers=headers,
+            error=error,
+        )
+        if wait is not None:
+            self.retry_policy.record(
+                app_name,
+                api_method,
+                api_path,
+                attempt,
+                wait,
+                status_code=status_code,
+                error=error,
+            )
+        return wait
+
+    def close(self):
+        """
+        Close all pooled connections held by this client.
+        """
+        self.connection_pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _validate_method(self, method):
         """
         Validate the HTTP method.
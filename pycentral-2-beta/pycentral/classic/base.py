@@ -22,14 +22,19 @@
 
 import json
 import re
-import os
 import sys
 import time
+import sqlite3
 import requests
-import errno
-from .base_utils import tokenLocalStoreUtil
+from .base_utils import tokenStoreUtil
 from .base_utils import C_DEFAULT_ARGS, get_url
 from .base_utils import console_logger, parseInputArgs
+from ..utils.cache_utils import ResponseCache, CLASSIC_APP_NAME
+from ..utils.session_utils import (
+    ConnectionPool,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+)
 
 SUPPORTED_METHODS = ("POST", "PATCH", "DELETE", "GET", "PUT")
 
@@ -86,8 +91,14 @@ class ArubaCentralBase:
             key-value pairs - \n
                 {"access_token": "xxxx", "refresh_token": "XXYY"}\n
     :type central_info: dict
-    :param token_store: Placeholder for future development which provides\
-        options to secrely cache and reuse access tokens. defaults to None
+    :param token_store: Options of the cache shared by every process that\
+        reuses access tokens of the same customer and API gateway client.\
+        Writes are atomic and refreshing the token is serialized by a lock,\
+        so only one process refreshes an expired token. defaults to None\
+        (JSON files in temp folder of the working directory) \n
+        * keyword type: "local" (JSON file) or "sqlite". \n
+        * keyword path: Folder of the token files, or the SQLite database\
+            file. \n
     :type token_store: dict, optional
     :param user_retries: Number of times API call should be retried after a\
         rate-limit error HTTP 429 occurs.
@@ -98,10 +109,32 @@ class ArubaCentralBase:
     :param ssl_verify: When set to True, validates SSL certs of Aruba Central\
         API Gateway, defaults to True
     :type ssl_verify: bool, optional
+    :param pool_connections: Number of per-host connection pools kept by the\
+        shared transport, defaults to 10
+    :type pool_connections: int, optional
+    :param pool_maxsize: Maximum number of connections kept open per host.\
+        Set it to at least the number of worker threads sharing this object,\
+        defaults to 10
+    :type pool_maxsize: int, optional
+    :param connection_retries: Number of times a request is retried when the\
+        connection to the API Gateway fails, defaults to 0
+    :type connection_retries: int, optional
+    :param timeout: Seconds to wait for a response from the API Gateway,\
+        defaults to None
+    :type timeout: float, optional
+    :param response_cache: Cache of GET responses of slowly changing\
+        endpoints such as groups and country codes. Disabled by default, pass\
+        True for a ResponseCache with the default rules or a ResponseCache\
+        instance.
+    :type response_cache: class:`pycentral.utils.cache_utils.ResponseCache`,\
+        optional
     """
 
     def __init__(self, central_info, token_store=None, logger=None,
-                 ssl_verify=True, user_retries=10):
+                 ssl_verify=True, user_retries=10,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, connection_retries=0,
+                 timeout=None, response_cache=None):
         """Constructor Method initializes access token. If user provides\
         access token, use the access token for API calls. Otherwise try to\
         reuse token from cache or try to generate new access token via OAUTH\
@@ -109,9 +142,24 @@ class ArubaCentralBase:
         """
         self.central_info = parseInputArgs(central_info)
         self.token_store = token_store
+        self.token_backend, self.token_key = tokenStoreUtil(
+            token_store,
+            self.central_info["customer_id"],
+            self.central_info["client_id"]
+        )
         self.logger = None
         self.ssl_verify = ssl_verify
         self.user_retries = user_retries
+        self.timeout = timeout
+        if response_cache is True:
+            response_cache = ResponseCache()
+        self.response_cache = response_cache or None
+        # Shared, pooled transport used by the OAUTH steps and API calls
+        self.connection_pool = ConnectionPool(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=connection_retries,
+        )
         # Set logger
         if logger:
             self.logger = logger
@@ -150,14 +198,10 @@ class ArubaCentralBase:
         )
         data = data.encode("utf-8")
         try:
-            s = requests.Session()
             req = requests.Request(
                 method="POST", url=url, data=data, headers=headers)
-            prepped = s.prepare_request(req)
-            settings = s.merge_environment_settings(
-                prepped.url, {}, None, self.ssl_verify, None
-            )
-            resp = s.send(prepped, **settings)
+            resp = self.connection_pool.send(
+                req, verify=self.ssl_verify, timeout=self.timeout)
             if resp and resp.status_code == 200:
                 cookies = resp.cookies.get_dict()
                 return cookies["csrftoken"], cookies["session"]
@@ -204,14 +248,10 @@ class ArubaCentralBase:
             "Cookie": "session=" + session_token
         }
         try:
-            s = requests.Session()
             req = requests.Request(
                 method="POST", url=url, data=data, headers=headers)
-            prepped = s.prepare_request(req)
-            settings = s.merge_environment_settings(
-                prepped.url, {}, None, self.ssl_verify, None
-            )
-            resp = s.send(prepped, **settings)
+            resp = self.connection_pool.send(
+                req, verify=self.ssl_verify, timeout=self.timeout)
             if resp and resp.status_code == 200:
                 result = json.loads(resp.text)
                 auth_code = result["auth_code"]
@@ -249,13 +289,9 @@ class ArubaCentralBase:
             base_url=self.central_info["base_url"], path=path, query=query)
 
         try:
-            s = requests.Session()
             req = requests.Request(method="POST", url=url)
-            prepped = s.prepare_request(req)
-            settings = s.merge_environment_settings(
-                prepped.url, {}, None, self.ssl_verify, None
-            )
-            resp = s.send(prepped, **settings)
+            resp = self.connection_pool.send(
+                req, verify=self.ssl_verify, timeout=self.timeout)
             if resp.status_code == 200:
                 result = json.loads(resp.text)
                 token = result
@@ -389,13 +425,9 @@ class ArubaCentralBase:
                 base_url=self.central_info["base_url"], path=path, query=query
             )
 
-            s = requests.Session()
             req = requests.Request(method="POST", url=url)
-            prepped = s.prepare_request(req)
-            settings = s.merge_environment_settings(
-                prepped.url, {}, None, self.ssl_verify, None
-            )
-            resp = s.send(prepped, **settings)
+            resp = self.connection_pool.send(
+                req, verify=self.ssl_verify, timeout=self.timeout)
             if resp.status_code == 200:
                 token = json.loads(resp.text)
             else:
@@ -412,7 +444,8 @@ class ArubaCentralBase:
         """This function handles storage of token for later use. Default\
         storage is unencrypted JSON file and is not secure. Override this\
         function and loadToken function to implement secure access token\
-        caching mechanism.
+        caching mechanism. The file is replaced atomically, so processes\
+        loading the token never read a partially written file.
 
         :param token: API Gateway token dict consisting of access_token and\
             refresh_token.
@@ -420,26 +453,17 @@ class ArubaCentralBase:
         :return: True if the access_token caching is successful.
         :rtype: bool
         """
-        fullName = tokenLocalStoreUtil(
-            self.token_store,
-            self.central_info["customer_id"],
-            self.central_info["client_id"]
-        )
-        if not os.path.exists(os.path.dirname(fullName)):
+        token = dict(token)
+        if "expires_in" in token and "expires_at" not in token:
             try:
-                os.makedirs(os.path.dirname(fullName))
-            except OSError as exc:  # Guard against race condition
-                if exc.errno != errno.EEXIST:
-                    self.logger.error(
-                        "Storing token failed with error " "%s" % str(exc)
-                    )
-
-        # Dumping data to json file
+                token["expires_at"] = time.time() + float(token["expires_in"])
+            except (TypeError, ValueError):
+                pass
         try:
-            with open(fullName, "w") as fp:
-                json.dump(token, fp, indent=2)
+            self.token_backend.save(self.token_key, token)
             self.logger.info(
-                "Stored Aruba Central token in file " + "%s" % str(fullName)
+                "Stored Aruba Central token in " +
+                "%s" % str(self.token_backend.path)
             )
             return True
         except Exception as err:
@@ -457,22 +481,16 @@ class ArubaCentralBase:
             stored JSON file consisting of access_token and refresh_token.
         :rtype: dict
         """
-        fullName = tokenLocalStoreUtil(
-            self.token_store,
-            self.central_info["customer_id"],
-            self.central_info["client_id"]
-        )
         token = None
         try:
-            with open(fullName, "r") as fp:
-                token = json.load(fp)
+            token = self.token_backend.load(self.token_key)
             if token:
                 self.logger.info(
-                    "Loaded token from storage from file: " +
-                    "%s" % str(fullName)
+                    "Loaded token from storage " +
+                    "%s" % str(self.token_backend.path)
                 )
             else:
-                raise UserWarning("Empty file!")
+                raise UserWarning("No stored token!")
         except Exception as err:
             self.logger.error(
                 "Unable to load token from storage with error " ".. %s" %
@@ -480,14 +498,47 @@ class ArubaCentralBase:
             )
         return token
 
-    def handleTokenExpiry(self):
+    def handleTokenExpiry(self, expired_token=None):
         """This function handles 401 error as a result of HTTP request.\
-        An attempt to refresh token is made. If refreshing token fails, this\
-        function tries to create new access token. Stores token for reuse. If\
-        all the attemps fail, program is terminated.
+        While holding the token store lock, a token refreshed by another\
+        process in the meantime is reused. Otherwise an attempt to refresh\
+        token is made. If refreshing token fails, this function tries to\
+        create new access token. Stores token for reuse. If all the attemps\
+        fail, program is terminated.
+
+        :param expired_token: Token dict rejected by the API Gateway,\
+            defaults to the current token.
+        :type expired_token: dict, optional
         """
         self.logger.info("Handling Token Expiry...")
-        token = self.refreshToken(self.central_info["token"])
+        if expired_token is None:
+            expired_token = self.central_info["token"]
+        try:
+            with self.token_backend.lock(self.token_key):
+                self._renewToken(expired_token)
+        except (OSError, sqlite3.Error) as err:
+            self.logger.warning(
+                "Token store lock failed with error %s" % str(err))
+            self._renewToken(expired_token)
+
+    def _renewToken(self, expired_token):
+        """Replace the expired token, preferring a newer stored token."""
+        expired_access = (expired_token or {}).get("access_token")
+        current = self.central_info["token"] or {}
+        if current.get("access_token") != expired_access:
+            # Already renewed by another thread using this object.
+            return
+        stored = self.loadToken()
+        if (
+            stored
+            and stored.get("access_token") != expired_access
+            and self.token_backend.is_fresh(stored)
+        ):
+            self.logger.info("Reusing access token renewed by another process")
+            self.central_info["token"] = stored
+            return
+        # The stored refresh_token is the newest one when present.
+        token = self.refreshToken(stored or expired_token or {})
         if token:
             self.logger.info("Expired access token refreshed!")
         else:
@@ -501,12 +552,24 @@ class ArubaCentralBase:
 
     def getToken(self):
         """This function attempts to obtain token from storage/cache otherwise\
-        creates new access token. Stores the token if new token is generated.
+        creates new access token. Stores the token if new token is generated.\
+        The token store lock is held meanwhile, so processes starting\
+        together create only one token.
 
         :return: API Gateway token dict consisting of access_token and\
             refresh_token
         :rtype: dict
         """
+        try:
+            with self.token_backend.lock(self.token_key):
+                return self._loadOrCreateToken()
+        except (OSError, sqlite3.Error) as err:
+            self.logger.warning(
+                "Token store lock failed with error %s" % str(err))
+            return self._loadOrCreateToken()
+
+    def _loadOrCreateToken(self):
+        """Load the stored token or create and store a new one."""
         # Check if the token is stored
         token = self.loadToken()
         if token:
@@ -550,7 +613,6 @@ class ArubaCentralBase:
             self.logger.error(str1)
 
         auth = BearerAuth(self.central_info["token"]["access_token"])
-        s = requests.Session()
         req = requests.Request(
             method=method,
             url=url,
@@ -560,18 +622,21 @@ class ArubaCentralBase:
             params=params,
             data=data,
         )
-        prepped = s.prepare_request(req)
-        settings = s.merge_environment_settings(
-            prepped.url, {}, None, self.ssl_verify, None
-        )
         try:
-            resp = s.send(prepped, **settings)
+            resp = self.connection_pool.send(
+                req, verify=self.ssl_verify, timeout=self.timeout)
             return resp
         except Exception as err:
             str1 = "Failed making request to URL %s " % url
             str2 = "with error %s" % str(err)
             self.logger.error(str1 + str2)
 
+    def close(self):
+        """This function closes all pooled connections held by the shared\
+            transport.
+        """
+        self.connection_pool.close()
+
     def command(self, apiMethod, apiPath, apiData={}, apiParams={}, headers={},
                 files={}):
         """This function calls requestURL to make an API call to Aruba Central\
@@ -612,64 +677,93 @@ class ArubaCentralBase:
         limit_reached = False
         self.user_retries
         try:
-            while not limit_reached:
-                url = get_url(
-                    self.central_info["base_url"], apiPath)
-                if not headers and not files:
-                    headers = {
-                        "Content-Type": "application/json",
-                        "Accept": "application/json",
-                    }
-                if apiData and headers["Content-Type"] == "application/json":
-                    apiData = json.dumps(apiData)
-
-                resp = self.requestUrl(
-                    url=url,
-                    data=apiData,
-                    method=method,
-                    headers=headers,
-                    params=apiParams,
-                    files=files,
-                )
-
-                if resp.status_code == 401 and "invalid_token" in resp.text:
-                    self.logger.error(
-                        "Received error 401 on requesting url "
-                        "%s with resp %s" % (str(url), str(resp.text))
+            url = get_url(
+                self.central_info["base_url"], apiPath)
+            if not headers and not files:
+                headers = {
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                }
+            if apiData and headers["Content-Type"] == "application/json":
+                apiData = json.dumps(apiData)
+
+            cache_key = etag = None
+            if self.response_cache and method == "GET":
+                cache_key = self.response_cache.make_key(
+                    CLASSIC_APP_NAME, apiPath, apiParams)
+                cached, etag = self.response_cache.lookup(cache_key)
+                if cached is not None:
+                    return cached
+                if etag:
+                    headers = dict(headers, **{"If-None-Match": etag})
+
+            while True:
+                while not limit_reached:
+                    token = self.central_info["token"]
+                    resp = self.requestUrl(
+                        url=url,
+                        data=apiData,
+                        method=method,
+                        headers=headers,
+                        params=apiParams,
+                        files=files,
                     )
 
-                    if retry >= 1:
+                    if resp.status_code == 401 and "invalid_token" in resp.text:
+                        self.logger.error(
+                            "Received error 401 on requesting url "
+                            "%s with resp %s" % (str(url), str(resp.text))
+                        )
+
+                        if retry >= 1:
+                            limit_reached = True
+                            break
+                        self.handleTokenExpiry(token)
+                        retry += 1
+
+                    elif (
+                        resp.status_code == 429
+                        and resp.headers.get("X-RateLimit-Remaining-second") == "0"
+                    ):
+                        time.sleep(2)
+                        self.logger.info(
+                            "Per-second rate limit reached. Adding 2 seconds \
+                                interval and retrying."
+                        )
+                        if retry == self.user_retries - 1:
+                            limit_reached = True
+                        retry += 1
+
+                    elif (
+                        resp.status_code == 429
+                        and resp.headers.get("X-RateLimit-Remaining-day") == "0"
+                    ):
+                        self.logger.info(
+                            "Per-day rate limit of "
+                            + str(resp.headers.get("X-RateLimit-Limit-day"))
+                            + " is exhausted. Please check Central UI to see when \
+                                the daily rate limit quota will be reset."
+                        )
                         limit_reached = True
+                    else:
                         break
-                    self.handleTokenExpiry()
-                    retry += 1
-
-                elif (
-                    resp.status_code == 429
-                    and resp.headers["X-RateLimit-Remaining-second"] == "0"
-                ):
-                    time.sleep(2)
-                    self.logger.info(
-                        "Per-second rate limit reached. Adding 2 seconds \
-                            interval and retrying."
-                    )
-                    if retry == self.user_retries - 1:
-                        limit_reached = True
-                    retry += 1
-
-                elif (
-                    resp.status_code == 429
-                    and resp.headers["X-RateLimit-Remaining-day"] == "0"
-                ):
-                    self.logger.info(
-                        "Per-day rate limit of "
-                        + str(resp.headers["X-RateLimit-Limit-day"])
-                        + " is exhausted. Please check Central UI to see when \
-                            the daily rate limit quota will be reset."
-                    )
-                    limit_reached = True
-                else:
-                    break
+
+                if cache_key and etag and resp.status_code == 304:
+                    cached = self.response_cache.revalidated(
+                        cache_key, resp.headers)
+                    if cached is not None:
+                        return cached
+                    # Evicted since the lookup, the 304 has no body to
+                    # return, ask again without the ETag.
+                    headers = {
+                        k: v for k, v in headers.items() if k != "If-None-Match"
+                    }
+                    etag = None
+                    continue
+                break
+
+            if self.response_cache and method != "GET":
+                self.response_cache.invalidate(CLASSIC_APP_NAME, apiPath)
 
             result = {
                 "code": resp.status_code,
@@ -682,6 +776,9 @@ class ArubaCentralBase:
             except BaseException:
                 result["msg"] = str(resp.text)
 
+            if cache_key:
+                self.response_cache.store(
+                    cache_key, result, len(resp.content))
             return result
 
         except Exception as err:
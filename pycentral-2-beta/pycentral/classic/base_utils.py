@@ -24,6 +24,7 @@ import logging
 import os
 from urllib.parse import urlencode, urlparse, urlunparse
 from .constants import CLUSTER_API_BASE_URL_LIST
+from ..utils.token_store import FileTokenStore, SQLiteTokenStore
 try:
     import colorlog  # type: ignore
     COLOR = True
@@ -162,6 +163,41 @@ def tokenLocalStoreUtil(token_store, customer_id="customer",
     return fullName
 
 
+def tokenStoreUtil(token_store, customer_id="customer", client_id="client"):
+    """Utility function returning the token store backend used by storeToken,\
+        loadToken and the refresh lock, and the key of the customer and API\
+        gateway client in it. The local backend keeps the file name format\
+        of tokenLocalStoreUtil so existing cached tokens are reused.
+
+    :param token_store: Token storage mechanism. \n
+        * keyword type: "local" (JSON file, default) or "sqlite". \n
+        * keyword path: path where temp folder is created to store token JSON\
+            file, or the SQLite database file (defaults to tokens.db in\
+            that folder). \n
+    :type token_store: dict
+    :param customer_id: Aruba Central customer id, defaults to "customer"
+    :type customer_id: str, optional
+    :param client_id: API Gateway client id, defaults to "client"
+    :type client_id: str, optional
+    :raises ValueError: Unsupported token store type.
+    :return: Token store backend and key.
+    :rtype: tuple
+    """
+    fullName = tokenLocalStoreUtil(token_store, customer_id, client_id)
+    key = os.path.basename(fullName)[len("tok_"):-len(".json")]
+    storeType = (token_store or {}).get("type") or "local"
+    if storeType == "local":
+        return FileTokenStore(os.path.dirname(fullName)), key
+    if storeType == "sqlite":
+        dbPath = (token_store or {}).get("path")
+        if dbPath is None:
+            dbPath = os.path.join(os.path.dirname(fullName), "tokens.db")
+        elif not os.path.splitext(dbPath)[1]:
+            dbPath = os.path.join(dbPath, "tokens.db")
+        return SQLiteTokenStore(dbPath), key
+    raise ValueError("Unsupported token store type %s" % str(storeType))
+
+
 def get_url(base_url, path='', params='', query={}, fragment=''):
     """This method constructs complete URL based on multiple parts of URL.
 
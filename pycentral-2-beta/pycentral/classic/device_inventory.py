@@ -74,7 +74,8 @@ class Inventory(object):
         resp = conn.command(apiMethod="GET", apiPath=path, apiParams=params)
         return resp
 
-    def archive_devices(self, conn, device_serials=[]):
+    def archive_devices(self, conn, device_serials=[], journal=None,
+                        job_id=None):
         """Archive a list of devices using serial numbers
 
         :param conn: Instance of class:`pycentral.ArubaCentralBase` to make an\
@@ -83,13 +84,30 @@ class Inventory(object):
         :param device_serials: List of serial number of Aruba devices that\
             should be archived
         :type device_serials: list
+        :param journal: Job journal recording every API call, defaults to\
+            None. Devices are then archived in chunks of MAX_DEVICES and\
+            running the same call again skips the chunks already archived.
+        :type journal: class:`pycentral.utils.job_journal.JobJournal`, optional
+        :param job_id: ID of the job in the journal, defaults to one derived\
+            from the serial numbers
+        :type job_id: str, optional
         :return: Response as provided by 'command' function in\
-            class:`pycentral.ArubaCentralBase`
+            class:`pycentral.ArubaCentralBase`, a list of responses per chunk\
+            with a journal
         :rtype: dict
         """
         path = urls.DEVICES["ARCHIVE_DEVICES"]
         if isinstance(device_serials, str):
             device_serials = [device_serials]
+        if journal is not None:
+            chunks = [device_serials[i:i + MAX_DEVICES]
+                      for i in range(0, len(device_serials), MAX_DEVICES)]
+            if job_id is None:
+                job_id = journal.make_job_id("archive devices", path, chunks)
+            return journal.run(
+                job_id, "archive devices", chunks,
+                lambda serials: self._archive_chunk(conn, serials),
+                logger=logger)
         if (len(device_serials)) > MAX_DEVICES:
             logger.error(
                 'Unable to archive more than {MAX_DEVICES} devices per API \
@@ -129,6 +147,12 @@ class Inventory(object):
                 f'Error in API Response. Response Code - {resp["code"]}')
         return resp
 
+    def _archive_chunk(self, conn, device_serials):
+        resp = self.archive_devices(conn, device_serials)
+        success = bool(resp) and resp["code"] == 200 and not \
+            resp["msg"].get("failed_devices")
+        return success, resp
+
     def unarchive_devices(self, conn, device_serials=[]):
         """Unarchive a list of devices using serial numbers
 
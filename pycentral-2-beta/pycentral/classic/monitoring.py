@@ -23,6 +23,7 @@
 import sys
 from .url_utils import urlJoin, MonitoringUrl
 from .base_utils import console_logger
+from ..utils.pagination_utils import Paginator
 
 urls = MonitoringUrl()
 logger = console_logger("MONITORING")
@@ -226,39 +227,27 @@ class Sites(object):
         resp = conn.command(apiMethod="DELETE", apiPath=path, apiData=data)
         return resp
 
-    def find_site_id(self, conn, site_name):
-        """Find site id from site name
+    def find_site_id(self, conn, site_name, workers=1):
+        """Find site id from site name. With workers above 1, the pages after\
+            the first one are fetched concurrently. No further pages are\
+            fetched once the site is found.
 
         :param conn: Instance of class:`pycentral.ArubaCentralBase` to make an\
             API call.
         :type conn: class:`pycentral.ArubaCentralBase`
         :param site_name: Name of the site be created.
         :type site_name: str
-        :return: Response as provided by 'command' function in\
-            class:`pycentral.ArubaCentralBase`
-        :rtype: dict
+        :param workers: Number of pages fetched concurrently, defaults to 1
+        :type workers: int, optional
+        :return: Site id, None if the site is not found.
+        :rtype: int
         """
-        max_limit_size = 1000
-        total_count = 0
-        pagination_check = True
-        offset = 0
-        count = 0
-
-        while pagination_check:
-            resp = self.get_sites(conn, offset=offset, limit=max_limit_size)
-            if resp and "msg" in resp and "sites" in resp["msg"]:
-                resp = resp["msg"]
-                count = resp["count"]
-                total_count = total_count + count
-                offset = offset + count
-
-                if total_count == resp["total"]:
-                    pagination_check = False
-
-                for site in resp["sites"]:
-                    if site["site_name"] == site_name:
-                        return site["site_id"]
-
+        paginator = Paginator(
+            self.get_sites, conn, page_size=1000, workers=workers,
+            calculate_total=True)
+        for site in paginator:
+            if site["site_name"] == site_name:
+                return site["site_id"]
         return None
 
     def _build_site_payload(self, site_name, site_address, geolocation):
@@ -22,6 +22,8 @@
 
 from .base_utils import console_logger
 from .url_utils import urlJoin, MspURL
+from ..exceptions import ResponseError
+from ..utils.pagination_utils import Paginator
 
 urls = MspURL()
 logger = console_logger("MSP")
@@ -65,13 +67,16 @@ class MSP(object):
             logger.info(log_message)
         return resp
 
-    def get_all_customers(self, conn):
+    def get_all_customers(self, conn, workers=1):
         """This function returns a list of all the customers in the MSP \
-            account
+            account. With workers above 1, the pages after the first one are\
+            fetched concurrently.
 
         :param conn: Instance of class:`pycentral.ArubaCentralBase` to make an\
             API call.
         :type conn: class:`pycentral.ArubaCentralBase`
+        :param workers: Number of pages fetched concurrently, defaults to 1
+        :type workers: int, optional
         :return: Returns list of dictionaries. Each dictionary has the\
             following keys associated with a customer - account_status,\
             account_type, ap_config_diff, application_id,\
@@ -81,26 +86,21 @@ class MSP(object):
             platform_customer_id, provision_status, region, switch_config_diff,\
             updated_at, username
         :rtype: list
+        :raises ResponseError: The API could not be reached, e.g. a timeout\
+            or refused connection.
         """
-        offset = 0
-        limit = 100
-        customer_list = []
-        while True:
-            resp = self.get_customers(conn, offset=offset, limit=limit)
-            if resp['code'] == 200:
-                resp_message = resp['msg']
-                resp_customers = resp_message['customers']
-                if (len(resp_customers) > 0):
-                    customer_list.extend(resp_customers)
-                if resp_message['total'] == len(customer_list):
-                    break
-            else:
-                log_message = f'Response code {resp["code"]}. ' \
-                    'Error in fetching list of customers.'
-                logger.error(log_message)
-                return
-            offset += limit
-        return customer_list
+        paginator = Paginator(
+            self.get_customers, conn, page_size=100, workers=workers)
+        try:
+            return list(paginator)
+        except ResponseError as err:
+            # Transport failures carry no API response code.
+            if not isinstance(err.response, dict):
+                raise
+            log_message = f'Response code {err.response["code"]}. ' \
+                'Error in fetching list of customers.'
+            logger.error(log_message)
+            return
 
     def create_customer(self, conn, customer_details):
         """This function creates a customer in the MSP account based on the \
@@ -611,7 +611,10 @@ class MSP(object):
             devices,
             group_name=None,
             customer_id=None,
-            customer_name=None):
+            customer_name=None,
+            journal=None,
+            job_id=None,
+            chunk_size=None):
         """This function assign devices to customer
 
         :param conn: Instance of class:`pycentral.ArubaCentralBase` to make an\
@@ -629,8 +632,19 @@ class MSP(object):
         :param customer_name: Name of customer, defaults to None. This \
             parameter will be ignored if customer_id parameter is passed
         :type customer_name: str, optional
+        :param journal: Job journal recording every API call, defaults to\
+            None. Running the same call again then skips the devices already\
+            moved.
+        :type journal: class:`pycentral.utils.job_journal.JobJournal`, optional
+        :param job_id: ID of the job in the journal, defaults to one derived\
+            from the request
+        :type job_id: str, optional
+        :param chunk_size: Devices moved per API call with a journal,\
+            defaults to all of them in one call
+        :type chunk_size: int, optional
         :return: Response as provided by 'command' function in\
-                    class:`pycentral.ArubaCentralBase`
+                    class:`pycentral.ArubaCentralBase`, a list of responses\
+                    per chunk with a journal
         :rtype: dict
         """
         if devices is None:
@@ -654,6 +668,20 @@ class MSP(object):
                 return
 
         apiPath = f'{urls.MSP["V1_CUSTOMER"]}/{customer_id}/devices'
+        if journal is not None:
+            size = chunk_size or len(devices) or 1
+            chunks = [devices[i:i + size]
+                      for i in range(0, len(devices), size)]
+            if job_id is None:
+                job_id = journal.make_job_id(
+                    "assign devices to customers", apiPath, group_name,
+                    chunks)
+            return journal.run(
+                job_id, "assign devices to customers", chunks,
+                lambda chunk: self._assign_chunk(
+                    conn, chunk, group_name, customer_id),
+                logger=logger)
+
         apiData = {
             "devices": devices
         }
@@ -671,6 +699,13 @@ class MSP(object):
             logger.info(log_message)
         return resp
 
+    def _assign_chunk(self, conn, devices, group_name, customer_id):
+        resp = self.assign_devices_to_customers(
+            conn, devices, group_name=group_name, customer_id=customer_id)
+        success = bool(resp) and resp['code'] == 200 and \
+            resp['msg'].get('status_code') == 200
+        return success, resp
+
     def unassign_devices_from_customers(self, conn, devices, msp_id=None):
         """This function unassign devices from the customer to the MSP's \
             device inventory
@@ -813,7 +848,8 @@ class MSP(object):
             logger.info(log_message)
         return resp
 
-    def get_msp_all_devices_and_subscriptions(self, conn, customer_name=None):
+    def get_msp_all_devices_and_subscriptions(self, conn, customer_name=None,
+                                              workers=1):
         """This function fetches all the devices & subscriptions from a MSP\
             account. If the customer_name parameter is passed, then it will\
             return all the devices & licenses in the customer account.
@@ -824,8 +860,13 @@ class MSP(object):
         :param customer_name: Name of customer, defaults to None. This \
             parameter will be ignored if customer_id parameter is passed
         :type customer_name: str, optional
+        :param workers: Number of pages fetched concurrently once the total\
+            is known, defaults to 1
+        :type workers: int, optional
         :return: List of device & licenses in the MSP or customer account
         :rtype: list
+        :raises ResponseError: The API could not be reached, e.g. a timeout\
+            or refused connection.
         """
         if customer_name is not None:
             customer_id = self.get_customer_id(
@@ -836,28 +877,22 @@ class MSP(object):
                 logger.error(log_message)
                 return
 
-        offset = 0
-        limit = 50
-        device_list = []
-        while True:
-            if customer_name:
-                resp = self.get_customer_devices_and_subscriptions(
-                    conn, offset=offset, limit=limit, customer_id=customer_id)
-            else:
-                resp = self.get_msp_devices_and_subscriptions(
-                    conn, offset=offset, limit=limit)
-            if resp['code'] == 200 and resp['msg']['status'] == 'success' \
-                    and 'deviceList' in resp['msg']:
-                resp_message = resp['msg']['deviceList']
-                resp_devices = resp_message['devices']
-                device_list.extend(resp_devices)
-                if (len(device_list) == resp_message['total_devices']):
-                    break
-            else:
-                logger.error(resp)
-                return
-            offset += limit
-        return device_list
+        if customer_name:
+            paginator = Paginator(
+                self.get_customer_devices_and_subscriptions, conn,
+                page_size=50, workers=workers, customer_id=customer_id)
+        else:
+            paginator = Paginator(
+                self.get_msp_devices_and_subscriptions, conn, page_size=50,
+                workers=workers)
+        try:
+            return list(paginator)
+        except ResponseError as err:
+            logger.error(err.response)
+            # Transport failures carry no API response.
+            if not isinstance(err.response, dict):
+                raise
+            return
 
     def get_customers_per_group(self, conn, group_name, offset=0, limit=10):
         """This function fetches the list of customers to MSP group based on \
@@ -1,3 +1,5 @@
 from .devices import Devices
+from .device_index import DeviceIndex
+from .planner import BulkPlanner
 from .subscriptions import Subscriptions
 from .user_management import UserMgmt
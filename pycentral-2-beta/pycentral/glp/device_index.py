@@ -0,0 +1,309 @@
+from ..utils.token_store import atomic_write_json
+from .devices import Devices
+from collections import defaultdict
+import json
+import re
+import threading
+
+# Version of the persisted index file layout.
+INDEX_FILE_VERSION = 1
+
+# MAC address notations accepted as lookup keys: colon or dash separated
+# octets, dot separated groups of four digits, or 12 bare hex digits.
+MAC_PATTERN = re.compile(
+    r"^(?:[0-9a-f]{2}([:-])(?:[0-9a-f]{2}\1){4}[0-9a-f]{2}"
+    r"|[0-9a-f]{4}\.[0-9a-f]{4}\.[0-9a-f]{4}"
+    r"|[0-9a-f]{12})$",
+    re.IGNORECASE,
+)
+
+
+def normalize_mac(mac):
+    """
+    Normalize a MAC address to lowercase hex digits without separators, so
+    aa:bb:cc:dd:ee:ff, AA-BB-CC-DD-EE-FF and aabb.ccdd.eeff match.
+
+    :param mac: MAC address
+    :type mac: str
+    :rtype: str
+    """
+    if not mac:
+        return None
+    return re.sub(r"[^0-9a-f]", "", str(mac).lower()) or None
+
+
+def parse_mac(key):
+    """
+    Normalize a lookup key with normalize_mac() if it is written as a MAC
+    address, so serial numbers and IDs are never matched against MACs.
+
+    :param key: lookup key
+    :type key: str
+    :return: normalized MAC address, None if key is not a MAC address
+    :rtype: str
+    """
+    if not key or not MAC_PATTERN.match(str(key).strip()):
+        return None
+    return normalize_mac(key)
+
+
+class DeviceIndex(object):
+    """
+    In-memory index of the devices of a GLP workspace, keyed by device ID,
+    serial number and MAC address, with secondary indexes on application,
+    region and subscription. It is built once from the devices API and then
+    refreshed incrementally with the devices updated since the newest
+    updatedAt seen (the watermark). It can be saved to and loaded from a
+    JSON file to survive restarts.
+
+    Incremental refreshes cannot see devices removed from the workspace,
+    call refresh(conn, full=True) now and then to drop them.
+
+    A DeviceIndex can be passed as device_index to
+    class: `pycentral.glp.Devices` to resolve serials without API calls.
+
+    :param path: JSON file used by save() and load(), defaults to None
+    :type path: str, optional
+    """
+
+    def __init__(self, path=None):
+        """Constructor Method"""
+        self.path = path
+        self.watermark = None
+        self._devices = {}
+        self._by_serial = {}
+        self._by_mac = {}
+        self._by_application = defaultdict(set)
+        self._by_region = defaultdict(set)
+        self._by_subscription = defaultdict(set)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._devices.values()))
+
+    def build(self, conn, workers=1):
+        """
+        Replace the index content with every device of the workspace.
+
+        :param conn: new pycentral base object
+        :type conn: class: `pycentral.NewCentralBase`
+        :param workers: Number of pages fetched concurrently, defaults to 1.
+        :type workers: int
+        :raises ResponseError: A page could not be fetched, the index is left
+            unchanged.
+        :return: number of devices indexed
+        :rtype: int
+        """
+        devices = list(Devices().iter_devices(conn, workers=workers))
+        with self._lock:
+            self._clear()
+            for device in devices:
+                self._add(device)
+            return len(self._devices)
+
+    def refresh(self, conn, full=False, workers=1):
+        """
+        Update the index with the devices updated since the watermark. Falls
+        back to build() when the index has no watermark yet or full is True.
+
+        :param conn: new pycentral base object
+        :type conn: class: `pycentral.NewCentralBase`
+        :param full: Download the whole workspace again, defaults to False.
+        :type full: bool
+        :param workers: Number of pages fetched concurrently, defaults to 1.
+        :type workers: int
+        :raises ResponseError: A page could not be fetched.
+        :return: number of devices added or updated
+        :rtype: int
+        """
+        if full or not self.watermark:
+            return self.build(conn, workers=workers)
+        # ge rather than gt, devices updated within the same timestamp as
+        # the watermark may not have been seen yet.
+        devices = Devices().iter_devices(
+            conn,
+            filter=f"updatedAt ge '{self.watermark}'",
+            sort="updatedAt asc",
+            workers=workers,
+        )
+        count = 0
+        for device in devices:
+            self.upsert(device)
+            count += 1
+        conn.logger.info(f"Device index refreshed, {count} devices updated")
+        return count
+
+    def upsert(self, device):
+        """
+        Add a device dict or replace the indexed device with the same ID.
+
+        :param device: device as returned by the devices API
+        :type device: dict
+        """
+        with self._lock:
+            self._remove(device["id"])
+            self._add(device)
+
+    def remove(self, device_id):
+        """
+        Remove a device from the index.
+
+        :param device_id: GLP device ID
+        :type device_id: str
+        :return: the removed device, None if it was not indexed
+        :rtype: dict
+        """
+        with self._lock:
+            return self._remove(device_id)
+
+    def get(self, key, default=None):
+        """
+        Look up a device by ID, serial number or MAC address.
+
+        :param key: device ID, serial number or MAC address
+        :type key: str
+        :return: device dict
+        :rtype: dict
+        """
+        with self._lock:
+            device = self._devices.get(key)
+            if device is None and key in self._by_serial:
+                device = self._devices[self._by_serial[key]]
+            if device is None:
+                mac = parse_mac(key)
+                if mac:
+                    device = self._devices.get(self._by_mac.get(mac))
+            return default if device is None else device
+
+    def get_by_serial(self, serial):
+        """Return the device with this serial number, or None."""
+        with self._lock:
+            device_id = self._by_serial.get(serial)
+            return self._devices.get(device_id)
+
+    def get_by_mac(self, mac):
+        """Return the device with this MAC address, or None."""
+        with self._lock:
+            device_id = self._by_mac.get(parse_mac(mac))
+            return self._devices.get(device_id)
+
+    def by_application(self, application_id):
+        """Return the devices assigned to an application ID."""
+        return self._select(self._by_application, application_id)
+
+    def by_region(self, region):
+        """Return the devices provisioned in a region."""
+        return self._select(self._by_region, region)
+
+    def by_subscription(self, subscription_id):
+        """Return the devices holding a subscription ID."""
+        return self._select(self._by_subscription, subscription_id)
+
+    def save(self, path=None):
+        """
+        Write the index and its watermark atomically to a JSON file.
+
+        :param path: JSON file, defaults to the path given to the constructor
+        :type path: str
+        """
+        path = path or self.path
+        with self._lock:
+            data = {
+                "version": INDEX_FILE_VERSION,
+                "watermark": self.watermark,
+                "devices": list(self._devices.values()),
+            }
+            atomic_write_json(path, data)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved with save(). A missing file gives an empty index
+        that is built on its first refresh.
+
+        :param path: JSON file
+        :type path: str
+        :rtype: class: `DeviceIndex`
+        """
+        index = cls(path)
+        try:
+            with open(path, "r") as fp:
+                data = json.load(fp)
+        except FileNotFoundError:
+            return index
+        if data.get("version") != INDEX_FILE_VERSION:
+            return index
+        for device in data.get("devices", []):
+            index._add(device)
+        index.watermark = data.get("watermark") or index.watermark
+        return index
+
+    def _select(self, secondary, key):
+        with self._lock:
+            return [self._devices[i] for i in secondary.get(key, ())]
+
+    def _keys(self, device):
+        application = device.get("application") or {}
+        subscriptions = device.get("subscription") or []
+        return (
+            application.get("id"),
+            device.get("region"),
+            [s.get("id") for s in subscriptions if s.get("id")],
+        )
+
+    def _add(self, device):
+        device_id = device["id"]
+        self._devices[device_id] = device
+        if device.get("serialNumber"):
+            self._by_serial[device["serialNumber"]] = device_id
+        mac = normalize_mac(device.get("macAddress"))
+        if mac:
+            self._by_mac[mac] = device_id
+        application_id, region, subscription_ids = self._keys(device)
+        if application_id:
+            self._by_application[application_id].add(device_id)
+        if region:
+            self._by_region[region].add(device_id)
+        for subscription_id in subscription_ids:
+            self._by_subscription[subscription_id].add(device_id)
+        updated_at = device.get("updatedAt")
+        # ISO 8601 timestamps of the same format sort as strings.
+        if updated_at and (not self.watermark or updated_at > self.watermark):
+            self.watermark = updated_at
+
+    def _remove(self, device_id):
+        device = self._devices.pop(device_id, None)
+        if device is None:
+            return None
+        if self._by_serial.get(device.get("serialNumber")) == device_id:
+            del self._by_serial[device["serialNumber"]]
+        mac = normalize_mac(device.get("macAddress"))
+        if mac and self._by_mac.get(mac) == device_id:
+            del self._by_mac[mac]
+        application_id, region, subscription_ids = self._keys(device)
+        for secondary, key in [
+            (self._by_application, application_id),
+            (self._by_region, region),
+        ] + [(self._by_subscription, s) for s in subscription_ids]:
+            ids = secondary.get(key)
+            if ids is not None:
+                ids.discard(device_id)
+                if not ids:
+                    del secondary[key]
+        return device
+
+    def _clear(self):
+        self.watermark = None
+        self._devices.clear()
+        self._by_serial.clear()
+        self._by_mac.clear()
+        self._by_application.clear()
+        self._by_region.clear()
+        self._by_subscription.clear()
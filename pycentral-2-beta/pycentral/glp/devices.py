@@ -1,6 +1,16 @@
 from ..utils.url_utils import NewCentralURLs, urlJoin
+from ..utils.pagination_utils import Paginator
+from ..exceptions import ResponseError
 from .subscriptions import Subscriptions
-from ..utils.glp_utils import check_progress, rate_limit_check
+from ..utils.glp_utils import (
+    chunk_inputs,
+    has_rate_limiter,
+    rate_limit_check,
+    run_chunks,
+)
+from collections import namedtuple
+from urllib.parse import quote
+import functools
 import time
 
 urls = NewCentralURLs()
@@ -11,41 +21,151 @@ INPUT_SIZE = 5
 PATCH_RPM = 5
 # Rate limit for POST Device functions.
 POST_RPM = 4
+# Properties kept in compact device records when no select is given.
+DEVICE_RECORD_FIELDS = (
+    "id",
+    "serialNumber",
+    "macAddress",
+    "partNumber",
+    "deviceType",
+    "region",
+    "updatedAt",
+)
+# Longest URL encoded filter sent when resolving serials in bulk, keeps the
+# request URL well below common 8 KB gateway limits.
+MAX_FILTER_LENGTH = 4000
+
+SerialResolution = namedtuple("SerialResolution", ["ids", "unresolved"])
+
+
+@functools.lru_cache(maxsize=None)
+def device_record_type(fields):
+    """
+    Return the compact record type of devices with the given properties, a
+    namedtuple without per-instance dict.
+
+    :param fields: device properties
+    :type fields: tuple
+    :rtype: type
+    """
+    return namedtuple("DeviceRecord", fields, rename=True)
+
+
+def add_device_bodies(network=(), compute=(), storage=()):
+    """
+    Split devices to add into request bodies of at most INPUT_SIZE devices of
+    one type, network first, then compute and storage.
+
+    :rtype: list
+    """
+    bodies = []
+    inputs = {"network": network, "compute": compute, "storage": storage}
+    for device_type, devices in inputs.items():
+        for chunk in chunk_inputs(list(devices or []), INPUT_SIZE):
+            body = {"network": [], "compute": [], "storage": []}
+            body[device_type] = chunk
+            bodies.append(body)
+    return bodies
+
+
+def _select_fields(select):
+    if not select:
+        return ()
+    if isinstance(select, str):
+        select = select.split(",")
+    return tuple(field.strip() for field in select if field.strip())
 
 
 class Devices(object):
-    def get_all_devices(self, conn, select=None):
+    def __init__(self, device_index=None):
+        """
+        :param device_index: Local inventory index consulted before the API when resolving serials. Either a dict of serial to device ID, or an object whose get(serial) returns the device dict.
+        :type device_index: dict, optional
+        """
+        self.device_index = device_index
+
+    def get_all_devices(self, conn, select=None, workers=1):
         """
         Get a list of devices managed in a workspace.
         Rate limits are enforced on this API. 80 requests per minute is supported per workspace. API will result in 429 if this threshold is breached.
 
         :param select: A comma separated list of select properties to display in the response. The default is that all properties are returned.
         :type select: Array of strings unique (Example: sort=serialNumber,macAddress desc)
-        :return: API response
+        :param workers: Number of pages fetched concurrently once the first page reports the total, defaults to 1. Requests stay within the rate limiter of conn.
+        :type workers: int
+        :raises ResponseError: The API could not be reached, e.g. a timeout or refused connection.
+        :return: API response, with the devices of every page in msg["items"]
         :rtype: dict
         """
         conn.logger.info("Getting all devices in GLP workspace")
-        limit = 2000
-        offset = 0
-
-        result = []
+        paginator = Paginator(
+            self.get_device, conn, page_size=2000, workers=workers,
+            select=",".join(_select_fields(select)) or None,
+        )
+        items = []
+        resp = None
+        try:
+            for resp in paginator.pages():
+                items.extend(resp["msg"]["items"])
+        except ResponseError as err:
+            conn.logger.error(f"Error fetching list of devices: {err}")
+            # Transport failures carry no API response to return.
+            if not isinstance(err.response, dict):
+                raise
+            return err.response
+        resp["msg"]["items"] = items
+        resp["msg"]["count"] = len(items)
+        resp["msg"]["offset"] = 0
+        return resp
 
-        while True:
-            resp = self.get_device(
-                conn, limit=limit, offset=offset, select=select
-            )
-            if resp["code"] == 200:
-                resp_message = resp["msg"]
-                if resp_message["count"] < 2000:
-                    result = resp
-                    break
-                else:
-                    result.append(resp)
-                    offset += limit
-            else:
-                print("Error fetching list of devices", resp["code"])
+    def iter_devices(
+        self,
+        conn,
+        select=None,
+        filter=None,
+        sort=None,
+        compact=False,
+        page_size=2000,
+        workers=1,
+    ):
+        """
+        Iterate over the devices managed in a workspace one page at a time, so memory use does not grow with the size of the workspace. Pages already fetched are dropped once their devices have been yielded.
 
-        return result
+        :param conn: new pycentral base object
+        :type conn: class: `pycentral.NewCentralBase`
+        :param select: Device properties returned by the API, the server leaves out the others. The default is that all properties are returned.
+        :type select: list or str (Example: ["serialNumber", "macAddress"])
+        :param filter: device filters joined by logical operators
+        :type filter: str
+        :param sort: sort string expressions
+        :type sort: str
+        :param compact: Yield DeviceRecord namedtuples of the selected properties, or of DEVICE_RECORD_FIELDS without select, instead of dicts. Missing properties are None.
+        :type compact: bool
+        :param page_size: Devices per API call, at most 2000.
+        :type page_size: int
+        :param workers: Number of pages fetched concurrently once the first page reports the total, defaults to 1.
+        :type workers: int
+        :raises ResponseError: A page could not be fetched, iteration stops.
+        :return: generator of device dicts or DeviceRecord namedtuples
+        :rtype: generator
+        """
+        fields = _select_fields(select)
+        paginator = Paginator(
+            self.get_device,
+            conn,
+            page_size=page_size,
+            workers=workers,
+            filter=filter,
+            select=",".join(fields) or None,
+            sort=sort,
+        )
+        if not compact:
+            yield from paginator
+            return
+        fields = fields or DEVICE_RECORD_FIELDS
+        record = device_record_type(fields)
+        for device in paginator:
+            yield record._make(device.get(field) for field in fields)
 
     def get_device(
         self, conn, limit=2000, offset=0, filter=None, select=None, sort=None
@@ -107,6 +227,13 @@ class Devices(object):
         :rtype: (bool, str)
         """
 
+        if self.device_index is not None:
+            device_id = self.device_index.get(serial)
+            if isinstance(device_id, dict):
+                device_id = device_id.get("id")
+            if device_id:
+                return (True, device_id)
+
         filter = f"serialNumber eq '{serial}'"
         resp = self.get_device(conn, filter=filter)
         if resp["code"] != 200:
@@ -116,6 +243,129 @@ class Devices(object):
         else:
             return (True, resp["msg"]["items"][0]["id"])
 
+    def resolve_device_ids(
+        self,
+        conn,
+        serials,
+        operator="or",
+        max_filter_length=MAX_FILTER_LENGTH,
+        index=None,
+    ):
+        """
+        Resolve many device serials to GLP device IDs with as few API calls as possible. Serials found in the local index are not queried. The rest are batched into combined filter expressions, each batch as long as the URL allows, and resolved with one GET per batch.
+
+        :param conn: new pycentral base object
+        :type conn: class: `pycentral.NewCentralBase`
+        :param serials: device serials
+        :type serials: list
+        :param operator: "or" to join serialNumber eq clauses, or "in" to send one serialNumber in clause.
+        :type operator: str
+        :param max_filter_length: Longest URL encoded filter of a batch.
+        :type max_filter_length: int
+        :param index: Local inventory index, defaults to the device_index of this object. Either a dict of serial to device ID, or an object whose get(serial) returns the device dict.
+        :type index: dict, optional
+
+        :return: SerialResolution namedtuple. ids is a dict of serial to device ID, unresolved lists the serials not found or whose batch request failed, in input order.
+        :rtype: SerialResolution
+        """
+        if operator not in ("or", "in"):
+            raise ValueError('operator must be "or" or "in"')
+        index = self.device_index if index is None else index
+        ids = {}
+        pending = []
+        for serial in dict.fromkeys(serials):
+            device_id = index.get(serial) if index is not None else None
+            if isinstance(device_id, dict):
+                device_id = device_id.get("id")
+            if device_id:
+                ids[serial] = device_id
+            else:
+                pending.append(serial)
+
+        for batch in self._serial_filters(
+            pending, operator, max_filter_length
+        ):
+            filter, batch_serials = batch
+            resp = self.get_device(
+                conn,
+                limit=len(batch_serials),
+                filter=filter,
+                select="id,serialNumber",
+            )
+            if resp["code"] != 200:
+                conn.logger.error(
+                    f"Resolving {len(batch_serials)} serials failed with "
+                    f"code {resp['code']}"
+                )
+                continue
+            wanted = set(batch_serials)
+            for device in resp["msg"].get("items", []):
+                if device.get("serialNumber") in wanted:
+                    ids[device["serialNumber"]] = device["id"]
+
+        unresolved = [s for s in dict.fromkeys(serials) if s not in ids]
+        if unresolved:
+            conn.logger.error(
+                f"Get device ID from serial failed for {unresolved}!"
+            )
+        return SerialResolution(ids, unresolved)
+
+    def _serial_filters(self, serials, operator, max_filter_length):
+        """
+        Split serials into (filter, serials) batches whose URL encoded filter stays within max_filter_length.
+        """
+        batch = []
+        length = 0
+        for serial in serials:
+            value = "'" + str(serial).replace("'", "''") + "'"
+            if operator == "in":
+                clause = value
+                separator = quote(", ")
+                overhead = len(quote("serialNumber in ()"))
+            else:
+                clause = f"serialNumber eq {value}"
+                separator = quote(" or ")
+                overhead = 0
+            clause_length = len(quote(clause))
+            if batch and (
+                overhead + length + len(separator) + clause_length
+                > max_filter_length
+            ):
+                yield self._serial_filter(batch, operator)
+                batch, length = [], 0
+            length += clause_length + (len(separator) if batch else 0)
+            batch.append(serial)
+        if batch:
+            yield self._serial_filter(batch, operator)
+
+    def _serial_filter(self, serials, operator):
+        values = ["'" + str(s).replace("'", "''") + "'" for s in serials]
+        if operator == "in":
+            return f"serialNumber in ({', '.join(values)})", serials
+        return (
+            " or ".join(f"serialNumber eq {value}" for value in values),
+            serials,
+        )
+
+    def _ids_from_serials(self, conn, serials):
+        """
+        Resolve serials to device IDs for the bulk operations, keeping the input order and dropping unresolved serials.
+        """
+        ids = self.resolve_device_ids(conn, serials).ids
+        return [ids[serial] for serial in serials if serial in ids]
+
+    def _run_chunks(
+        self, conn, api_method, chunks, request, rpm, action, **kwargs
+    ):
+        """
+        Submit chunks to the devices API pipelined, see glp_utils.run_chunks().
+        """
+        path = urls.GLP_DEVICES["DEFAULT"]
+        return run_chunks(
+            conn, self, api_method, path, chunks, request, rpm, action,
+            **kwargs
+        )
+
     def get_status(self, conn, id):
         """
         Get status of an async GLP devices request.
@@ -134,13 +384,26 @@ class Devices(object):
         resp = conn.command("GET", path, "glp")
         return resp
 
-    def add_devices(self, conn, network=[], compute=[], storage=[]):
+    def add_devices(
+        self,
+        conn,
+        network=[],
+        compute=[],
+        storage=[],
+        pipelined=False,
+        journal=None,
+        job_id=None,
+        timeout=None,
+    ):
         """
         Post devices to GLP workspace. Handles coordinating chaining requests
         if passed more than 5 devices(max per api call). Can use any
         combination of network, compute, and storage devices. Always return a
         202 response code if basic input validation is met. Currently does not
-        support Async get status handling to confirm operation success.
+        support Async get status handling to confirm operation success, unless
+        pipelined: chunks of every type are then submitted as fast as the
+        POST rate limit allows and their async transactions are tracked
+        together.
 
         :param conn: new pycentral base object
         :type conn: class: `pycentral.ArubaCentralBase`
@@ -150,23 +413,51 @@ class Devices(object):
         :type compute: list
         :param storage: storage devices as dict objects
         :type storage: list
+        :param pipelined: flag to return the per-chunk report
+        :type pipelined: bool
+        :param journal: job journal recording every chunk, so running the
+            same call again resumes where it stopped
+        :type journal: class: `pycentral.utils.job_journal.JobJournal`
+        :param job_id: ID of the job in the journal, defaults to one derived
+            from the requests
+        :type job_id: str
+        :param timeout: seconds the call may take before tracking of the async
+            transactions stops and the chunks still running are reported
+            failed, defaults to None (no deadline). With a timeout the chunks
+            are submitted pipelined and tracked
+        :type timeout: float
 
         :return: list of resp objects as provided by 'command' function in
-            class: `pycentral.ArubaCentralBase`
+            class: `pycentral.ArubaCentralBase`, or list of ChunkResult when
+            pipelined, whose inputs are the request bodies
         :rtype: list
         """
 
         count = len(network) + len(compute) + len(storage)
         resp_list = []
 
+        if pipelined or journal is not None or timeout is not None:
+            report = self.__add_dev(
+                conn,
+                None,
+                {"network": network, "compute": compute, "storage": storage},
+                pipelined=True,
+                journal=journal,
+                job_id=job_id,
+                timeout=timeout,
+            )
+            if pipelined:
+                return report
+            return [result.response for result in report]
+
         # Check for rate limit handler
         if count > INPUT_SIZE:
             conn.logger.info(
                 "WARNING MORE THAN 5 DEVICES IS AN ALPHA FEATURE!"
             )
-            resp_list.append(self.__add_dev("network", network))
-            resp_list.append(self.__add_dev("compute", compute))
-            resp_list.append(self.__add_dev("storage", storage))
+            resp_list.append(self.__add_dev(conn, "network", network))
+            resp_list.append(self.__add_dev(conn, "compute", compute))
+            resp_list.append(self.__add_dev(conn, "storage", storage))
             return resp_list
         else:
             path = urls.GLP_DEVICES["DEFAULT"]
@@ -179,7 +470,7 @@ class Devices(object):
                 conn.logger.error("Add device request failed!")
             return resp_list
 
-    def __add_dev(self, conn, type, inputs):
+    def __add_dev(self, conn, type, inputs, pipelined=False, **kwargs):
         """
         Helper function for add_devices. Handles splitting inputs larger than
         input size and coordinates running the commands to not exceed rate
@@ -189,20 +480,36 @@ class Devices(object):
         :type conn: class: `pycentral.ArubaCentralBase`
         :param type: one of network, compute, or storage
         :type param: str
-        :param inputs: list of 'type' objects in dict format
+        :param inputs: list of 'type' objects in dict format, or a dict of
+            them by type when pipelined
         :type inputs: list
+        :param pipelined: flag to submit the chunks of every type pipelined
+        :type pipelined: bool
+        :param kwargs: journal, job_id and timeout, when pipelined
 
         :return: response object as provided by 'command' function in
-            class: `pycentral.ArubaCentralBase`
+            class: `pycentral.ArubaCentralBase`, or list of ChunkResult when
+            pipelined
         :rtype: list
         """
 
         path = urls.GLP_DEVICES["DEFAULT"]
         data = {"network": [], "compute": [], "storage": []}
 
+        if pipelined:
+            return self._run_chunks(
+                conn,
+                "POST",
+                add_device_bodies(**inputs),
+                lambda body: (None, body),
+                POST_RPM,
+                "add device",
+                **kwargs
+            )
+
         if len(inputs) > INPUT_SIZE:
             split_input, wait_time = rate_limit_check(
-                inputs, INPUT_SIZE, POST_RPM
+                inputs, INPUT_SIZE, POST_RPM, conn
             )
 
             resp_list = []
@@ -231,16 +538,31 @@ class Devices(object):
                 conn.logger.error(f"Add device request failed for {inputs}!")
             else:
                 conn.logger.info("Add device request accepted...")
-            time.sleep(60 / POST_RPM)
+            if not has_rate_limiter(conn):
+                time.sleep(60 / POST_RPM)
             return resp
 
-    def add_sub(self, conn, devices, sub, serial=False, key=False):
+    def add_sub(
+        self,
+        conn,
+        devices,
+        sub,
+        serial=False,
+        key=False,
+        pipelined=False,
+        journal=None,
+        job_id=None,
+        timeout=None,
+    ):
         """
         Add subscription to device(s). API endpoint supports five devices
         per request. Handles chaining multiple requests for greater than
         five devices supplied. An additional response dict object will be
         appended to the return list for each additional request required to
         handle the number of input devices passed to the function.
+        Chunks are submitted without waiting for earlier ones to complete,
+        their async transactions are polled together by an
+        AsyncOperationTracker.
 
         :param conn: new pycentral base object
         :type conn: class: `pycentral.ArubaCentralBase`
@@ -252,21 +574,27 @@ class Devices(object):
         :type serial: bool
         :param key: flag to use subscription key
         :type key: bool
+        :param pipelined: flag to return the per-chunk report
+        :type pipelined: bool
+        :param journal: job journal recording every chunk, so running the
+            same call again resumes where it stopped
+        :type journal: class: `pycentral.utils.job_journal.JobJournal`
+        :param job_id: ID of the job in the journal, defaults to one derived
+            from the requests
+        :type job_id: str
+        :param timeout: seconds the call may take before tracking of the async
+            transactions stops and the chunks still running are reported
+            failed, defaults to None (no deadline)
+        :type timeout: float
 
         :return: list of API response objects as provided by 'command' function
-            in class: `pycentral.ArubaCentralBase`
+            in class: `pycentral.ArubaCentralBase`, or list of ChunkResult
+            when pipelined
         :rtype: list
         """
 
         if serial:
-            d_list = []
-            for d in devices:
-                id = self.get_device_id(conn, d)
-                if id[0]:
-                    d_list.append(id[1])
-                else:
-                    conn.logger.error("Get device ID from serial failed!")
-            devices = d_list
+            devices = self._ids_from_serials(conn, devices)
 
         if key:
             s = Subscriptions()
@@ -276,55 +604,44 @@ class Devices(object):
             else:
                 conn.logger.error("Get sub ID from key failed!")
 
-        split_input, wait_time = None, None
-
-        # Split devices list per input size.
         if len(devices) > INPUT_SIZE:
-            split_input, wait_time = rate_limit_check(
-                devices, INPUT_SIZE, PATCH_RPM
-            )
             conn.logger.info("WARNING MORE THAN 5 DEVICES IS A BETA FEATURE!")
 
-        # Setup variables for iterating commands.
-        queue = [devices] if not split_input else split_input
-        resp_list = []
-        path = urls.GLP_DEVICES["DEFAULT"]
         body = {"subscription": [{"id": sub}]}
-
-        for inputs in queue:
-            params = {"id": inputs}
-
-            resp = conn.command(
-                "PATCH", path, "glp", api_params=params, api_data=body
-            )
-            if resp["code"] == 202:
-                conn.logger.info("Add sub request accepted...")
-                id = resp["msg"]["transactionId"]
-                status = check_progress(conn, id, self, limit=PATCH_RPM)
-                if status[0]:
-                    conn.logger.info(
-                        "Sucessfully added subscriptions to devices!"
-                    )
-                    resp_list.append(status[1])
-                else:
-                    conn.logger.error("Add subscription failed!")
-                    resp_list.append(status[1])
-            else:
-                conn.logger.error("Bad request for add subscription!")
-                resp_list.append(resp)
-
-            if wait_time:
-                time.sleep(wait_time)
-
-        return resp_list
-
-    def remove_sub(self, conn, devices, serial=False):
+        report = self._run_chunks(
+            conn,
+            "PATCH",
+            chunk_inputs(devices, INPUT_SIZE),
+            lambda inputs: ({"id": inputs}, body),
+            PATCH_RPM,
+            "add subscription",
+            journal=journal,
+            job_id=job_id,
+            timeout=timeout,
+        )
+        if pipelined:
+            return report
+        return [result.response for result in report]
+
+    def remove_sub(
+        self,
+        conn,
+        devices,
+        serial=False,
+        pipelined=False,
+        journal=None,
+        job_id=None,
+        timeout=None,
+    ):
         """
         Remove a subscription from a device. API endpoint supports five devices
         per request. Handles chaining multiple requests for greater than
         five devices supplied. An additional response dict object will be
         appended to the return list for each additional request required to
         handle the number of input devices passed to the function.
+        Chunks are submitted without waiting for earlier ones to complete,
+        their async transactions are polled together by an
+        AsyncOperationTracker.
 
         :param conn: new pycentral base object
         :type conn: class: `pycentral.ArubaCentralBase`
@@ -332,71 +649,64 @@ class Devices(object):
         :type devices: list
         :param serial: flag to use device serial
         :type serial: bool
+        :param pipelined: flag to return the per-chunk report
+        :type pipelined: bool
+        :param journal: job journal recording every chunk, so running the
+            same call again resumes where it stopped
+        :type journal: class: `pycentral.utils.job_journal.JobJournal`
+        :param job_id: ID of the job in the journal, defaults to one derived
+            from the requests
+        :type job_id: str
+        :param timeout: seconds the call may take before tracking of the async
+            transactions stops and the chunks still running are reported
+            failed, defaults to None (no deadline)
+        :type timeout: float
 
         :return: list of API response objects as provided by 'command' function
-            in class: `pycentral.ArubaCentralBase`
+            in class: `pycentral.ArubaCentralBase`, or list of ChunkResult
+            when pipelined
         :rtype: list
         """
 
         if serial:
-            d_list = []
-            for d in devices:
-                id = self.get_device_id(conn, d)
-                if id[0]:
-                    d_list.append(id[1])
-                else:
-                    conn.logger.error("Get device ID from serial failed!")
-            devices = d_list
-
-        split_input, wait_time = None, None
+            devices = self._ids_from_serials(conn, devices)
 
-        # Split devices list per input size.
         if len(devices) > INPUT_SIZE:
-            split_input, wait_time = rate_limit_check(
-                devices, INPUT_SIZE, PATCH_RPM
-            )
             conn.logger.info("WARNING MORE THAN 5 DEVICES IS A BETA FEATURE!")
 
-        # Setup variables for iterating commands.
-        queue = [devices] if not split_input else split_input
-        resp_list = []
-        path = urls.GLP_DEVICES["DEFAULT"]
         body = {"subscription": []}
-
-        for inputs in queue:
-            params = {"id": inputs}
-
-            resp = conn.command(
-                "PATCH", path, "glp", api_params=params, api_data=body
-            )
-            if resp["code"] == 202:
-                conn.logger.info("Remove sub request accepted...")
-                id = resp["msg"]["transactionId"]
-                status = check_progress(conn, id, self, limit=PATCH_RPM)
-                if status[0]:
-                    conn.logger.info(
-                        "Sucessfully Removed subscriptions from devices!"
-                    )
-                    resp_list.append(status[1])
-                else:
-                    conn.logger.error("Remove subscription failed!")
-                    resp_list.append(status[1])
-            else:
-                conn.logger.error("Bad request for remove subscription!")
-                resp_list.append(resp)
-
-            if wait_time:
-                time.sleep(wait_time)
-
-        return resp_list
+        report = self._run_chunks(
+            conn,
+            "PATCH",
+            chunk_inputs(devices, INPUT_SIZE),
+            lambda inputs: ({"id": inputs}, body),
+            PATCH_RPM,
+            "remove subscription",
+            journal=journal,
+            job_id=job_id,
+            timeout=timeout,
+        )
+        if pipelined:
+            return report
+        return [result.response for result in report]
 
     def assign_devices(
-        self, conn, devices=None, application=None, region=None, serial=False
+        self,
+        conn,
+        devices=None,
+        application=None,
+        region=None,
+        serial=False,
+        pipelined=False,
+        journal=None,
+        job_id=None,
+        timeout=None,
     ):
         
         """
         Update devices by passing one or more device IDs. Currently supports assigning and un-assigning devices to and from an application or applying/removing subscriptions to/from devices.
         Rate limits are enforced on this API. Five requests per minute is supported per workspace. API will result in 429 if this threshold is breached.
+        More than five devices are split into chunks of five submitted within the rate limit, whose async transactions are tracked together.
 
         :param devices: array of strings consisting of device serial numbers
         :type devices: array of strings
@@ -406,150 +716,90 @@ class Devices(object):
         :type region: string
         :param serial: True or False value, deafult is set to True
         :type serial: boolean (Example: True)
-        :return: API response
+        :param pipelined: Return the per-chunk report, a list of ChunkResult in chunk order.
+        :type pipelined: boolean
+        :param journal: Job journal recording every chunk, so running the same call again skips the chunks already applied.
+        :type journal: class: `pycentral.utils.job_journal.JobJournal`
+        :param job_id: ID of the job in the journal, defaults to one derived from the requests.
+        :type job_id: string
+        :param timeout: Seconds the call may take before tracking of the async transactions stops and the chunks still running are reported failed, defaults to None (no deadline).
+        :type timeout: float
+        :return: API response, a list of API responses for more than five devices
         :rtype: dict
         """
         conn.logger.info("Assigning device(s) to an application")
-        path = urls.GLP_DEVICES["DEFAULT"]
 
         if serial:
-            d_list = []
-            for d in devices:
-                id = self.get_device_id(conn, d)
-                if id[0]:
-                    d_list.append(id[1])
-                else:
-                    conn.logger.error("Get device ID from serial failed!")
-            devices = d_list
-
-        if len(devices) > INPUT_SIZE:
-            resp = []
-            rate_check = rate_limit_check(devices, INPUT_SIZE, PATCH_RPM)
-            queue, wait_time = rate_check
-
-            for i in range(len(queue)):
-                params = {"id": queue[i]}
-
-                data = {"application": application, "region": region}
-
-                time.sleep(wait_time)
-
-                resp.append(
-                    conn.command(
-                        api_method="PATCH",
-                        api_path=path,
-                        api_params=params,
-                        api_data=data,
-                        app_name="glp",
-                    )
-                )
-
-        else:
-            params = {"id": devices}
-
-            data = {"application": application, "region": region}
-
-            resp = conn.command(
-                api_method="PATCH",
-                api_path=path,
-                api_params=params,
-                api_data=data,
-                app_name="glp",
-            )
-
-        if resp["code"] == 202:
-            conn.logger.info(
-                "Assign device(s) to application request accepted..."
-            )
-            id = resp["msg"]["transactionId"]
-            status = check_progress(conn, id, self, limit=PATCH_RPM)
-            if status[0]:
-                conn.logger.info(
-                    "Sucessfully assigned device(s) to application!"
-                )
-                return status[1]
-            else:
-                conn.logger.error("Assign device(s) to application failed!")
-                return status[1]
-        conn.logger.error("Bad request for assign device(s) to application!")
-        return resp
-
-    def unassign_devices(self, conn, devices=None, serial=False):
+            devices = self._ids_from_serials(conn, devices)
+
+        data = {"application": application, "region": region}
+        report = self._run_chunks(
+            conn,
+            "PATCH",
+            chunk_inputs(devices, INPUT_SIZE),
+            lambda inputs: ({"id": inputs}, data),
+            PATCH_RPM,
+            "assign device(s) to application",
+            journal=journal,
+            job_id=job_id,
+            timeout=timeout,
+        )
+        if pipelined:
+            return report
+        if len(report) == 1:
+            return report[0].response
+        return [result.response for result in report]
+
+    def unassign_devices(
+        self,
+        conn,
+        devices=None,
+        serial=False,
+        pipelined=False,
+        journal=None,
+        job_id=None,
+        timeout=None,
+    ):
         
         """
         Update devices by passing one or more device IDs. Currently supports assigning and un-assigning devices to and from an application or applying/removing subscriptions to/from devices.
         Rate limits are enforced on this API. Five requests per minute is supported per workspace. API will result in 429 if this threshold is breached.
+        More than five devices are split into chunks of five submitted within the rate limit, whose async transactions are tracked together.
 
         :param devices: array of strings consisting of device serial numbers
         :type devices: array of strings
         :param serial: True or False value, deafult is set to True
         :type serial: boolean (Example: True)
-        :return: API response
+        :param pipelined: Return the per-chunk report, a list of ChunkResult in chunk order.
+        :type pipelined: boolean
+        :param journal: Job journal recording every chunk, so running the same call again skips the chunks already applied.
+        :type journal: class: `pycentral.utils.job_journal.JobJournal`
+        :param job_id: ID of the job in the journal, defaults to one derived from the requests.
+        :type job_id: string
+        :param timeout: Seconds the call may take before tracking of the async transactions stops and the chunks still running are reported failed, defaults to None (no deadline).
+        :type timeout: float
+        :return: API response, a list of API responses for more than five devices
         :rtype: dict
         """
         conn.logger.info("Unassigning device(s) from an application")
-        path = urls.GLP_DEVICES["DEFAULT"]
 
         if serial:
-            d_list = []
-            for d in devices:
-                id = self.get_device_id(conn, d)
-                if id[0]:
-                    d_list.append(id[1])
-                else:
-                    conn.logger.error("Get device ID from serial failed!")
-            devices = d_list
-
-        if len(devices) > INPUT_SIZE:
-            resp = []
-            rate_check = rate_limit_check(devices, INPUT_SIZE, PATCH_RPM)
-            queue, wait_time = rate_check
-
-            for i in range(len(queue)):
-                params = {"id": queue[i]}
-
-                data = {"application": {"id": None}, "region": None}
-
-                time.sleep(wait_time)
-
-                resp.append(
-                    conn.command(
-                        api_method="PATCH",
-                        api_path=path,
-                        api_params=params,
-                        api_data=data,
-                        app_name="glp",
-                    )
-                )
-
-        else:
-            params = {"id": devices}
-
-            data = {"application": {"id": None}, "region": None}
-
-            resp = conn.command(
-                api_method="PATCH",
-                api_path=path,
-                api_params=params,
-                api_data=data,
-                app_name="glp",
-            )
-
-        if resp["code"] == 202:
-            conn.logger.info("Unassign device(s) from application accepted...")
-            id = resp["msg"]["transactionId"]
-            status = check_progress(conn, id, self, limit=PATCH_RPM)
-            if status[0]:
-                conn.logger.info(
-                    "Sucessfully unassigned device(s) from application!"
-                )
-                return status[1]
-            else:
-                conn.logger.error(
-                    "Unassign device(s) from application failed!"
-                )
-                return status[1]
-        conn.logger.error(
-            "Bad request for unassign device(s) from application!"
+            devices = self._ids_from_serials(conn, devices)
+
+        data = {"application": {"id": None}, "region": None}
+        report = self._run_chunks(
+            conn,
+            "PATCH",
+            chunk_inputs(devices, INPUT_SIZE),
+            lambda inputs: ({"id": inputs}, data),
+            PATCH_RPM,
+            "unassign device(s) from application",
+            journal=journal,
+            job_id=job_id,
+            timeout=timeout,
         )
-        return resp
+        if pipelined:
+            return report
+        if len(report) == 1:
+            return report[0].response
+        return [result.response for result in report]
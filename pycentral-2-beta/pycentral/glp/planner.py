@@ -0,0 +1,318 @@
+from ..utils.url_utils import NewCentralURLs
+from ..utils.glp_utils import (
+    DEVICE_LIMIT,
+    POLL_BACKOFF,
+    POLL_INITIAL_INTERVAL,
+    POLL_MAX_INTERVAL,
+    chunk_inputs,
+    has_rate_limiter,
+    run_chunks,
+)
+from . import devices as glp_devices
+from . import subscriptions as glp_subscriptions
+from collections import namedtuple
+
+urls = NewCentralURLs()
+
+# Seconds an accepted async transaction is expected to take to complete when
+# no better estimate is given.
+DEFAULT_COMPLETION_TIME = 10
+
+PlannedChunk = namedtuple("PlannedChunk", ["index", "start", "inputs"])
+
+# Log and job journal names of the planned operations, the same as the module
+# methods use, so a job started by either is resumed by the other.
+ACTIONS = {
+    "add_devices": "add device",
+    "assign_devices": "assign device(s) to application",
+    "unassign_devices": "unassign device(s) from application",
+    "add_sub": "add subscription",
+    "remove_sub": "remove subscription",
+    "add_subscription": "add subscription(s) to workspace",
+}
+
+
+def poll_schedule(completion_time):
+    """
+    Predict how an AsyncOperationTracker polls a transaction completing after completion_time seconds.
+
+    :param completion_time: seconds the transaction takes
+    :type completion_time: float
+    :return: number of status calls, and seconds after submission of the poll seeing the transaction complete
+    :rtype: (int, float)
+    """
+    interval = POLL_INITIAL_INTERVAL
+    elapsed, polls = interval, 1
+    while elapsed < completion_time:
+        interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+        elapsed += interval
+        polls += 1
+    return polls, elapsed
+
+
+class BulkPlan(object):
+    """
+    Chunk schedule of a bulk GLP operation, with the API calls it uses and its predicted wall-clock time. Plans are made by class: `BulkPlanner` and run with execute().
+
+    :ivar operation: name of the planned operation, e.g. "add_sub"
+    :ivar chunks: PlannedChunk namedtuples, start is the predicted submission time in seconds from the start of the run
+    :ivar calls: number of submission calls
+    :ivar status_calls: predicted number of async status calls
+    :ivar quota: predicted calls by (HTTP method, API path)
+    :ivar duration: predicted seconds until the last chunk completes
+    """
+
+    def __init__(
+        self,
+        operation,
+        module_instance,
+        api_method,
+        path,
+        chunks,
+        request,
+        rpm,
+        status_path,
+        status_rpm,
+        completion_time=DEFAULT_COMPLETION_TIME,
+        burst=None,
+    ):
+        """
+        :param operation: name of the planned operation
+        :type operation: str
+        :param module_instance: instance of the module class (Devices or Subscriptions) running the plan
+        :param api_method: HTTP method of the submission calls
+        :type api_method: str
+        :param path: API endpoint path of the submission calls
+        :type path: str
+        :param chunks: inputs of every submission call
+        :type chunks: list
+        :param request: callable returning the (api_params, api_data) of a chunk
+        :type request: callable
+        :param rpm: rate limit per minute of the submission calls
+        :type rpm: float
+        :param status_path: API endpoint path of the async status calls
+        :type status_path: str
+        :param status_rpm: rate limit per minute of the async status calls
+        :type status_rpm: float
+        :param completion_time: seconds a transaction is expected to take
+        :type completion_time: float
+        :param burst: number of chunks submitted at once before pacing starts, defaults to the pacing of a base object without rate limiter
+        :type burst: int
+        """
+        self.operation = operation
+        self.module = module_instance
+        self.api_method = api_method
+        self.path = path
+        self.request = request
+        self.rpm = rpm
+        count = len(chunks)
+        if burst is None:
+            burst = count if count <= rpm else 1
+        spacing = 60 / rpm
+        self.chunks = [
+            PlannedChunk(i, max(0, i - burst + 1) * spacing, inputs)
+            for i, inputs in enumerate(chunks)
+        ]
+        polls, completed_at = poll_schedule(completion_time)
+        self.calls = count
+        self.status_calls = count * polls
+        self.quota = {(api_method, path): count}
+        if count:
+            self.quota[("GET", status_path)] = self.status_calls
+        self.duration = 0
+        if count:
+            # Polls beyond the status API quota delay completions as well.
+            status_time = max(0, self.status_calls - status_rpm) * 60
+            self.duration = max(
+                self.chunks[-1].start + completed_at,
+                status_time / status_rpm,
+            )
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def __repr__(self):
+        calls = ", ".join(
+            f"{method} {path}: {count}"
+            for (method, path), count in self.quota.items()
+        )
+        return (
+            f"<BulkPlan {self.operation}: {len(self.chunks)} chunks, "
+            f"{calls}, ~{self.duration:.0f}s>"
+        )
+
+    def execute(self, conn, journal=None, job_id=None, timeout=None):
+        """
+        Run the plan, submitting its chunks in order as fast as the rate limit allows and tracking their async transactions together.
+
+        :param conn: new pycentral base object
+        :type conn: class: `pycentral.NewCentralBase`
+        :param journal: Job journal recording every chunk, so running the same call again skips the chunks already applied.
+        :type journal: class: `pycentral.utils.job_journal.JobJournal`
+        :param job_id: ID of the job in the journal, defaults to one derived from the requests.
+        :type job_id: string
+        :param timeout: Seconds the call may take before tracking of the async transactions stops and the chunks still running are reported failed, defaults to None (no deadline).
+        :type timeout: float
+        :return: ChunkResult of every chunk, in chunk order
+        :rtype: list
+        """
+        conn.logger.info(f"Executing {self!r}")
+        return run_chunks(
+            conn,
+            self.module,
+            self.api_method,
+            self.path,
+            [chunk.inputs for chunk in self.chunks],
+            self.request,
+            self.rpm,
+            ACTIONS[self.operation],
+            journal=journal,
+            job_id=job_id,
+            timeout=timeout,
+        )
+
+
+class BulkPlanner(object):
+    """
+    Plan bulk glp.Devices and glp.Subscriptions operations before running them: how the inputs are chunked, when each chunk is submitted, how many calls of which API it takes and how long it should run. Chunk sizes and rate limits are read from INPUT_SIZE, PATCH_RPM, POST_RPM and SUB_LIMIT of the modules when planning.
+
+    Devices and subscriptions are given by ID, resolve serials and keys first with Devices.resolve_device_ids() and Subscriptions.get_sub_id().
+
+    :param conn: new pycentral base object, when given its rate limiter's remaining quota and limits are used to predict pacing, defaults to None
+    :type conn: class: `pycentral.NewCentralBase`, optional
+    :param completion_time: seconds an async transaction is expected to take, defaults to DEFAULT_COMPLETION_TIME
+    :type completion_time: float, optional
+    """
+
+    def __init__(self, conn=None, completion_time=DEFAULT_COMPLETION_TIME):
+        """Constructor Method"""
+        self.conn = conn
+        self.completion_time = completion_time
+
+    def add_devices(self, network=[], compute=[], storage=[]):
+        """
+        Plan Devices.add_devices(pipelined=True).
+
+        :rtype: class: `BulkPlan`
+        """
+        return self._devices_plan(
+            "add_devices",
+            "POST",
+            glp_devices.add_device_bodies(network, compute, storage),
+            lambda body: (None, body),
+            glp_devices.POST_RPM,
+        )
+
+    def assign_devices(self, devices, application=None, region=None):
+        """
+        Plan Devices.assign_devices(pipelined=True).
+
+        :param devices: device IDs
+        :type devices: list
+        :rtype: class: `BulkPlan`
+        """
+        data = {"application": application, "region": region}
+        return self._patch_plan("assign_devices", devices, data)
+
+    def unassign_devices(self, devices):
+        """
+        Plan Devices.unassign_devices(pipelined=True).
+
+        :param devices: device IDs
+        :type devices: list
+        :rtype: class: `BulkPlan`
+        """
+        data = {"application": {"id": None}, "region": None}
+        return self._patch_plan("unassign_devices", devices, data)
+
+    def add_sub(self, devices, sub):
+        """
+        Plan Devices.add_sub(pipelined=True).
+
+        :param devices: device IDs
+        :type devices: list
+        :param sub: subscription ID
+        :type sub: str
+        :rtype: class: `BulkPlan`
+        """
+        data = {"subscription": [{"id": sub}]}
+        return self._patch_plan("add_sub", devices, data)
+
+    def remove_sub(self, devices):
+        """
+        Plan Devices.remove_sub(pipelined=True).
+
+        :param devices: device IDs
+        :type devices: list
+        :rtype: class: `BulkPlan`
+        """
+        return self._patch_plan("remove_sub", devices, {"subscription": []})
+
+    def add_subscription(self, subscriptions, offset=0):
+        """
+        Plan Subscriptions.add_subscription(pipelined=True).
+
+        :param subscriptions: subscription keys (Example: [{"key": "string"}])
+        :type subscriptions: list
+        :rtype: class: `BulkPlan`
+        """
+        path = urls.GLP_SUBSCRIPTION["DEFAULT"]
+        status_path = urls.GLP_SUBSCRIPTION["GET_ASYNC"]
+        rpm, burst = self._pacing("POST", path, glp_subscriptions.POST_RPM)
+        return BulkPlan(
+            "add_subscription",
+            glp_subscriptions.Subscriptions(),
+            "POST",
+            path,
+            chunk_inputs(subscriptions, glp_subscriptions.INPUT_SIZE),
+            lambda inputs: ({"offset": offset}, {"subscriptions": inputs}),
+            rpm,
+            status_path,
+            self._status_rpm(status_path, glp_subscriptions.SUB_LIMIT),
+            completion_time=self.completion_time,
+            burst=burst,
+        )
+
+    def _patch_plan(self, operation, devices, data):
+        return self._devices_plan(
+            operation,
+            "PATCH",
+            chunk_inputs(devices, glp_devices.INPUT_SIZE),
+            lambda inputs: ({"id": inputs}, data),
+            glp_devices.PATCH_RPM,
+        )
+
+    def _devices_plan(self, operation, api_method, chunks, request, rpm):
+        path = urls.GLP_DEVICES["DEFAULT"]
+        status_path = urls.GLP_DEVICES["GET_ASYNC"]
+        rpm, burst = self._pacing(api_method, path, rpm)
+        return BulkPlan(
+            operation,
+            glp_devices.Devices(),
+            api_method,
+            path,
+            chunks,
+            request,
+            rpm,
+            status_path,
+            self._status_rpm(status_path, DEVICE_LIMIT),
+            completion_time=self.completion_time,
+            burst=burst,
+        )
+
+    def _bucket(self, api_method, path):
+        if self.conn is None or not has_rate_limiter(self.conn):
+            return None
+        return self.conn.rate_limiter.get_bucket("glp", api_method, path)
+
+    def _pacing(self, api_method, path, rpm):
+        """Rate and burst of submissions, from conn's rate limiter if any."""
+        bucket = self._bucket(api_method, path)
+        if bucket is None:
+            return rpm, None
+        # Requests left now, other jobs may have used part of the quota.
+        return bucket.rate_per_minute, max(0, int(bucket.tokens))
+
+    def _status_rpm(self, status_path, rpm):
+        bucket = self._bucket("GET", status_path)
+        return rpm if bucket is None else bucket.rate_per_minute
@@ -1,6 +1,8 @@
 from ..utils.url_utils import NewCentralURLs, urlJoin
-from ..utils.glp_utils import rate_limit_check, check_progress
-import time
+from ..utils.glp_utils import chunk_inputs, run_chunks
+from ..utils.cache_utils import LookupCaches
+from ..utils.pagination_utils import Paginator
+from ..exceptions import ResponseError
 
 urls = NewCentralURLs()
 
@@ -13,40 +15,62 @@ SUB_GET_LIMIT = 50
 
 SUB_LIMIT = 5
 
+# Subscription key to ID cache of every base object. Set sub_id_cache.ttl to
+# change how long IDs are kept for, 0 disables the cache.
+sub_id_cache = LookupCaches()
+
+
 class Subscription(object):
-    def get_all_subscriptions(self, conn, select=None):
+    def get_all_subscriptions(self, conn, select=None, workers=1):
         conn.logger.info("Getting all subscriptions in GLP workspace")
         """
-        Get all subscriptions managed in a workspace.
+        Get all subscriptions managed in a workspace. The key to ID cache used by get_sub_id() is filled from the result when id and key are selected.
         Rate limits are enforced on this API. 40 requests per minute is supported per workspace. API will result in 429 if this threshold is breached.
         
         :param select: A comma separated list of select properties to return in the response. By default, all properties are returned.
         :type select: Array of strings unique (Example: select=id,key)
-        :return: API response
+        :param workers: Number of pages fetched concurrently once the first page reports the total, defaults to 1.
+        :type workers: int
+        :raises ResponseError: The API could not be reached, e.g. a timeout or refused connection.
+        :return: API response, with the subscriptions of every page in msg["items"]
         :rtype: dict
         """
+        paginator = Paginator(
+            self.get_subscription, conn, workers=workers, select=select
+        )
+        items = []
+        resp = None
+        try:
+            for resp in paginator.pages():
+                items.extend(resp["msg"]["items"])
+        except ResponseError as err:
+            conn.logger.error(f"Error fetching list of subscriptions: {err}")
+            # Transport failures carry no API response to return.
+            if not isinstance(err.response, dict):
+                raise
+            return err.response
+        sub_id_cache.get(conn).update(
+            (item.get("key"), item.get("id")) for item in items
+        )
+        resp["msg"]["items"] = items
+        resp["msg"]["count"] = len(items)
+        resp["msg"]["offset"] = 0
+        return resp
 
-        limit = SUB_GET_LIMIT
-        offset = 0
-
-        result = []
-
-        while True:
-            resp = self.get_subscription(
-                conn, limit=limit, offset=offset, select=select
-            )
-            if resp["code"] == 200:
-                resp_message = resp["msg"]
-                if resp_message["count"] < SUB_GET_LIMIT:
-                    result = resp
-                    break
-                else:
-                    result.append(resp)
-                    offset += limit
-            else:
-                print("Error fetching list of devices", resp["code"])
+    def prefetch_sub_ids(self, conn, workers=1):
+        """
+        Fill the key to ID cache used by get_sub_id() with every subscription of the workspace, with one API call per 50 subscriptions instead of one per key looked up.
 
-        return result
+        :param conn: new pycentral base object
+        :type conn: class: `pycentral.NewCentralBase`
+        :param workers: Number of pages fetched concurrently, defaults to 1.
+        :type workers: int
+        :return: API response of get_all_subscriptions()
+        :rtype: dict
+        """
+        return self.get_all_subscriptions(
+            conn, select="id,key", workers=workers
+        )
 
     def get_subscription(
         self, conn, filter=None, select=None, sort=None, limit=SUB_GET_LIMIT, offset=0
@@ -86,7 +110,7 @@ class Subscription(object):
 
     def get_sub_id(self, conn, key):
         """
-        Get subscription ID in a GLP workspace by key.
+        Get subscription ID in a GLP workspace by key. IDs found are cached per base object for sub_id_cache.ttl seconds, see prefetch_sub_ids() to fill the cache in bulk.
 
         :param conn: new pycentral base object
         :type conn: class: `pycentral.ArubaCentralBase`
@@ -98,6 +122,11 @@ class Subscription(object):
         :rtype: (bool, str)
         """
 
+        cache = sub_id_cache.get(conn)
+        id = cache.get(key)
+        if id is not None:
+            return (True, id)
+
         filter = f"key eq '{key}'"
         resp = self.get_subscription(conn, filter=filter)
         if resp["code"] != 200:
@@ -105,7 +134,9 @@ class Subscription(object):
         elif resp["msg"]["count"] == 0:
             return (False, "Key not found")
         else:
-            return (True, resp["msg"]["items"][0]["id"])
+            id = resp["msg"]["items"][0]["id"]
+            cache.put(key, id)
+            return (True, id)
 
     def get_status(self, conn, id):
         """
@@ -123,12 +154,23 @@ class Subscription(object):
         resp = conn.command("GET", path, "glp")
         return resp
 
-    def add_subscription(self, conn, subscriptions=None, limit=0, offset=0):
+    def add_subscription(
+        self,
+        conn,
+        subscriptions=None,
+        limit=0,
+        offset=0,
+        pipelined=False,
+        journal=None,
+        job_id=None,
+        timeout=None,
+    ):
         conn.logger.info("Adding subscription(s) to GLP workspace")
         """
         Add one or more subscriptions to a workspace.
         This API provides an asynchronous response and will always return "202 Accepted" if basic input validations are successful. The location header in the response provides the URI to be invoked for fetching progress of the subscription addition task. For details about the status fetch URL, refer to the API Get progress or status of async operations in subscriptions.
         Rate limits are enforced on this API. 4 requests per minute is supported per workspace. API will result in 429 if this threshold is breached.
+        More than five subscriptions are split into chunks of five submitted within the rate limit, whose async transactions are tracked together.
 
         :param subscription: An array of subscription keys.
         :type subscription: Array of objects (Example: "subscriptions": [{"key": "string"}])
@@ -136,63 +178,42 @@ class Subscription(object):
         :type limit: integer <int64> [ 1 .. 50 ]
         :param offset: Specifies the zero-based resource offset to start the response from. Default value is 0.
         :type offset: integer <int64>
-        :return: API response
+        :param pipelined: Return the per-chunk report, a list of ChunkResult in chunk order.
+        :type pipelined: boolean
+        :param journal: Job journal recording every chunk, so running the same call again skips the chunks already applied.
+        :type journal: class: `pycentral.utils.job_journal.JobJournal`
+        :param job_id: ID of the job in the journal, defaults to one derived from the requests.
+        :type job_id: string
+        :param timeout: Seconds the call may take before tracking of the async transactions stops and the chunks still running are reported failed, defaults to None (no deadline).
+        :type timeout: float
+        :return: API response, a list of API responses for more than five subscriptions
         :rtype: dict
         """
         path = urls.GLP_SUBSCRIPTION["DEFAULT"]
 
-        if len(subscriptions) > INPUT_SIZE:
-            resp = []
-            rate_check = rate_limit_check(subscriptions, INPUT_SIZE, POST_RPM)
-            queue, wait_time = rate_check
-
-            for i in range(len(queue)):
-                params = {
-                    "offset": offset,
-                }
-
-                data = {"subscriptions": queue[i]}
-
-                time.sleep(wait_time)
+        cache = sub_id_cache.get(conn)
+        for subscription in subscriptions:
+            cache.invalidate(subscription.get("key"))
+
+        report = run_chunks(
+            conn,
+            self,
+            "POST",
+            path,
+            chunk_inputs(subscriptions, INPUT_SIZE),
+            lambda inputs: ({"offset": offset}, {"subscriptions": inputs}),
+            POST_RPM,
+            "add subscription(s) to workspace",
+            journal=journal,
+            job_id=job_id,
+            timeout=timeout,
+        )
+        if pipelined:
+            return report
+        if len(report) == 1:
+            return report[0].response
+        return [result.response for result in report]
 
-                resp.append(
-                    conn.command(
-                        api_method="POST",
-                        api_path=path,
-                        api_params=params,
-                        api_data=data,
-                        app_name="glp",
-                    )
-                )
 
-        else:
-            params = {
-                "offset": offset,
-            }
-
-            data = {"subscriptions": subscriptions}
-
-            resp = conn.command(
-                api_method="POST",
-                api_path=path,
-                api_params=params,
-                api_data=data,
-                app_name="glp",
-            )
-
-        if resp["code"] == 202:
-            conn.logger.info(
-                "Add subscription(s) to workspace request accepted..."
-            )
-            id = resp["msg"]["transactionId"]
-            status = check_progress(conn, id, self, limit=SUB_LIMIT)
-            if status[0]:
-                conn.logger.info(
-                    "Sucessfully added subscription(s) to workspace!"
-                )
-                return status[1]
-            else:
-                conn.logger.error("Add subscription(s) to workspace failed!")
-                return status[1]
-        conn.logger.error("Bad request for add subscription(s) to workspace!")
-        return resp
+# Alias matching the name imported by the glp package and Devices module.
+Subscriptions = Subscription
@@ -1,13 +1,20 @@
 from ..utils.url_utils import NewCentralURLs, urlJoin
+from ..utils.cache_utils import LookupCaches
+from ..utils.pagination_utils import Paginator
+from ..exceptions import ResponseError
 
 urls = NewCentralURLs()
 
+# User email to ID cache of every base object. Set user_id_cache.ttl to change
+# how long IDs are kept for, 0 disables the cache.
+user_id_cache = LookupCaches()
+
 
 class UserMgmt(object):
     def get_users(self, conn, filter=None, limit=300, offset=0):
         conn.logger.info("Getting users in GLP workspace")
         """
-        Retrieve users that match given filters. All users are returned when no filters are provided.
+        Retrieve users that match given filters. All users are returned when no filters are provided. The email to ID cache used by get_user_id() is filled from the users returned.
 
         :param filter: Filter data using a subset of OData 4.0 and return only the subset of resources that match the filter. The Get users API can be filtered by: id, username, userStatus, createdAt, updatedAt, lastLogin
         :type filter: string (Example: 
@@ -48,8 +55,39 @@ class UserMgmt(object):
         resp = conn.command(
             api_method="GET", api_path=path, api_params=params, app_name="glp"
         )
+        if resp["code"] == 200:
+            user_id_cache.get(conn).update(
+                (user.get("username"), user.get("id"))
+                for user in resp["msg"].get("items") or []
+            )
         return resp
 
+    def prefetch_user_ids(self, conn, workers=1):
+        """
+        Fill the email to ID cache used by get_user_id() with every user of the workspace, with one API call per 300 users instead of one per email looked up.
+
+        :param conn: new pycentral base object
+        :type conn: class: `pycentral.NewCentralBase`
+        :param workers: Number of pages fetched concurrently, defaults to 1.
+        :type workers: int
+        :raises ResponseError: The API could not be reached, e.g. a timeout or refused connection.
+        :return: number of users cached, or the API response of the page that failed
+        :rtype: int or dict
+        """
+        conn.logger.info("Prefetching user IDs of GLP workspace")
+        count = 0
+        try:
+            paginator = Paginator(self.get_users, conn, workers=workers)
+            for resp in paginator.pages():
+                count += len(resp["msg"]["items"])
+        except ResponseError as err:
+            conn.logger.error(f"Error fetching list of users: {err}")
+            # Transport failures carry no API response to return.
+            if not isinstance(err.response, dict):
+                raise
+            return err.response
+        return count
+
     def get_user(self, conn, email=None, id=None):
         conn.logger.info("Getting a user in GLP workspace")
         """
@@ -77,7 +115,7 @@ class UserMgmt(object):
 
     def get_user_id(self, conn, email):
         """
-        Get user ID in a GLP workspace by email
+        Get user ID in a GLP workspace by email. IDs found are cached per base object for user_id_cache.ttl seconds, see prefetch_user_ids() to fill the cache in bulk.
 
         :param conn: new pycentral base object
         :type conn: class: `pycentral.ArubaCentralBase`
@@ -89,6 +127,10 @@ class UserMgmt(object):
         :rtype: (bool, str)
         """
 
+        id = user_id_cache.get(conn).get(email)
+        if id is not None:
+            return (True, id)
+
         filter = f"username eq '{email}'"
         resp = self.get_users(conn, filter=filter)
         if resp["code"] != 200:
@@ -115,6 +157,7 @@ class UserMgmt(object):
 
         path = urlJoin(urls.GLP_USER_MANAGEMENT["DELETE"], user_id)
         resp = conn.command(api_method="DELETE", api_path=path, app_name="glp")
+        user_id_cache.get(conn).invalidate(email, user_id)
         return resp
 
     def inv_user(self, conn, email, send_link):
@@ -135,6 +178,8 @@ class UserMgmt(object):
         body = {"email": email, "sendWelcomeEmail": send_link}
 
         resp = conn.command("POST", path, "glp", api_data=body)
+        # A user invited again after being deleted gets a new ID.
+        user_id_cache.get(conn).invalidate(email)
         if resp["code"] == 200:
             conn.logger.info("Invite user successful!")
         else:
@@ -0,0 +1,413 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import copy
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+# Slowly changing read endpoints cached by default as
+# (app name, API path prefix, seconds to keep a response).
+DEFAULT_CACHE_RULES = [
+    ("new_central", "/network-config/v1alpha1/sites", 60),
+    ("classic", "/configuration/v2/groups", 300),
+    ("classic", "/msp_api/v2/get_country_code", 86400),
+    ("classic", "/platform/licensing/v1/services/enabled", 3600),
+]
+
+# Write paths invalidating cached paths they do not share a prefix with, as
+# (app name, written path prefix, cached path prefix).
+DEFAULT_INVALIDATION_RULES = [
+    ("classic", "/configuration/v1/groups", "/configuration/v2/groups"),
+]
+
+DEFAULT_CACHE_MAX_BYTES = 16 * 1024 * 1024
+CLASSIC_APP_NAME = "classic"
+
+# Bounds of the name to ID lookup caches.
+DEFAULT_LOOKUP_MAX_ENTRIES = 10000
+DEFAULT_LOOKUP_TTL = 300
+
+
+def _normalize_path(path):
+    return "/" + path.split("?", 1)[0].strip("/")
+
+
+def _is_under(path, prefix):
+    """Check `path` is `prefix` or below it, comparing whole segments."""
+    return path == prefix or path.startswith(prefix.rstrip("/") + "/")
+
+
+class ResponseCache(object):
+    """Opt-in cache of successful GET responses shared by every API call of a
+    base object.
+
+    Responses of paths matching a rule are kept for the rule's TTL. Expired
+    entries carrying an `ETag` are revalidated with `If-None-Match` and reused
+    on HTTP 304. Entries are evicted least recently used first once
+    `max_bytes` of response payload is held. A POST, PUT, PATCH or DELETE
+    drops every entry below the written path, and the whole rule it falls in.
+
+    :param max_bytes: Upper bound of cached response payload size, defaults\
+        to 16 MiB
+    :type max_bytes: int, optional
+    :param ttl_rules: List of (app, path prefix, seconds) tuples, defaults to\
+        DEFAULT_CACHE_RULES
+    :type ttl_rules: list, optional
+    :param default_ttl: Seconds to cache GET responses no rule matches,\
+        defaults to 0 (not cached)
+    :type default_ttl: float, optional
+    :param invalidation_rules: List of (app, written path prefix, cached path\
+        prefix) tuples, defaults to DEFAULT_INVALIDATION_RULES
+    :type invalidation_rules: list, optional
+    """
+
+    def __init__(
+        self,
+        max_bytes=DEFAULT_CACHE_MAX_BYTES,
+        ttl_rules=None,
+        default_ttl=0,
+        invalidation_rules=None,
+    ):
+        """Constructor Method"""
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        rules = DEFAULT_CACHE_RULES if ttl_rules is None else ttl_rules
+        # Longest prefix first so the most specific rule wins.
+        self._rules = sorted(
+            [(app, _normalize_path(p), ttl) for app, p, ttl in rules],
+            key=lambda rule: -len(rule[1]),
+        )
+        if invalidation_rules is None:
+            invalidation_rules = DEFAULT_INVALIDATION_RULES
+        self._invalidation_rules = [
+            (app, _normalize_path(written), _normalize_path(cached))
+            for app, written, cached in invalidation_rules
+        ]
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def stats(self):
+        """Counters of the cache.
+
+        :return: hits, misses, revalidations (HTTP 304 reuses), evictions,\
+            invalidations, entries and bytes currently held.
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            return stats
+
+    def get_ttl(self, app_name, path):
+        """Return the seconds a GET response of `path` is cached for.
+
+        :rtype: float
+        """
+        path = _normalize_path(path)
+        for app, prefix, ttl in self._rules:
+            if app == app_name and _is_under(path, prefix):
+                return ttl
+        return self.default_ttl
+
+    def make_key(self, app_name, path, params=None):
+        """Return the cache key of a GET request.
+
+        :rtype: tuple
+        """
+        return (
+            app_name,
+            _normalize_path(path),
+            json.dumps(params or {}, sort_keys=True, default=str),
+        )
+
+    def lookup(self, key):
+        """Look up a GET request.
+
+        :param key: Key returned by `make_key`.
+        :type key: tuple
+        :return: A copy of the cached result if it is still fresh, otherwise\
+            None, and the ETag to revalidate an expired entry with, if any.
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry["expires_at"] > time.monotonic():
+                    self._stats["hits"] += 1
+                    return copy.deepcopy(entry["result"]), None
+            self._stats["misses"] += 1
+            return None, entry["etag"] if entry else None
+
+    def revalidated(self, key, headers=None):
+        """Mark an entry as still valid after an HTTP 304 response and return
+        a copy of its result, or None if it was evicted meanwhile.
+
+        :rtype: dict
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["expires_at"] = time.monotonic() + self.get_ttl(
+                key[0], key[1]
+            )
+            self._stats["revalidations"] += 1
+            result = copy.deepcopy(entry["result"])
+        if headers:
+            result["headers"] = dict(headers)
+        return result
+
+    def store(self, key, result, size):
+        """Cache a GET result if its path is cacheable.
+
+        :param key: Key returned by `make_key`.
+        :type key: tuple
+        :param result: Result of `command()`.
+        :type result: dict
+        :param size: Size of the response payload in bytes.
+        :type size: int
+        """
+        ttl = self.get_ttl(key[0], key[1])
+        if ttl <= 0 or result.get("code") != 200 or size > self.max_bytes:
+            return
+        etag = None
+        for header, value in (result.get("headers") or {}).items():
+            if header.lower() == "etag":
+                etag = value
+                break
+        entry = {
+            "result": copy.deepcopy(result),
+            "etag": etag,
+            "size": size,
+            "expires_at": time.monotonic() + ttl,
+        }
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old["size"]
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted["size"]
+                self._stats["evictions"] += 1
+
+    def invalidate(self, app_name, path):
+        """Drop entries made stale by a POST, PUT, PATCH or DELETE on `path`.
+
+        :param app_name: Name of the application.
+        :type app_name: str
+        :param path: API endpoint path that was written.
+        :type path: str
+        """
+        path = _normalize_path(path)
+        prefixes = [path]
+        for app, prefix, _ in self._rules:
+            if app == app_name and _is_under(path, prefix):
+                prefixes.append(prefix)
+                break
+        for app, written, cached in self._invalidation_rules:
+            if app == app_name and _is_under(path, written):
+                prefixes.append(cached)
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] != app_name:
+                    continue
+                if any(_is_under(key[1], p) for p in prefixes) or _is_under(
+                    path, key[1]
+                ):
+                    self._bytes -= self._entries.pop(key)["size"]
+                    self._stats["invalidations"] += 1
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class LookupCache(object):
+    """Bounded cache of name to ID mappings, such as subscription keys or user
+    emails to GLP IDs. Entries expire `ttl` seconds after they were stored
+    and the least recently used entry is evicted once `max_entries` are held.
+
+    :param max_entries: Largest number of entries held, defaults to 10000
+    :type max_entries: int, optional
+    :param ttl: Seconds an entry is used for, 0 disables the cache,\
+        defaults to 300
+    :type ttl: float, optional
+    """
+
+    def __init__(self, max_entries=DEFAULT_LOOKUP_MAX_ENTRIES,
+                 ttl=DEFAULT_LOOKUP_TTL):
+        """Constructor Method"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # name: (value, expires_at)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def stats(self):
+        """Counters of the cache.
+
+        :return: hits, misses, evictions, invalidations and entries currently\
+            held.
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            return stats
+
+    def get(self, name):
+        """Return the cached value of `name`, or None if it is not cached or
+        has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(name)
+                    self._stats["hits"] += 1
+                    return entry[0]
+                del self._entries[name]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, name, value):
+        """Cache the value of `name`."""
+        self.update({name: value})
+
+    def update(self, mapping):
+        """Cache every name to value pair of `mapping`, e.g. the IDs of a bulk
+        listing.
+
+        :param mapping: dict or iterable of (name, value) pairs
+        :type mapping: dict
+        :return: Number of entries stored.
+        :rtype: int
+        """
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return 0
+        if isinstance(mapping, dict):
+            mapping = mapping.items()
+        count = 0
+        with self._lock:
+            expires_at = time.monotonic() + self.ttl
+            for name, value in mapping:
+                if name is None or value is None:
+                    continue
+                self._entries.pop(name, None)
+                self._entries[name] = (value, expires_at)
+                count += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return count
+
+    def invalidate(self, name=None, value=None):
+        """Drop the entry of `name`, and every entry mapping to `value`."""
+        with self._lock:
+            names = [name] if name in self._entries else []
+            if value is not None:
+                names += [
+                    n for n, entry in self._entries.items()
+                    if entry[0] == value and n != name
+                ]
+            for n in names:
+                del self._entries[n]
+            self._stats["invalidations"] += len(names)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+
+class LookupCaches(object):
+    """One class:`LookupCache` per base object, so IDs of different
+    workspaces never mix. A cache is created on first use and dropped with
+    its base object.
+
+    :param max_entries: Largest number of entries per base object, defaults\
+        to 10000
+    :type max_entries: int, optional
+    :param ttl: Seconds an entry is used for, 0 disables the caches,\
+        defaults to 300
+    :type ttl: float, optional
+    """
+
+    def __init__(self, max_entries=DEFAULT_LOOKUP_MAX_ENTRIES,
+                 ttl=DEFAULT_LOOKUP_TTL):
+        """Constructor Method"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._caches = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, conn):
+        """Return the cache of a base object.
+
+        :rtype: class:`LookupCache`
+        """
+        with self._lock:
+            cache = self._caches.get(conn)
+            if cache is None:
+                cache = self._caches[conn] = LookupCache(
+                    self.max_entries, self.ttl
+                )
+            # Settings changed after the cache was created apply too.
+            cache.max_entries, cache.ttl = self.max_entries, self.ttl
+            return cache
+
+    def clear(self):
+        """Drop the entries of every base object."""
+        with self._lock:
+            caches = list(self._caches.values())
+        for cache in caches:
+            cache.clear()
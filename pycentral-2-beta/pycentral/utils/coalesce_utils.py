@@ -0,0 +1,177 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import copy
+import json
+import threading
+
+
+def request_key(app_name, api_method, api_path, api_params=None,
+                headers=None):
+    """Build the key identifying identical API requests.
+
+    :rtype: tuple
+    """
+    return (
+        app_name,
+        api_method,
+        "/" + api_path.strip("/"),
+        json.dumps(api_params or {}, sort_keys=True, default=str),
+        json.dumps(headers or {}, sort_keys=True, default=str),
+    )
+
+
+class _Call(object):
+    __slots__ = ("event", "waiters", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class _Stats(object):
+    def __init__(self):
+        self._stats = {"calls": 0, "coalesced": 0}
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    @property
+    def stats(self):
+        """Number of calls executed and of callers served by another caller's
+        in-flight call.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+class SingleFlight(_Stats):
+    """Coalesce identical calls made by concurrent threads. The first caller
+    of a key runs the call, callers arriving while it is in flight wait for it
+    and get a deep copy of its result, or its exception. Nothing is kept once
+    the call completes, so later callers run the call again.
+    """
+
+    def __init__(self):
+        """Constructor Method"""
+        super().__init__()
+        self._calls = {}
+        self._calls_lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Run `fn()` unless a call of `key` is already in flight.
+
+        :param key: Hashable key, see `request_key`.
+        :type key: tuple
+        :param fn: Callable doing the call.
+        :type fn: callable
+        :return: Result of `fn()`.
+        """
+        with self._calls_lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                call.waiters += 1
+                leader = False
+
+        if not leader:
+            self.count("coalesced")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        self.count("calls")
+        result = error = None
+        try:
+            result = fn()
+            return result
+        except BaseException as err:
+            error = err
+            raise
+        finally:
+            with self._calls_lock:
+                del self._calls[key]
+                if call.waiters:
+                    # Snapshot before the leader's caller can mutate it.
+                    call.result = copy.deepcopy(result)
+                    call.error = error
+            call.event.set()
+
+
+class AsyncSingleFlight(_Stats):
+    """Coalesce identical calls made by concurrent tasks of one event loop,
+    the asyncio counterpart of `SingleFlight`. Waiters are not affected when
+    one of them is cancelled. If the running call is cancelled, its waiters
+    are cancelled too.
+    """
+
+    def __init__(self):
+        """Constructor Method"""
+        super().__init__()
+        self._calls = {}
+
+    async def do(self, key, coro_fn):
+        """Await `coro_fn()` unless a call of `key` is already in flight.
+
+        :param key: Hashable key, see `request_key`.
+        :type key: tuple
+        :param coro_fn: Coroutine function doing the call.
+        :type coro_fn: callable
+        :return: Result of `coro_fn()`.
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            self.count("coalesced")
+            call[1] += 1
+            result = await asyncio.shield(call[0])
+            return copy.deepcopy(result)
+
+        self.count("calls")
+        future = asyncio.get_running_loop().create_future()
+        # [future, number of waiters]
+        call = self._calls[key] = [future, 0]
+        try:
+            result = await coro_fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            if call[1]:
+                future.set_exception(err)
+            else:
+                future.cancel()
+            raise
+        else:
+            future.set_result(copy.deepcopy(result) if call[1] else None)
+            return result
+        finally:
+            del self._calls[key]
@@ -1,14 +1,46 @@
 from .base_utils import console_logger
+from .job_journal import FAILED, SUBMITTED, SUCCEEDED
 
+from collections import namedtuple
+from concurrent.futures import Future
+import heapq
+import itertools
+import threading
 import time
 
 DEVICE_LIMIT = 20
 SUB_LIMIT = 5
 
+# Adaptive polling of async transactions: first poll after
+# POLL_INITIAL_INTERVAL seconds, then POLL_BACKOFF times longer after each
+# poll up to POLL_MAX_INTERVAL seconds.
+POLL_INITIAL_INTERVAL = 2
+POLL_BACKOFF = 1.5
+POLL_MAX_INTERVAL = 30
+
+# Outcome of one chunk of a bulk operation: its position, the inputs it
+# carried, whether it succeeded, its final API response (the async status
+# when a transaction was tracked) and its transaction ID if any.
+ChunkResult = namedtuple(
+    "ChunkResult", ["index", "inputs", "success", "response", "transaction_id"]
+)
+
 logger = console_logger("RATE LIMIT CHECK")
 
 
-def rate_limit_check(input_array, input_size_limit, rate_per_minute):
+def rate_limit_check(input_array, input_size_limit, rate_per_minute, conn=None):
+    """
+    Split input into chunks accepted per request and compute the wait time
+    needed between chunk requests to stay within the rate limit.
+
+    :param input_array: list of inputs to split
+    :param input_size_limit: max inputs per request
+    :param rate_per_minute: rate limit of the API
+    :param conn: new pycentral base object. When it has a rate limiter,
+        command() already waits for quota and no fixed wait is returned.
+
+    :return: tuple, (list of chunks, seconds to wait between requests)
+    """
     print("Attempting to bypass rate limit")
     queue = []
     wait_time = []
@@ -17,7 +49,9 @@ def rate_limit_check(input_array, input_size_limit, rate_per_minute):
         sub_array = input_array[i : i + input_size_limit]
         queue.append(sub_array)
 
-    if len(queue) > rate_per_minute:
+    if has_rate_limiter(conn):
+        wait_time = 0
+    elif len(queue) > rate_per_minute:
         wait_time = 60 / rate_per_minute
         print(
             "Array size exceeded,",
@@ -31,6 +65,44 @@ def rate_limit_check(input_array, input_size_limit, rate_per_minute):
     return queue, wait_time
 
 
+def chunk_inputs(inputs, size):
+    """
+    Split input into chunks of at most size inputs.
+
+    :return: list of chunks
+    """
+    return [inputs[i : i + size] for i in range(0, len(inputs), size)]
+
+
+def has_rate_limiter(conn):
+    """
+    Check if API calls made with conn are throttled by a client-side rate
+    limiter.
+
+    :param conn: new pycentral base object
+    :rtype: bool
+    """
+    return bool(getattr(conn, "rate_limiter", None))
+
+
+def status_limit(module_instance):
+    """
+    Rate limit per minute of the async status API of a module.
+
+    :param module_instance: instance of the module class (Devices or Subscriptions)
+
+    :return: int, requests per minute
+    """
+    name = module_instance.__class__.__name__
+    if name == "Devices":
+        return DEVICE_LIMIT
+    elif name in ("Subscription", "Subscriptions"):
+        return SUB_LIMIT
+    raise ValueError(
+        "module_instance must be an instance of Devices or Subscription"
+    )
+
+
 def check_progress(conn, id, module_instance, limit=None):
     """
     check progress of async glp api.
@@ -44,14 +116,8 @@ def check_progress(conn, id, module_instance, limit=None):
     """
 
     if limit is None:
-        if module_instance.__class__.__name__ == "Devices":
-            limit = DEVICE_LIMIT
-        elif module_instance.__class__.__name__ == "Subscriptions":
-            limit = SUB_LIMIT
-        else:
-            raise ValueError("module_instance must be an instance of Devices or Subscription")
+        limit = status_limit(module_instance)
 
-        
     updated = False
     while not updated:
         status = module_instance.get_status(conn, id)
@@ -77,3 +143,328 @@ def check_progress(conn, id, module_instance, limit=None):
             # Sleep time calculated by async rate limit.
             sleep_time = 60 / limit
             time.sleep(sleep_time)
+
+
+class _Transaction(object):
+    __slots__ = ("id", "module", "key", "future", "interval", "status")
+
+    def __init__(self, id, module, key, future, interval):
+        self.id = id
+        self.module = module
+        self.key = key
+        self.future = future
+        self.interval = interval
+        self.status = None
+
+
+class AsyncOperationTracker(object):
+    """
+    Track many async GLP transactions at once. A single background thread
+    polls them in the order they are due, so callers can keep submitting
+    requests while earlier transactions complete. Each transaction is polled
+    less often the longer it runs, and polls of a status API are spaced to
+    stay within its rate limit, through the rate limiter of conn when it
+    has one.
+
+    Every tracked transaction gets a concurrent.futures.Future resolved with
+    the same (True or False, api response) tuple as check_progress().
+    Transactions still running at the deadline resolve to False with their
+    last status response, and their IDs are added to expired.
+
+    :param conn: new pycentral base object
+    :param timeout: seconds after which tracking stops, None for no deadline
+    :param initial_interval: seconds before the first poll of a transaction
+    :param max_interval: longest time between two polls of a transaction
+    :param backoff: growth factor of the time between polls
+    """
+
+    def __init__(
+        self,
+        conn,
+        timeout=None,
+        initial_interval=POLL_INITIAL_INTERVAL,
+        max_interval=POLL_MAX_INTERVAL,
+        backoff=POLL_BACKOFF,
+    ):
+        self.conn = conn
+        self.deadline = None
+        self.expired = set()
+        if timeout is not None:
+            self.deadline = time.monotonic() + timeout
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.polls = 0
+        self._futures = []
+        self._queue = []
+        self._seq = itertools.count()
+        # Earliest time of the next poll per status API, without rate limiter.
+        self._next_poll = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.wait()
+
+    @property
+    def pending(self):
+        """Number of transactions still tracked."""
+        with self._cond:
+            return len(self._queue)
+
+    def track(self, id, module_instance, limit=None, callback=None):
+        """
+        Start tracking a transaction.
+
+        :param id: async transaction id
+        :param module_instance: instance of the module class (Devices or Subscriptions)
+        :param limit: rate limit per minute of the status API, defaults to the module's
+        :param callback: called with the future once the transaction completes
+
+        :return: concurrent.futures.Future of a (bool, api response) tuple
+        """
+        if limit is None:
+            limit = status_limit(module_instance)
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        key = (module_instance.__class__.__name__, limit)
+        transaction = _Transaction(
+            id, module_instance, key, future, self.initial_interval
+        )
+        with self._cond:
+            self._futures.append(future)
+            self._push(time.monotonic() + self.initial_interval, transaction)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="glp-async-tracker", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+        return future
+
+    def wait(self, futures=None):
+        """
+        Block until transactions complete, or the deadline.
+
+        :param futures: futures returned by track(), defaults to all of them
+
+        :return: list of (bool, api response) tuples, in the order of futures
+        """
+        futures = list(self._futures if futures is None else futures)
+        return [future.result() for future in futures]
+
+    def _push(self, due, transaction):
+        heapq.heappush(self._queue, (due, next(self._seq), transaction))
+
+    def _next(self):
+        """Pop the next transaction to poll, None once none is left."""
+        with self._cond:
+            while True:
+                if not self._queue:
+                    self._thread = None
+                    return None
+                now = time.monotonic()
+                if self.deadline is not None and now >= self.deadline:
+                    self._expire()
+                    continue
+                due, _, transaction = self._queue[0]
+                if transaction.future.cancelled():
+                    heapq.heappop(self._queue)
+                    continue
+                if due > now:
+                    if self.deadline is not None:
+                        due = min(due, self.deadline)
+                    self._cond.wait(due - now)
+                    continue
+                heapq.heappop(self._queue)
+                if not has_rate_limiter(self.conn):
+                    ready = self._next_poll.get(transaction.key, now)
+                    if ready > now:
+                        self._push(ready, transaction)
+                        continue
+                    self._next_poll[transaction.key] = (
+                        now + 60 / transaction.key[1]
+                    )
+                return transaction
+
+    def _run(self):
+        while True:
+            transaction = self._next()
+            if transaction is None:
+                return
+            try:
+                status = transaction.module.get_status(
+                    self.conn, transaction.id
+                )
+            except Exception as err:
+                self._finish(transaction, error=err)
+                continue
+            self.polls += 1
+            transaction.status = status
+            if status["code"] != 200:
+                self.conn.logger.error(
+                    "Bad request for get async status with transaction "
+                    f"{transaction.id}!"
+                )
+                self._finish(transaction, (False, status))
+            elif status["msg"]["status"] == "SUCCEEDED":
+                self._finish(transaction, (True, status))
+            elif status["msg"]["status"] in ("TIMEOUT", "FAILED"):
+                self.conn.logger.error(
+                    f"Async operation {status['msg']['status'].lower()} for "
+                    f"transaction {transaction.id}!"
+                )
+                self._finish(transaction, (False, status))
+            else:
+                transaction.interval = min(
+                    transaction.interval * self.backoff, self.max_interval
+                )
+                with self._cond:
+                    self._push(
+                        time.monotonic() + transaction.interval, transaction
+                    )
+
+    def _expire(self):
+        """Resolve every tracked transaction once the deadline is reached."""
+        while self._queue:
+            _, _, transaction = heapq.heappop(self._queue)
+            self.conn.logger.error(
+                f"Deadline reached tracking transaction {transaction.id}!"
+            )
+            self.expired.add(transaction.id)
+            status = transaction.status or {
+                "code": None,
+                "msg": {"id": transaction.id, "status": "TIMEOUT"},
+                "headers": {},
+            }
+            self._finish(transaction, (False, status))
+
+    def _finish(self, transaction, result=None, error=None):
+        future = transaction.future
+        if future.done():
+            return
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        except Exception:
+            # Cancelled meanwhile.
+            pass
+
+
+def run_chunks(
+    conn,
+    module_instance,
+    api_method,
+    path,
+    chunks,
+    request,
+    rpm,
+    action,
+    journal=None,
+    job_id=None,
+    timeout=None,
+):
+    """
+    Submit chunks one after another as fast as the rate limit of api_method
+    allows, without waiting for earlier chunks to complete, and track their
+    async transactions together with an AsyncOperationTracker.
+
+    With a journal, every chunk's submission, transaction ID and final
+    status are recorded. Running the same job again skips the chunks that
+    succeeded and tracks the transactions submitted but not seen completing
+    instead of sending them again.
+
+    With a timeout, transactions still running when it expires resolve to
+    failed chunks. The journal keeps them as submitted, so running the job
+    again waits for them instead of sending them again.
+
+    :param conn: new pycentral base object
+    :param module_instance: instance of the module class (Devices or Subscriptions)
+    :param api_method: HTTP method of the requests
+    :param path: API endpoint path
+    :param chunks: list of chunks
+    :param request: callable returning the (api_params, api_data) of a chunk
+    :param rpm: rate limit per minute of api_method
+    :param action: description used in log messages, e.g. "add subscription"
+    :param journal: pycentral.utils.job_journal.JobJournal recording the job
+    :param job_id: ID of the job in the journal, defaults to one derived from
+        the requests
+    :param timeout: seconds the whole call may take, submissions included,
+        before tracking stops, None for no deadline
+
+    :return: list of ChunkResult, in chunk order
+    """
+    states = {}
+    if journal is not None:
+        if job_id is None:
+            job_id = journal.make_job_id(
+                action, api_method, path, [request(c) for c in chunks]
+            )
+        states = journal.start(job_id, action, len(chunks))
+        conn.logger.info(f"Running job {job_id} of {len(chunks)} chunks")
+    # conn's rate limiter already paces calls, otherwise space them out.
+    interval = 0
+    if not has_rate_limiter(conn) and len(chunks) > rpm:
+        interval = 60 / rpm
+    tracker = AsyncOperationTracker(conn, timeout=timeout)
+    # (inputs, response, transaction id, future, success if already known)
+    submitted = []
+    next_submit = time.monotonic()
+    for index, inputs in enumerate(chunks):
+        state = states.get(index) or {}
+        id = state.get("transaction_id")
+        if state.get("status") == SUCCEEDED:
+            conn.logger.info(
+                f"Skipping chunk {index} of job {job_id}, already applied"
+            )
+            submitted.append((inputs, state["response"], id, None, True))
+            continue
+        if state.get("status") == SUBMITTED and id:
+            # Submitted by an earlier run, wait for it instead of resending.
+            future = tracker.track(id, module_instance)
+            submitted.append((inputs, state["response"], id, future, None))
+            continue
+
+        delay = next_submit - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        next_submit = time.monotonic() + interval
+        params, data = request(inputs)
+        resp = conn.command(
+            api_method, path, "glp", api_params=params, api_data=data
+        )
+        id = None
+        if resp["code"] == 202:
+            conn.logger.info(f"{action.capitalize()} request accepted...")
+            id = (resp.get("msg") or {}).get("transactionId")
+        else:
+            conn.logger.error(f"Bad request for {action}!")
+        if journal is not None and id:
+            journal.record(job_id, index, SUBMITTED, id, resp, inputs)
+        future = tracker.track(id, module_instance) if id else None
+        submitted.append((inputs, resp, id, future, None))
+
+    report = []
+    for index, (inputs, resp, id, future, success) in enumerate(submitted):
+        if success is None:
+            success = resp["code"] == 202
+            if future is not None:
+                success, resp = future.result()
+                if success:
+                    conn.logger.info(f"{action.capitalize()} succeeded!")
+                else:
+                    conn.logger.error(f"{action.capitalize()} failed!")
+            if journal is not None:
+                status = SUCCEEDED if success else FAILED
+                if id in tracker.expired:
+                    # Still running, resume tracking it on the next run.
+                    status = SUBMITTED
+                journal.record(job_id, index, status, id, resp, inputs)
+        report.append(ChunkResult(index, inputs, success, resp, id))
+    return report
@@ -0,0 +1,282 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .token_store import default_token_store_path
+
+# Chunk states recorded in the journal.
+SUBMITTED = "submitted"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobJournal(object):
+    """Durable journal of bulk jobs kept in a SQLite database. Every chunk of
+    a job is recorded when it is submitted, with its async transaction ID if
+    any, and again with its final status, so a job run again after a crash
+    or an expired token skips the chunks already applied and waits for the
+    transactions already submitted instead of sending them again.
+
+    Jobs are identified by a key derived from the operation and the requests
+    it sends, see `make_job_id`, so running the same call again resumes it.
+
+    :param path: Path of the SQLite database file, defaults to\
+        ./temp/jobs.db
+    :type path: str, optional
+    :param timeout: Seconds to wait for another process writing to the\
+        database, defaults to 60
+    :type timeout: float, optional
+    """
+
+    def __init__(self, path=None, timeout=60):
+        """Constructor Method"""
+        self.path = path or os.path.join(default_token_store_path(), "jobs.db")
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        os.chmod(self.path, 0o600)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, operation TEXT NOT NULL, "
+            "chunks INTEGER NOT NULL, created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, "
+            "status TEXT NOT NULL, transaction_id TEXT, inputs TEXT, "
+            "response TEXT, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (job_id, idx))"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_job_id(operation, *parts):
+        """Build the ID of a job from its operation and everything it sends,
+        e.g. the request of every chunk.
+
+        :rtype: str
+        """
+        digest = hashlib.sha256(
+            json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:32]
+        return f"{operation.replace(' ', '_')}_{digest}"
+
+    def start(self, job_id, operation, chunks):
+        """Record a job, unless it is already known, and return the state of
+        its chunks recorded by earlier runs.
+
+        :param job_id: ID of the job.
+        :type job_id: str
+        :param operation: Name of the operation.
+        :type operation: str
+        :param chunks: Number of chunks of the job.
+        :type chunks: int
+        :return: dict of chunk index to its state, see `get_chunks`.
+        :rtype: dict
+        """
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR IGNORE INTO jobs (job_id, operation, chunks, "
+            "created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, operation, chunks, now, now),
+        )
+        return self.get_chunks(job_id)
+
+    def get_chunks(self, job_id):
+        """Return the recorded state of the chunks of a job.
+
+        :return: dict of chunk index to a dict with status ("submitted",\
+            "succeeded" or "failed"), transaction_id and response.
+        :rtype: dict
+        """
+        rows = self._connection().execute(
+            "SELECT idx, status, transaction_id, response FROM chunks "
+            "WHERE job_id = ?",
+            (job_id,),
+        )
+        return {
+            idx: {
+                "status": status,
+                "transaction_id": transaction_id,
+                "response": json.loads(response) if response else None,
+            }
+            for idx, status, transaction_id, response in rows
+        }
+
+    def record(self, job_id, index, status, transaction_id=None,
+               response=None, inputs=None):
+        """Record the state of a chunk.
+
+        :param job_id: ID of the job.
+        :type job_id: str
+        :param index: Position of the chunk in the job.
+        :type index: int
+        :param status: "submitted", "succeeded" or "failed".
+        :type status: str
+        :param transaction_id: Async transaction ID of the chunk, if any.
+        :type transaction_id: str, optional
+        :param response: Last API response of the chunk.
+        :type response: dict, optional
+        :param inputs: Inputs carried by the chunk, kept for inspection.
+        :type inputs: list, optional
+        """
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO chunks (job_id, idx, status, transaction_id, "
+                "inputs, response, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (job_id, idx) DO UPDATE SET "
+                "status = excluded.status, "
+                "transaction_id = COALESCE(excluded.transaction_id, "
+                "transaction_id), "
+                "inputs = COALESCE(excluded.inputs, inputs), "
+                "response = excluded.response, "
+                "updated_at = excluded.updated_at",
+                (
+                    job_id,
+                    index,
+                    status,
+                    transaction_id,
+                    None if inputs is None else json.dumps(inputs, default=str),
+                    json.dumps(response, default=str),
+                    now,
+                ),
+            )
+            conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE job_id = ?",
+                (now, job_id),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def is_complete(self, job_id):
+        """Check every chunk of a job succeeded.
+
+        :rtype: bool
+        """
+        row = self._connection().execute(
+            "SELECT jobs.chunks, COUNT(chunks.idx) FROM jobs LEFT JOIN chunks "
+            "ON chunks.job_id = jobs.job_id AND chunks.status = ? "
+            "WHERE jobs.job_id = ? GROUP BY jobs.job_id",
+            (SUCCEEDED, job_id),
+        ).fetchone()
+        return bool(row) and row[0] == row[1]
+
+    def jobs(self):
+        """List the recorded jobs with the number of chunks per state.
+
+        :rtype: list
+        """
+        conn = self._connection()
+        result = []
+        for job_id, operation, chunks, created_at, updated_at in conn.execute(
+            "SELECT job_id, operation, chunks, created_at, updated_at "
+            "FROM jobs ORDER BY created_at"
+        ).fetchall():
+            counts = dict(
+                conn.execute(
+                    "SELECT status, COUNT(*) FROM chunks WHERE job_id = ? "
+                    "GROUP BY status",
+                    (job_id,),
+                ).fetchall()
+            )
+            result.append(
+                {
+                    "job_id": job_id,
+                    "operation": operation,
+                    "chunks": chunks,
+                    "created_at": created_at,
+                    "updated_at": updated_at,
+                    SUBMITTED: counts.get(SUBMITTED, 0),
+                    SUCCEEDED: counts.get(SUCCEEDED, 0),
+                    FAILED: counts.get(FAILED, 0),
+                }
+            )
+        return result
+
+    def delete(self, job_id):
+        """Forget a job, so running it again starts from the first chunk."""
+        conn = self._connection()
+        conn.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def run(self, job_id, operation, chunks, submit, logger=None):
+        """Run the chunks of a synchronous job one after another, skipping
+        the chunks that succeeded in an earlier run.
+
+        :param job_id: ID of the job, see `make_job_id`.
+        :type job_id: str
+        :param operation: Name of the operation.
+        :type operation: str
+        :param chunks: Inputs of every chunk.
+        :type chunks: list
+        :param submit: Callable sending a chunk and returning (success,\
+            response).
+        :type submit: callable
+        :param logger: Logger of skipped chunks, defaults to None
+        :type logger: class:`logging.Logger`, optional
+        :return: Response of every chunk in chunk order, the recorded\
+            response for skipped chunks.
+        :rtype: list
+        """
+        states = self.start(job_id, operation, len(chunks))
+        responses = []
+        for index, inputs in enumerate(chunks):
+            state = states.get(index)
+            if state and state["status"] == SUCCEEDED:
+                if logger:
+                    logger.info(
+                        f"Skipping chunk {index} of job {job_id}, already "
+                        "applied"
+                    )
+                responses.append(state["response"])
+                continue
+            self.record(job_id, index, SUBMITTED, inputs=inputs)
+            success, response = submit(inputs)
+            self.record(
+                job_id, index, SUCCEEDED if success else FAILED,
+                response=response,
+            )
+            responses.append(response)
+        return responses
@@ -0,0 +1,308 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from ..exceptions import ResponseError
+
+# Default number of pages fetched concurrently in fan-out mode.
+DEFAULT_PAGE_WORKERS = 4
+
+PageProfile = namedtuple(
+    "PageProfile",
+    [
+        "items_key",
+        "total_key",
+        "max_limit",
+        "offset_unit",
+        "max_total",
+        "remaining_key",
+    ],
+)
+PageProfile.__new__.__defaults__ = ("item", None, None)
+PageProfile.__doc__ = """Pagination details of an offset/limit endpoint.
+
+:param items_key: Key of the list of items in the response payload, nested
+    keys are joined with dots.
+:param total_key: Key of the total number of items, None if not reported.
+:param max_limit: Largest page size accepted by the endpoint.
+:param offset_unit: "item" when offset counts items, "page" when it counts
+    pages of `limit` items, defaults to "item".
+:param max_total: Number of items the endpoint returns at most whatever the
+    total, defaults to None.
+:param remaining_key: Key of a flag telling more items are left, defaults to
+    None.
+"""
+
+# Profiles of the paginated methods, by module and qualified method name.
+PAGE_PROFILES = {
+    "pycentral.classic.audit_logs.Audit.get_traillogs": PageProfile(
+        "audit_logs", "total", 100, max_total=10000,
+        remaining_key="remaining_records",
+    ),
+    "pycentral.classic.audit_logs.Audit.get_eventlogs": PageProfile(
+        "events", "total", 100, max_total=10000,
+        remaining_key="remaining_records",
+    ),
+    "pycentral.classic.rapids.Rogues.list_rogue_aps": PageProfile(
+        "rogue_aps", "total", 1000
+    ),
+    "pycentral.classic.visualrf.FloorPlan.get_campus_list": PageProfile(
+        "campus", "campus_count", 100
+    ),
+    "pycentral.classic.user_management.Users.list_users": PageProfile(
+        "items", "total", 1000
+    ),
+    "pycentral.classic.configuration.Groups.get_groups": PageProfile(
+        "data", "total", 20
+    ),
+    "pycentral.classic.monitoring.Sites.get_sites": PageProfile(
+        "sites", "total", 1000
+    ),
+    "pycentral.classic.msp.MSP.get_customers": PageProfile(
+        "customers", "total", 100
+    ),
+    "pycentral.classic.msp.MSP.get_msp_devices_and_subscriptions": (
+        PageProfile("deviceList.devices", "deviceList.total_devices", 50)
+    ),
+    "pycentral.classic.msp.MSP.get_customer_devices_and_subscriptions": (
+        PageProfile("deviceList.devices", "deviceList.total_devices", 50)
+    ),
+    "pycentral.glp.devices.Devices.get_device": PageProfile(
+        "items", "total", 2000
+    ),
+    "pycentral.glp.subscriptions.Subscription.get_subscription": PageProfile(
+        "items", "total", 50
+    ),
+    "pycentral.glp.user_management.UserMgmt.get_users": PageProfile(
+        "items", "total", 300, offset_unit="page"
+    ),
+}
+
+
+def _lookup(msg, key):
+    for part in key.split("."):
+        if not isinstance(msg, dict) or part not in msg:
+            return None
+        msg = msg[part]
+    return msg
+
+
+def get_page_profile(method):
+    """Return the pagination profile of a bound method of a pycentral module.
+
+    :param method: Method, e.g. `Audit().get_traillogs`.
+    :type method: callable
+    :raises KeyError: No profile is known for the method.
+    :rtype: class:`PageProfile`
+    """
+    func = getattr(method, "__func__", method)
+    name = f"{func.__module__}.{func.__qualname__}"
+    if name not in PAGE_PROFILES:
+        raise KeyError(
+            f"No pagination profile for {name}, provide the profile argument"
+        )
+    return PAGE_PROFILES[name]
+
+
+class Paginator(object):
+    """Iterate over every item of an offset/limit endpoint, fetching one page
+    at a time, so only the current page is held in memory. Iteration stops
+    at the reported total, at an empty or short page, or after `max_items`,
+    and a caller may stop at any time without fetching further pages.
+
+    With `workers` above 1 the paginator fans out: once the first page
+    reports the total, the remaining pages are fetched concurrently by a
+    bounded thread pool and items are still yielded in order. Every call
+    goes through `conn.command()`, so its rate limiter paces the workers.
+
+    :param method: Module method taking conn, limit and offset, e.g.\
+        `Audit().get_traillogs` or `glp.Devices().get_device`.
+    :type method: callable
+    :param conn: Instance of class:`pycentral.ArubaCentralBase` or\
+        class:`pycentral.NewCentralBase`.
+    :type conn: class:`pycentral.ArubaCentralBase`
+    :param page_size: Items per API call, defaults to and is capped at the\
+        endpoint's maximum.
+    :type page_size: int, optional
+    :param max_items: Stop after this many items, defaults to None
+    :type max_items: int, optional
+    :param profile: Pagination profile, defaults to the profile of `method`\
+        in PAGE_PROFILES.
+    :type profile: class:`PageProfile`, optional
+    :param workers: Number of pages fetched concurrently once the total is\
+        known, defaults to 1 (one page after another)
+    :type workers: int, optional
+    :param kwargs: Other arguments of `method`, e.g. filters. An offset\
+        argument is the position of the first item to return.
+    """
+
+    def __init__(self, method, conn, page_size=None, max_items=None,
+                 profile=None, workers=1, **kwargs):
+        """Constructor Method"""
+        self.method = method
+        self.conn = conn
+        self.profile = profile or get_page_profile(method)
+        limit = kwargs.pop("limit", None)
+        page_size = page_size or limit or self.profile.max_limit
+        if self.profile.max_limit:
+            page_size = min(page_size, self.profile.max_limit)
+        self.page_size = page_size
+        self.max_items = max_items
+        self.workers = max(1, workers or 1)
+        self.start = kwargs.pop("offset", 0)
+        if self.profile.offset_unit == "page" and self.start % page_size:
+            raise ValueError(
+                "offset must be a multiple of page_size for this endpoint"
+            )
+        self.kwargs = kwargs
+        self.total = None
+
+    def fetch_page(self, position):
+        """Fetch the page starting at item `position`.
+
+        :raises ResponseError: The API call did not return HTTP 200.
+        :return: API response.
+        :rtype: dict
+        """
+        offset = position
+        if self.profile.offset_unit == "page":
+            offset = position // self.page_size
+        resp = self.method(
+            self.conn, limit=self.page_size, offset=offset, **self.kwargs
+        )
+        if (
+            resp["code"] != 200
+            or _lookup(resp["msg"], self.profile.items_key) is None
+        ):
+            raise ResponseError(
+                resp, f"Fetching page at offset {offset} failed"
+            )
+        return resp
+
+    def get_items(self, resp):
+        """Return the list of items of a page."""
+        return _lookup(resp["msg"], self.profile.items_key) or []
+
+    def get_total(self, resp):
+        """Return the number of items to iterate over as reported by a page,
+        capped at the endpoint's max_total and max_items, or None.
+
+        :rtype: int
+        """
+        total = None
+        if self.profile.total_key:
+            total = _lookup(resp["msg"], self.profile.total_key)
+        if total is not None and self.profile.max_total:
+            total = min(total, self.profile.max_total)
+        if self.max_items is not None:
+            end = self.start + self.max_items
+            total = end if total is None else min(total, end)
+        return total
+
+    def is_last_page(self, resp, position, count):
+        """Check no page follows the one at item `position` holding `count`
+        items.
+
+        :rtype: bool
+        """
+        if count == 0:
+            return True
+        total = self.get_total(resp)
+        if total is not None and position + count >= total:
+            return True
+        if self.profile.remaining_key:
+            if _lookup(resp["msg"], self.profile.remaining_key) is False:
+                return True
+        # Without a total, a short page is the last one.
+        return total is None and count < self.page_size
+
+    def pages(self):
+        """Yield the API response of every page.
+
+        :rtype: generator
+        """
+        position = self.start
+        while True:
+            resp = self.fetch_page(position)
+            self.total = self.get_total(resp)
+            count = len(self.get_items(resp))
+            yield resp
+            if self.is_last_page(resp, position, count):
+                return
+            if self.workers > 1 and self.total is not None:
+                yield from self._fan_out(position + count, count)
+                return
+            # Advance by what was returned, the server may cap page sizes.
+            if self.profile.offset_unit == "page":
+                position += self.page_size
+            else:
+                position += count
+
+    def _fan_out(self, position, stride):
+        """Fetch the pages from item `position` up to the total with a
+        bounded worker pool, yielding responses in order."""
+        if self.profile.offset_unit == "page":
+            stride = self.page_size
+        positions = iter(range(position, self.total, max(stride, 1)))
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            # Keep a few pages queued per worker, not all of them at once.
+            for pos in positions:
+                pending.append(executor.submit(self.fetch_page, pos))
+                if len(pending) >= 2 * self.workers:
+                    break
+            while pending:
+                resp = pending.popleft().result()
+                for pos in positions:
+                    pending.append(executor.submit(self.fetch_page, pos))
+                    break
+                yield resp
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def __iter__(self):
+        returned = 0
+        for resp in self.pages():
+            for item in self.get_items(resp):
+                if self.max_items is not None and returned >= self.max_items:
+                    return
+                returned += 1
+                yield item
+
+
+def paginate(method, conn, **kwargs):
+    """Yield every item of an offset/limit endpoint lazily, see\
+        class:`Paginator` for the arguments.
+
+    Example - stop after the first matching audit log::
+
+        for log in paginate(Audit().get_traillogs, conn, username=user):
+            if log["target"] == target:
+                break
+
+    :rtype: generator
+    """
+    return iter(Paginator(method, conn, **kwargs))
@@ -0,0 +1,246 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Documented per-workspace rate limits as
+# (app name, HTTP method, API path prefix, requests per minute).
+DEFAULT_RATE_LIMITS = [
+    ("glp", "GET", "/devices/v1/devices", 80),
+    ("glp", "PATCH", "/devices/v1/devices", 5),
+    ("glp", "POST", "/devices/v1/devices", 4),
+    ("glp", "GET", "/devices/v1/async-operations", 20),
+    ("glp", "GET", "/subscriptions/v1/subscriptions", 40),
+    ("glp", "POST", "/subscriptions/v1/subscriptions", 4),
+    ("glp", "GET", "/subscriptions/v1/async-operations", 5),
+]
+
+# Epoch timestamps are larger than any realistic "seconds until reset" value.
+EPOCH_THRESHOLD = 10 ** 9
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket refilled continuously at `rate_per_minute`.
+
+    Callers reserve a token up front and are told how long to wait for it, so
+    threads and asyncio tasks draw from the same budget in arrival order.
+
+    :param rate_per_minute: Number of requests allowed per minute.
+    :type rate_per_minute: float
+    :param capacity: Largest burst allowed, defaults to rate_per_minute
+    :type capacity: float, optional
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        """Constructor Method"""
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self.tokens = min(
+            self.capacity, self.tokens + elapsed * self.rate_per_minute / 60
+        )
+
+    def reserve(self, tokens=1):
+        """Take `tokens` from the bucket and return the number of seconds the
+        caller must wait before sending its request.
+
+        :param tokens: Number of tokens to take, defaults to 1
+        :type tokens: int, optional
+        :return: Seconds to wait, 0 when the request may be sent now.
+        :rtype: float
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= tokens
+            wait = 0.0
+            if self.tokens < 0:
+                wait = -self.tokens * 60 / self.rate_per_minute
+            return max(wait, self.blocked_until - now)
+
+    def update(self, limit=None, remaining=None, reset=None):
+        """Correct the bucket from the quota reported by the server.
+
+        :param limit: Requests allowed per window as reported by the server.
+        :type limit: int, optional
+        :param remaining: Requests left in the current window.
+        :type remaining: int, optional
+        :param reset: Seconds until the window resets.
+        :type reset: float, optional
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if limit is not None and limit > 0:
+                self.capacity = limit
+            if remaining is not None:
+                # Other clients of the workspace may have used quota too,
+                # never assume more is left than the server reports.
+                self.tokens = min(self.tokens, remaining)
+                if remaining <= 0 and reset:
+                    self.block(reset, now)
+
+    def block(self, seconds, now=None):
+        """Hold every reservation for `seconds`, e.g. after a 429 response.
+
+        :param seconds: Seconds to hold reservations for.
+        :type seconds: float
+        """
+        now = time.monotonic() if now is None else now
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class RateLimiter(object):
+    """Client-side rate limiter shared by every API call of a base object.
+
+    Each (app, HTTP method, path prefix) rule gets its own token bucket seeded
+    from `DEFAULT_RATE_LIMITS` or the provided rules. Buckets are corrected
+    from `X-RateLimit-*` and `Retry-After` response headers. Share one
+    instance between several base objects to share the budget of a workspace.
+
+    :param rules: List of (app, method, path prefix, requests per minute)\
+        tuples, defaults to DEFAULT_RATE_LIMITS
+    :type rules: list, optional
+    """
+
+    def __init__(self, rules=None):
+        """Constructor Method"""
+        rules = DEFAULT_RATE_LIMITS if rules is None else rules
+        self.buckets = {}
+        # Longest prefix first so the most specific rule wins.
+        self._rules = sorted(rules, key=lambda rule: -len(rule[2]))
+        for app, method, prefix, rpm in self._rules:
+            self.buckets[(app, method, prefix)] = TokenBucket(rpm)
+
+    def get_bucket(self, app_name, method, path):
+        """Return the bucket matching an API call, or None if the call is not
+        rate limited.
+
+        :param app_name: Name of the application.
+        :type app_name: str
+        :param method: HTTP method.
+        :type method: str
+        :param path: API endpoint path.
+        :type path: str
+        :rtype: class:`TokenBucket`
+        """
+        path = "/" + path.lstrip("/")
+        for app, rule_method, prefix, _ in self._rules:
+            if (
+                app == app_name
+                and rule_method == method
+                and path.startswith(prefix)
+            ):
+                return self.buckets[(app, rule_method, prefix)]
+        return None
+
+    def reserve(self, app_name, method, path):
+        """Reserve a request slot and return the seconds to wait for it.
+
+        :return: Seconds to wait, 0 when the request may be sent now.
+        :rtype: float
+        """
+        bucket = self.get_bucket(app_name, method, path)
+        if bucket is None:
+            return 0.0
+        return bucket.reserve()
+
+    def acquire(self, app_name, method, path):
+        """Block the calling thread until a request slot is available.
+
+        :return: Seconds spent waiting.
+        :rtype: float
+        """
+        wait = self.reserve(app_name, method, path)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def update(self, app_name, method, path, status_code, headers):
+        """Correct the matching bucket from an API response.
+
+        :param status_code: HTTP status code of the response.
+        :type status_code: int
+        :param headers: HTTP response headers.
+        :type headers: dict
+        """
+        bucket = self.get_bucket(app_name, method, path)
+        if bucket is None:
+            return
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        bucket.update(
+            limit=_to_number(headers.get("x-ratelimit-limit")),
+            remaining=_to_number(headers.get("x-ratelimit-remaining")),
+            reset=parse_reset(headers.get("x-ratelimit-reset")),
+        )
+        if status_code == 429:
+            retry_after = parse_retry_after(headers.get("retry-after"))
+            if retry_after is None:
+                retry_after = 60 / bucket.rate_per_minute
+            bucket.block(retry_after)
+
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_reset(value):
+    """Convert an `X-RateLimit-Reset` header, either seconds until reset or an
+    epoch timestamp, to seconds from now.
+
+    :rtype: float
+    """
+    reset = _to_number(value)
+    if reset is None:
+        return None
+    if reset > EPOCH_THRESHOLD:
+        reset -= time.time()
+    return max(reset, 0.0)
+
+
+def parse_retry_after(value):
+    """Convert a `Retry-After` header, either delay seconds or an HTTP date,
+    to seconds from now.
+
+    :rtype: float
+    """
+    if value is None:
+        return None
+    seconds = _to_number(value)
+    if seconds is not None:
+        return max(seconds, 0.0)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -0,0 +1,181 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import random
+import threading
+import time
+from .rate_limiter import parse_retry_after
+
+# HTTP status codes that are retried by default.
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# HTTP methods that are safe to send twice.
+IDEMPOTENT_METHODS = ("GET", "PUT", "DELETE")
+
+
+class RetryPolicy(object):
+    """Retry policy used by `command()` for rate-limited (429), server error
+    (5xx) and connection failures. Waits grow exponentially with full jitter,
+    a `Retry-After` header from the server always wins, and no retry is made
+    once the per-call deadline would be exceeded.
+
+    :param max_retries: Maximum number of retries per API call, defaults to 3
+    :type max_retries: int, optional
+    :param backoff_factor: Base wait in seconds, the n-th retry waits up to\
+        backoff_factor * 2 ** n seconds, defaults to 1
+    :type backoff_factor: float, optional
+    :param max_backoff: Longest wait between two attempts, defaults to 60
+    :type max_backoff: float, optional
+    :param jitter: Randomize waits to spread out retries of concurrent\
+        callers, defaults to True
+    :type jitter: bool, optional
+    :param status_codes: HTTP status codes to retry, defaults to\
+        RETRY_STATUS_CODES
+    :type status_codes: tuple, optional
+    :param methods: HTTP methods to retry, defaults to IDEMPOTENT_METHODS.\
+        Add POST or PATCH only for endpoints that are safe to repeat.
+    :type methods: tuple, optional
+    :param deadline: Seconds an API call may take including all retries and\
+        waits, defaults to None (no deadline)
+    :type deadline: float, optional
+    :param on_retry: Hook called with a dict describing every retry -\
+        app_name, method, path, attempt, status_code, error, wait.
+    :type on_retry: callable, optional
+    """
+
+    def __init__(
+        self,
+        max_retries=3,
+        backoff_factor=1,
+        max_backoff=60,
+        jitter=True,
+        status_codes=RETRY_STATUS_CODES,
+        methods=IDEMPOTENT_METHODS,
+        deadline=None,
+        on_retry=None,
+    ):
+        """Constructor Method"""
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_codes = tuple(status_codes)
+        self.methods = tuple(methods)
+        self.deadline = deadline
+        self.on_retry = on_retry
+        self._stats = {"retries": 0, "wait_time": 0.0, "by_status": {}}
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self):
+        """Totals of all retries made with this policy.
+
+        :return: retries - number of retries, wait_time - seconds spent\
+            waiting, by_status - retries per status code ("error" for\
+            connection failures).
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "retries": self._stats["retries"],
+                "wait_time": self._stats["wait_time"],
+                "by_status": dict(self._stats["by_status"]),
+            }
+
+    def backoff(self, attempt):
+        """Return the wait before retry number `attempt` (starting at 0)
+        when the server did not send `Retry-After`.
+
+        :rtype: float
+        """
+        wait = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        if self.jitter:
+            wait = random.uniform(0, wait)
+        return wait
+
+    def get_wait(
+        self,
+        method,
+        attempt,
+        start,
+        status_code=None,
+        headers=None,
+        error=None,
+    ):
+        """Decide whether an attempt is retried.
+
+        :param method: HTTP method of the API call.
+        :type method: str
+        :param attempt: Number of retries already made.
+        :type attempt: int
+        :param start: `time.monotonic()` value when the API call started.
+        :type start: float
+        :param status_code: HTTP status code, None on connection failure.
+        :type status_code: int, optional
+        :param headers: HTTP response headers.
+        :type headers: dict, optional
+        :param error: Exception raised by the request, if any.
+        :type error: Exception, optional
+        :return: Seconds to wait before retrying, None if it is not retried.
+        :rtype: float
+        """
+        if method not in self.methods or attempt >= self.max_retries:
+            return None
+        if error is None and status_code not in self.status_codes:
+            return None
+
+        wait = None
+        if headers:
+            for key, value in headers.items():
+                if key.lower() == "retry-after":
+                    wait = parse_retry_after(value)
+                    break
+        if wait is None:
+            wait = self.backoff(attempt)
+        if wait > self.max_backoff and status_code != 429:
+            wait = self.max_backoff
+
+        if self.deadline is not None:
+            if time.monotonic() - start + wait > self.deadline:
+                return None
+        return wait
+
+    def record(self, app_name, method, path, attempt, wait, status_code=None,
+               error=None):
+        """Count a retry and call the on_retry hook."""
+        key = "error" if status_code is None else status_code
+        with self._lock:
+            self._stats["retries"] += 1
+            self._stats["wait_time"] += wait
+            by_status = self._stats["by_status"]
+            by_status[key] = by_status.get(key, 0) + 1
+        if self.on_retry:
+            self.on_retry(
+                {
+                    "app_name": app_name,
+                    "method": method,
+                    "path": path,
+                    "attempt": attempt + 1,
+                    "status_code": status_code,
+                    "error": error,
+                    "wait": wait,
+                }
+            )
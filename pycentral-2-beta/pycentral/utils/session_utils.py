@@ -0,0 +1,132 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading
+import weakref
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter
+
+# Number of distinct hosts (API gateway, GLP, SSO) whose pools are cached.
+DEFAULT_POOL_CONNECTIONS = 10
+# Maximum number of connections kept open per host.
+DEFAULT_POOL_MAXSIZE = 10
+
+
+class ConnectionPool(object):
+    """This class owns the HTTP connection pool shared by every API call made
+    through a pycentral base object. A single `requests.adapters.HTTPAdapter`
+    holds the underlying urllib3 pools, so TCP & TLS connections are reused
+    across calls. Each thread gets its own `requests.Session` mounted on that
+    shared adapter, which keeps the pool thread-safe without sharing cookie
+    jars or other per-session state between threads. Sessions never store
+    cookies, so cookies from one call (e.g. an OAUTH login) are not replayed
+    on later calls; they remain available on `response.cookies`.
+
+    :param pool_connections: Number of per-host pools to cache, defaults to 10
+    :type pool_connections: int, optional
+    :param pool_maxsize: Maximum number of connections kept open per host,\
+        defaults to 10
+    :type pool_maxsize: int, optional
+    :param pool_block: When True, a request waits for a free connection once\
+        pool_maxsize connections to a host are in use instead of opening an\
+        extra, non-pooled connection, defaults to False
+    :type pool_block: bool, optional
+    :param keep_alive: When False, every request is sent with\
+        `Connection: close` and nothing is reused, defaults to True
+    :type keep_alive: bool, optional
+    :param max_retries: Number of retries or an instance of\
+        `urllib3.util.Retry` applied to failed connections, defaults to 0
+    :type max_retries: int or class:`urllib3.util.Retry`, optional
+    """
+
+    def __init__(
+        self,
+        pool_connections=DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        pool_block=False,
+        keep_alive=True,
+        max_retries=0,
+    ):
+        """Constructor Method"""
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+            pool_block=pool_block,
+        )
+        self._local = threading.local()
+        self._sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Return the `requests.Session` of the calling thread, creating it on
+        first use.
+
+        :return: Session mounted on the shared adapter.
+        :rtype: class:`requests.Session`
+        """
+        s = getattr(self._local, "session", None)
+        if s is None:
+            s = requests.Session()
+            s.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            s.mount("https://", self.adapter)
+            s.mount("http://", self.adapter)
+            if not self.keep_alive:
+                s.headers["Connection"] = "close"
+            self._local.session = s
+            with self._lock:
+                self._sessions.add(s)
+        return s
+
+    def send(self, req, verify=True, timeout=None):
+        """Prepare and send a `requests.Request` over the pooled connections.
+
+        :param req: Request to be sent.
+        :type req: class:`requests.Request`
+        :param verify: Validate SSL certs of the server, defaults to True
+        :type verify: bool, optional
+        :param timeout: Seconds to wait for the server, defaults to None
+        :type timeout: float, optional
+        :return: HTTP response of the request.
+        :rtype: class:`requests.models.Response`
+        """
+        s = self.session
+        prepped = s.prepare_request(req)
+        settings = s.merge_environment_settings(
+            prepped.url, {}, None, verify, None
+        )
+        return s.send(prepped, timeout=timeout, **settings)
+
+    def close(self):
+        """Close every session and drop all pooled connections."""
+        with self._lock:
+            for s in list(self._sessions):
+                s.close()
+            self._sessions = weakref.WeakSet()
+        self._local = threading.local()
+        self.adapter.close()
@@ -0,0 +1,264 @@
+# MIT License
+#
+# Copyright (c) 2020 Aruba, a Hewlett Packard Enterprise company
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl  # type: ignore
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt  # type: ignore
+except ImportError:
+    msvcrt = None
+
+# Directory of the default stores, under the working directory.
+DEFAULT_TOKEN_STORE_DIR = "temp"
+
+
+def default_token_store_path():
+    """Directory of the default stores, resolved against the working
+    directory when a store is created rather than when pycentral is
+    imported.
+
+    :return: Absolute path of ./temp
+    :rtype: str
+    """
+    return os.path.join(os.getcwd(), DEFAULT_TOKEN_STORE_DIR)
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Hold an exclusive advisory lock on `lock_path` across processes. Uses
+    fcntl on POSIX and msvcrt on Windows.
+
+    :param lock_path: Path of the lock file, created if missing.
+    :type lock_path: str
+    """
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        elif msvcrt:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        elif msvcrt:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.close(fd)
+
+
+def atomic_write_json(file_path, data):
+    """Write `data` as JSON to a temporary file in the same directory and
+    rename it over `file_path`, so readers never see a partial file.
+
+    :param file_path: Destination file.
+    :type file_path: str
+    :param data: JSON serializable data.
+    :type data: dict
+    """
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fp:
+            json.dump(data, fp, indent=2)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def token_store_key(*parts):
+    """Build a file and SQL safe store key from identifying parts, e.g. app
+    name and client_id, without writing the raw client_id to disk.
+
+    :rtype: str
+    """
+    digest = hashlib.sha256(
+        "_".join(str(p) for p in parts[1:]).encode("utf-8")
+    ).hexdigest()[:20]
+    return f"{parts[0]}_{digest}"
+
+
+class TokenStore(object):
+    """Interface of a token store shared by every process on a host.
+
+    Tokens are dicts holding at least access_token and, when known,
+    expires_at as a UNIX timestamp. Override load, save and lock to plug in
+    another backend.
+    """
+
+    def load(self, key):
+        """Return the stored token for `key`, or None."""
+        raise NotImplementedError
+
+    def save(self, key, token):
+        """Store `token` for `key`."""
+        raise NotImplementedError
+
+    @contextmanager
+    def lock(self, key):
+        """Exclusive lock held while a process refreshes the token of `key`."""
+        raise NotImplementedError
+        yield
+
+    def is_fresh(self, token, margin=0):
+        """Check a stored token is present and not within `margin` seconds of
+        expiry. Tokens without expires_at are considered fresh.
+
+        :rtype: bool
+        """
+        if not token or not token.get("access_token"):
+            return False
+        expires_at = token.get("expires_at")
+        return expires_at is None or expires_at - time.time() > margin
+
+
+class FileTokenStore(TokenStore):
+    """Token store keeping one JSON file per key, written atomically and
+    guarded by an advisory lock file.
+
+    :param path: Directory holding the token files, defaults to ./temp
+    :type path: str, optional
+    """
+
+    def __init__(self, path=None):
+        """Constructor Method"""
+        self.path = path or default_token_store_path()
+        self._thread_locks = {}
+        self._thread_locks_lock = threading.Lock()
+
+    def file_path(self, key):
+        return os.path.join(self.path, f"tok_{key}.json")
+
+    def load(self, key):
+        try:
+            with open(self.file_path(key), "r") as fp:
+                return json.load(fp) or None
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, token):
+        atomic_write_json(self.file_path(key), token)
+
+    @contextmanager
+    def lock(self, key):
+        # flock does not exclude threads of the same process that open their
+        # own descriptor on every platform, so serialize them first.
+        with self._thread_locks_lock:
+            thread_lock = self._thread_locks.setdefault(
+                key, threading.Lock()
+            )
+        with thread_lock:
+            os.makedirs(self.path, exist_ok=True)
+            with file_lock(os.path.join(self.path, f"tok_{key}.lock")):
+                yield
+
+
+class SQLiteTokenStore(TokenStore):
+    """Token store keeping tokens in a SQLite database. The refresh lock is a
+    write transaction, so it also works on network file systems where
+    advisory file locks are unreliable.
+
+    :param path: Path of the SQLite database file, defaults to\
+        ./temp/tokens.db
+    :type path: str, optional
+    :param timeout: Seconds to wait for another process holding the lock,\
+        defaults to 60
+    :type timeout: float, optional
+    """
+
+    def __init__(self, path=None, timeout=60):
+        """Constructor Method"""
+        self.path = path or os.path.join(
+            default_token_store_path(), "tokens.db"
+        )
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        os.chmod(self.path, 0o600)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            "key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL, "
+            "updated_at REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            self._local.conn = conn
+        return conn
+
+    def load(self, key):
+        row = self._connection().execute(
+            "SELECT token FROM tokens WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def save(self, key, token):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO tokens (key, token, expires_at, "
+            "updated_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(token), token.get("expires_at"), time.time()),
+        )
+
+    @contextmanager
+    def lock(self, key):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
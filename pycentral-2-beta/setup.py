@@ -36,5 +36,5 @@ setuptools.setup(
         "pytz==2024.1",
         "termcolor==2.4.0",
     ],
-    extras_require={"colorLog": ["colorlog"]},
+    extras_require={"colorLog": ["colorlog"], "async": ["aiohttp>=3.8"]},
 )
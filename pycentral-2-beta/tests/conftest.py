@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Test the pycentral package of this tree rather than an installed release.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,196 @@
+"""
+Tests of class: `pycentral.AsyncNewCentralBase` against an aiohttp.web stub
+of the SSO token endpoint and the New Central API.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+
+from pycentral.async_base import AsyncNewCentralBase, urls  # noqa: E402
+from pycentral.utils.retry_utils import RetryPolicy  # noqa: E402
+
+TOKEN_PATH = "/as/token.oauth2"
+
+
+class Stub(object):
+    """Token endpoint minting tok-1, tok-2, ... and a /sites API accepting
+    the latest token only."""
+
+    def __init__(self, delay=0, replies=None):
+        self.delay = delay
+        # Status codes and headers answered before the regular reply.
+        self.replies = list(replies or [])
+        self.tokens = []
+        self.token_requests = []
+        self.api_requests = []
+        self.url = None
+
+    async def token(self, request):
+        form = await request.post()
+        self.token_requests.append(
+            (request.headers.get("Authorization"), dict(form))
+        )
+        self.tokens.append(f"tok-{len(self.tokens) + 1}")
+        return web.json_response(
+            {
+                "access_token": self.tokens[-1],
+                "token_type": "Bearer",
+                "expires_in": 7200,
+            }
+        )
+
+    async def sites(self, request):
+        self.api_requests.append(request.headers.get("Authorization"))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.replies:
+            status, headers = self.replies.pop(0)
+            return web.json_response(
+                {"error": status}, status=status, headers=headers
+            )
+        if not self.tokens or (
+            request.headers.get("Authorization") != f"Bearer {self.tokens[-1]}"
+        ):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        return web.json_response(
+            {"items": [{"scopeId": "1"}], "offset": request.query.get("offset")},
+            headers={"X-Stub": "yes"},
+        )
+
+    async def text(self, request):
+        return web.Response(text="not json")
+
+
+def run(stub, test, monkeypatch, **client_args):
+    """Start the stub, point the SDK at it and run test(client, stub)."""
+
+    async def main():
+        app = web.Application()
+        app.router.add_post(TOKEN_PATH, stub.token)
+        app.router.add_get("/sites", stub.sites)
+        app.router.add_get("/text", stub.text)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        stub.url = f"http://127.0.0.1:{port}"
+        monkeypatch.setitem(
+            urls.Authentication, "OAUTH", stub.url + TOKEN_PATH
+        )
+        token_info = {
+            "new_central": {
+                "base_url": stub.url,
+                "client_id": "client",
+                "client_secret": "secret",
+            }
+        }
+        token_info["new_central"].update(client_args.pop("token", {}))
+        client_args.setdefault("rate_limiter", False)
+        client = AsyncNewCentralBase(
+            token_info, log_level="CRITICAL", **client_args
+        )
+        try:
+            return await test(client, stub)
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_token_minted_on_first_call(monkeypatch):
+    async def test(client, stub):
+        resp = await client.command("GET", "sites")
+        assert resp["code"] == 200
+        assert client.token_info["new_central"]["access_token"] == "tok-1"
+        assert stub.api_requests == ["Bearer tok-1"]
+        authorization, form = stub.token_requests[0]
+        assert authorization.startswith("Basic ")
+        assert form == {"grant_type": "client_credentials"}
+
+    stub = Stub()
+    run(stub, test, monkeypatch)
+    assert len(stub.token_requests) == 1
+
+
+def test_rejected_token_refreshed_once(monkeypatch):
+    async def test(client, stub):
+        resp = await client.command("GET", "sites")
+        assert resp["code"] == 200
+        assert stub.api_requests == ["Bearer stale", "Bearer tok-1"]
+        assert client.token_info["new_central"]["access_token"] == "tok-1"
+
+    stub = Stub()
+    run(stub, test, monkeypatch, token={"access_token": "stale"})
+    assert len(stub.token_requests) == 1
+
+
+def test_expired_token_refreshed_before_call(monkeypatch):
+    async def test(client, stub):
+        await client.create_token("new_central")
+        client._token_expiry["new_central"] = time.time() - 1
+        resp = await client.command("GET", "sites")
+        assert resp["code"] == 200
+        # Refreshed before sending, the old token never reached the API.
+        assert stub.api_requests == ["Bearer tok-2"]
+
+    stub = Stub()
+    run(stub, test, monkeypatch)
+    assert len(stub.token_requests) == 2
+
+
+def test_command_result_shape(monkeypatch):
+    async def test(client, stub):
+        resp = await client.command(
+            "GET", "sites", api_params={"offset": 5, "unset": None}
+        )
+        assert set(resp) == {"code", "msg", "headers"}
+        assert resp["code"] == 200
+        assert resp["msg"] == {"items": [{"scopeId": "1"}], "offset": "5"}
+        assert resp["headers"]["X-Stub"] == "yes"
+        text = await client.command("GET", "text")
+        assert text["code"] == 200
+        assert text["msg"] == "not json"
+
+    run(Stub(), test, monkeypatch)
+
+
+def test_concurrent_identical_gets_coalesced(monkeypatch):
+    async def test(client, stub):
+        await client.create_token("new_central")
+        responses = await asyncio.gather(
+            *[client.command("GET", "sites") for _ in range(10)]
+        )
+        assert all(resp == responses[0] for resp in responses)
+        # Every caller gets its own copy.
+        responses[0]["msg"]["items"].clear()
+        assert responses[1]["msg"]["items"] == [{"scopeId": "1"}]
+        await client.command("GET", "sites", api_params={"offset": 1})
+
+    stub = Stub(delay=0.2)
+    run(stub, test, monkeypatch)
+    assert len(stub.api_requests) == 2
+
+
+def test_retry_after_honoured(monkeypatch):
+    policy = RetryPolicy(backoff_factor=0, jitter=False)
+
+    async def test(client, stub):
+        await client.create_token("new_central")
+        start = time.monotonic()
+        resp = await client.command("GET", "sites")
+        elapsed = time.monotonic() - start
+        assert resp["code"] == 200
+        assert elapsed >= 1
+        assert len(stub.api_requests) == 2
+
+    stub = Stub(replies=[(429, {"Retry-After": "1"})])
+    run(stub, test, monkeypatch, retry_policy=policy)
+    assert policy.stats["retries"] == 1
+    assert policy.stats["by_status"] == {429: 1}
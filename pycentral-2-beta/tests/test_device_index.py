@@ -0,0 +1,44 @@
+"""
+Tests of the key lookups of class: `pycentral.glp.device_index.DeviceIndex`.
+"""
+
+import pytest
+
+from pycentral.glp.device_index import DeviceIndex
+
+
+@pytest.fixture
+def index():
+    index = DeviceIndex()
+    index.upsert(
+        {"id": "d1", "serialNumber": "SN1", "macAddress": "aa:bb:cc:dd:ee:ff"}
+    )
+    index.upsert(
+        {"id": "d2", "serialNumber": "CNX1", "macAddress": "11:22:33:44:55:66"}
+    )
+    index.upsert(
+        {"id": "d3", "serialNumber": "SN3", "macAddress": "ca:fe:ba:be:00:01"}
+    )
+    return index
+
+
+@pytest.mark.parametrize(
+    "key",
+    ["d1", "SN1", "aa:bb:cc:dd:ee:ff", "AA-BB-CC-DD-EE-FF", "aabb.ccdd.eeff",
+     "AABBCCDDEEFF"],
+)
+def test_get_by_id_serial_or_mac(index, key):
+    assert index.get(key)["id"] == "d1"
+
+
+# Unknown serials whose hex digits spell the MAC of d3.
+@pytest.mark.parametrize(
+    "key", ["XCAFEBABE0001Z", "CAFE-BABE-0001", "ca:fe-ba:be:00:01"]
+)
+def test_non_mac_keys_never_match_macs(index, key):
+    assert index.get(key) is None
+    assert index.get_by_mac(key) is None
+
+
+def test_serial_wins_over_mac(index):
+    assert index.get("CNX1")["id"] == "d2"
@@ -0,0 +1,122 @@
+"""
+Call counts of the GLP subscription key and user email to ID lookups with
+the caches of pycentral.glp.subscriptions and pycentral.glp.user_management.
+"""
+
+import logging
+import re
+
+import pytest
+
+from pycentral.glp import Subscriptions, UserMgmt
+
+SUBSCRIPTIONS = [{"id": f"sub-{i}", "key": f"KEY{i}"} for i in range(120)]
+USERS = [
+    {"id": f"user-{i}", "username": f"user{i}@example.com"} for i in range(5)
+]
+
+
+class StubConn(object):
+    """Base object answering the subscriptions and users APIs from memory
+    and recording every command() call."""
+
+    def __init__(self):
+        self.logger = logging.getLogger("test_lookup_cache")
+        self.rate_limiter = None
+        self.calls = []
+
+    def command(self, api_method, api_path, app_name="new_central",
+                api_data={}, api_params={}, headers={}, files={}):
+        self.calls.append((api_method, api_path))
+        if api_method != "GET":
+            return {"code": 400, "msg": {"message": "rejected by stub"}}
+        if api_path.startswith("/identity/v1/users/"):
+            return {"code": 200, "msg": {}}
+        if api_path.startswith("/subscriptions"):
+            items, field, offset = SUBSCRIPTIONS, "key", api_params["offset"]
+        else:
+            # The users API counts offset in pages.
+            items, field = USERS, "username"
+            offset = api_params["offset"] * api_params["limit"]
+        if "filter" in api_params:
+            value = re.match(r"\w+ eq '(.*)'$", api_params["filter"]).group(1)
+            items = [item for item in items if item[field] == value]
+        page = items[offset:offset + api_params["limit"]]
+        return {
+            "code": 200,
+            "msg": {
+                "items": page,
+                "count": len(page),
+                "offset": offset,
+                "total": len(items),
+            },
+        }
+
+    def reset(self):
+        calls, self.calls = self.calls, []
+        return calls
+
+
+@pytest.fixture
+def conn():
+    return StubConn()
+
+
+def test_sub_id_lookups_cached(conn):
+    s = Subscriptions()
+    assert s.get_sub_id(conn, "KEY7") == (True, "sub-7")
+    assert s.get_sub_id(conn, "KEY7") == (True, "sub-7")
+    assert len(conn.reset()) == 1
+
+
+def test_no_sub_id_calls_after_prefetch(conn):
+    s = Subscriptions()
+    s.prefetch_sub_ids(conn)
+    # Three pages of 50.
+    assert len(conn.reset()) == 3
+    for sub in SUBSCRIPTIONS:
+        assert s.get_sub_id(conn, sub["key"]) == (True, sub["id"])
+    assert conn.reset() == []
+
+
+def test_add_subscription_invalidates_keys(conn):
+    s = Subscriptions()
+    s.prefetch_sub_ids(conn)
+    s.add_subscription(conn, [{"key": "KEY1"}])
+    conn.reset()
+    assert s.get_sub_id(conn, "KEY1") == (True, "sub-1")
+    assert s.get_sub_id(conn, "KEY2") == (True, "sub-2")
+    assert len(conn.reset()) == 1
+
+
+def test_no_user_id_calls_after_prefetch(conn):
+    u = UserMgmt()
+    assert u.prefetch_user_ids(conn) == len(USERS)
+    conn.reset()
+    for user in USERS:
+        assert u.get_user_id(conn, user["username"]) == (True, user["id"])
+    assert conn.reset() == []
+
+
+def test_delete_user_invalidates_email_and_id(conn):
+    u = UserMgmt()
+    u.prefetch_user_ids(conn)
+    conn.reset()
+    u.delete_user(conn, email="user1@example.com")
+    u.delete_user(conn, user_id="user-2")
+    # Each delete is a single DELETE, the ID of user1 came from the cache.
+    assert [method for method, _ in conn.reset()] == ["DELETE", "DELETE"]
+    u.get_user_id(conn, "user1@example.com")
+    u.get_user_id(conn, "user2@example.com")
+    u.get_user_id(conn, "user3@example.com")
+    assert len(conn.reset()) == 2
+
+
+def test_inv_user_invalidates_email(conn):
+    u = UserMgmt()
+    u.prefetch_user_ids(conn)
+    u.inv_user(conn, "user3@example.com", False)
+    conn.reset()
+    u.get_user_id(conn, "user3@example.com")
+    u.get_user_id(conn, "user4@example.com")
+    assert len(conn.reset()) == 1
@@ -0,0 +1,87 @@
+"""
+Conditional GETs of class: `pycentral.NewCentralBase` with a
+`pycentral.utils.cache_utils.ResponseCache`, against a local stub API.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pycentral import NewCentralBase
+from pycentral.utils.cache_utils import ResponseCache
+
+TTL = 0.05
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Every If-None-Match received, and a hook run before answering 304.
+    conditional = []
+    before_304 = None
+
+    def do_GET(self):
+        etag = self.headers.get("If-None-Match")
+        if etag is not None:
+            self.conditional.append(etag)
+            if StubHandler.before_304 is not None:
+                StubHandler.before_304()
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"items": [{"scopeId": "1"}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def conn():
+    StubHandler.conditional = []
+    StubHandler.before_304 = None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn = NewCentralBase(
+        token_info={
+            "new_central": {
+                "base_url": f"http://127.0.0.1:{server.server_address[1]}",
+                "access_token": "tok",
+            }
+        },
+        log_level="CRITICAL",
+        token_store=False,
+        response_cache=ResponseCache(ttl_rules=[("new_central", "/sites", TTL)]),
+    )
+    yield conn
+    server.shutdown()
+    server.server_close()
+
+
+def test_304_reuses_cached_result(conn):
+    first = conn.command("GET", "sites")
+    time.sleep(TTL * 2)
+    again = conn.command("GET", "sites")
+    assert StubHandler.conditional == ['"v1"']
+    assert again["code"] == 200
+    assert again["msg"] == first["msg"]
+
+
+def test_304_after_eviction_fetched_again(conn):
+    conn.command("GET", "sites")
+    time.sleep(TTL * 2)
+    # The entry is evicted between the lookup and the 304.
+    StubHandler.before_304 = conn.response_cache.clear
+    resp = conn.command("GET", "sites")
+    assert StubHandler.conditional == ['"v1"']
+    assert resp["code"] == 200
+    assert resp["msg"] == {"items": [{"scopeId": "1"}]}
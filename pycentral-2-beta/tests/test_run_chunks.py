@@ -0,0 +1,78 @@
+"""
+Deadline of the pipelined bulk calls of pycentral.glp, run through
+`pycentral.utils.glp_utils.run_chunks`, with a stub conn whose async
+transactions complete only when told to.
+"""
+
+import itertools
+import logging
+import time
+
+import pytest
+
+from pycentral.glp import Devices
+from pycentral.utils.job_journal import SUBMITTED, SUCCEEDED, JobJournal
+
+DEVICES = [f"dev-{i}" for i in range(7)]
+
+
+class StubConn(object):
+    """Base object accepting every PATCH as an async transaction and
+    answering its status from memory."""
+
+    def __init__(self):
+        self.logger = logging.getLogger("test_run_chunks")
+        self.rate_limiter = None
+        self.done = False
+        self.patches = 0
+        self._ids = itertools.count()
+
+    def command(self, api_method, api_path, app_name="new_central",
+                api_data={}, api_params={}, headers={}, files={}):
+        if api_method == "PATCH":
+            self.patches += 1
+            return {
+                "code": 202,
+                "msg": {"transactionId": f"t{next(self._ids)}"},
+            }
+        status = "SUCCEEDED" if self.done else "IN_PROGRESS"
+        id = api_path.rstrip("/").rsplit("/", 1)[1]
+        return {"code": 200, "msg": {"id": id, "status": status}}
+
+
+@pytest.fixture
+def conn():
+    return StubConn()
+
+
+def test_timeout_stops_tracking(conn):
+    start = time.monotonic()
+    report = Devices().assign_devices(
+        conn, DEVICES, "app", "us-west", pipelined=True, timeout=0.2
+    )
+    assert time.monotonic() - start < 1
+    assert [result.success for result in report] == [False, False]
+    assert report[0].response["msg"]["status"] == "TIMEOUT"
+
+
+def test_timed_out_chunks_resumed_from_journal(conn, tmp_path):
+    journal = JobJournal(str(tmp_path / "jobs.db"))
+    d = Devices()
+    d.assign_devices(
+        conn, DEVICES, "app", "us-west", journal=journal, job_id="job",
+        timeout=0.2,
+    )
+    # Still running when the deadline passed, not failed.
+    chunks = journal.get_chunks("job")
+    assert [chunks[i]["status"] for i in sorted(chunks)] == [SUBMITTED] * 2
+
+    conn.done = True
+    report = d.assign_devices(
+        conn, DEVICES, "app", "us-west", pipelined=True, journal=journal,
+        job_id="job",
+    )
+    assert [result.success for result in report] == [True, True]
+    # Tracked again instead of sent again.
+    assert conn.patches == 2
+    chunks = journal.get_chunks("job")
+    assert [chunks[i]["status"] for i in sorted(chunks)] == [SUCCEEDED] * 2
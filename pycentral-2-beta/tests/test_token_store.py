@@ -0,0 +1,28 @@
+"""
+Default locations of the stores of pycentral.utils.token_store and
+pycentral.utils.job_journal.
+"""
+
+import os
+
+from pycentral.utils.job_journal import JobJournal
+from pycentral.utils.token_store import FileTokenStore, SQLiteTokenStore
+
+
+def test_default_paths_follow_working_directory(tmp_path, monkeypatch):
+    # Resolved when the store is created, not when pycentral was imported.
+    monkeypatch.chdir(tmp_path)
+    temp = os.path.join(str(tmp_path), "temp")
+    assert FileTokenStore().path == temp
+    assert SQLiteTokenStore().path == os.path.join(temp, "tokens.db")
+    assert JobJournal().path == os.path.join(temp, "jobs.db")
+
+
+def test_tokens_saved_under_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = FileTokenStore()
+    with store.lock("key"):
+        store.save("key", {"access_token": "tok"})
+    files = sorted(os.listdir(str(tmp_path / "temp")))
+    assert files == ["tok_key.json", "tok_key.lock"]
+    assert store.load("key") == {"access_token": "tok"}
@@ -0,0 +1,211 @@
+#!/usr/bin/python3
+
+'''
+Page latency of the companion app with a new client per request against the
+process-wide client of utility.get_client_api.
+
+A local stub plays the HPE SSO token endpoint and the New Central sites API,
+each answering after a fixed delay. The site update form is posted to
+/update concurrently through the Flask test client, once per mode:
+
+- per request: a new NewCentralBase for every page view, fetching a token
+  before the sites call (the previous get_client()).
+- shared: get_client() as the routes call it now, one client and one token
+  for the whole process.
+
+/get_sites is read from Mongo and no longer calls Central, the updates are
+written through to a sites collection in a throwaway database on the Mongo
+server of the app, which must be reachable as for the app itself. The
+database is dropped when the run ends. The app is imported once the stub is
+in place and its site store is swapped for the throwaway one, without a
+refresher, before the first request, so the demo database is never written
+and no client ever points at a real base_url.
+
+Both modes use the SDK vendored in pycentral-2-beta, which requirements.txt
+and the Docker image install, not a pycentral release from PyPI. Run from
+the repository root once requirements.txt is installed:
+    python tests/page_latency.py [--requests 200]
+or against the tree without installing it:
+    PYTHONPATH=pycentral-2-beta python tests/page_latency.py [--requests 200]
+'''
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The stub serves the token endpoint over plain HTTP.
+os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pycentral import NewCentralBase
+from pycentral.utils.url_utils import NewCentralURLs
+from utility import get_client_api
+from utility.site_store import SiteStore
+
+SETTINGS = {"token_latency": 0.0, "api_latency": 0.0}
+COUNTS = {"token": 0, "sites": 0}
+COUNTS_LOCK = threading.Lock()
+FORM = {
+    "scopeId": "load-test-site",
+    "name": "load-test-site",
+    "address": "1 Main St",
+    "city": "Austin",
+    "state": "TX",
+    "country": "US",
+    "zipcode": "78701",
+    "timezone": "{'timezoneId': 'America/Chicago', 'timezoneName': 'Central', 'rawOffset': -21600000}",
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        # Token requests, the only POST the stub gets.
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._count("token")
+        time.sleep(SETTINGS["token_latency"])
+        self._reply(
+            {
+                "access_token": "load-test-token",
+                "token_type": "Bearer",
+                "expires_in": 7200,
+            }
+        )
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._count("sites")
+        time.sleep(SETTINGS["api_latency"])
+        self._reply({})
+
+    def _count(self, name):
+        with COUNTS_LOCK:
+            COUNTS[name] += 1
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def load(companion, requests, threads):
+    # Page latencies in seconds, every thread with its own test client as
+    # concurrent browsers would.
+    latencies = []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker():
+        browser = companion.app.test_client()
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            start = time.perf_counter()
+            page = browser.post("/update", data=FORM)
+            elapsed = time.perf_counter() - start
+            assert page.status_code == 200, page.status_code
+            with lock:
+                latencies.append(elapsed)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--token-latency", type=float, default=0.15)
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    args = parser.parse_args()
+    SETTINGS["token_latency"] = args.token_latency
+    SETTINGS["api_latency"] = args.api_latency
+    logging.disable(logging.CRITICAL)
+    # Keep the token store of the shared client out of the working tree.
+    os.chdir(tempfile.mkdtemp())
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub = "http://127.0.0.1:{}".format(server.server_address[1])
+    NewCentralURLs.Authentication["OAUTH"] = stub + "/as/token.oauth2"
+    token_info = {
+        "new_central": {
+            "base_url": stub,
+            "client_id": "load-test",
+            "client_secret": "load-test",
+        }
+    }
+    get_client_api.token_info = token_info
+    # Only now, the refresher and the shared client can only reach the stub.
+    import app as companion
+
+    def per_request_client():
+        return NewCentralBase(
+            token_info={"new_central": dict(token_info["new_central"])},
+            token_store=False,
+        )
+
+    # Write the load-test-site document to a throwaway database, not to
+    # the sites collection of the app.
+    db_name = "page_latency_{}".format(uuid.uuid4().hex)
+    demo_store = companion.site_store
+    companion.site_store = SiteStore(companion.client[db_name])
+    # Updates are only written through, a refresher would add its own token
+    # and sites calls to the counts.
+    companion.site_store.start = lambda: None
+    try:
+        print("{:<14}{:>10}{:>10}{:>10}{:>10}".format(
+            "mode", "p50 ms", "p99 ms", "tokens", "calls"))
+        for mode, get_client in [
+            ("per request", per_request_client),
+            ("shared", get_client_api.get_client),
+        ]:
+            companion.get_client = get_client
+            COUNTS.update(token=0, sites=0)
+            latencies = load(companion, args.requests, args.threads)
+            print("{:<14}{:>10.1f}{:>10.1f}{:>10}{:>10}".format(
+                mode,
+                percentile(latencies, 0.50) * 1000,
+                percentile(latencies, 0.99) * 1000,
+                COUNTS["token"],
+                COUNTS["sites"],
+            ))
+        assert demo_store._thread is None, "the demo site store was started"
+        shared = get_client_api._client
+        assert shared is not None
+        assert shared.token_info["new_central"]["base_url"] == stub, \
+            shared.token_info["new_central"]["base_url"]
+    finally:
+        companion.client.drop_database(db_name)
+        get_client_api.close_client()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -39,10 +39,19 @@ __status__ = "Alpha"
 
 '''
 from pycentral.base import ArubaCentralBase
+from concurrent.futures import ThreadPoolExecutor
 
-def api_caller(client, api_method, api_path, api_data=None):
+# Items requested per page by the paginating mode.
+PAGE_LIMIT = 100
 
-    if api_data == None:
+def api_caller(client, api_method, api_path, api_data=None, paginate=False, limit=PAGE_LIMIT, prefetch=True):
+
+    if paginate:
+
+        # Stream every item of a list endpoint, page after page
+        results = iter_items(client, api_path, limit=limit, prefetch=prefetch)
+
+    elif api_data == None:
 
         # Get api
         response = client.command(api_method=api_method, api_path=api_path)
@@ -54,3 +63,63 @@ def api_caller(client, api_method, api_path, api_data=None):
         response = client.command(api_method=api_method, api_path=api_path, api_data=api_data)
         results =  response
     return results
+
+def iter_items(client, api_path, api_params=None, limit=PAGE_LIMIT, prefetch=True):
+    # Yield the items of every page of a New Central list endpoint
+    for items in iter_pages(client, api_path, api_params, limit, prefetch):
+        for item in items:
+            yield item
+
+def iter_pages(client, api_path, api_params=None, limit=PAGE_LIMIT, prefetch=True):
+    # Yield the items list of every page of a New Central list endpoint. The
+    # next page follows the "next" field of the response when there is one,
+    # or the offset of the page and the "total" field. With prefetch the next
+    # page is requested in the background while the caller handles this one.
+    params = dict(api_params or {}, limit=limit, offset=0)
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    pending = None
+    try:
+        while params is not None:
+            if pending is not None:
+                response = pending.result()
+                pending = None
+            else:
+                response = _get_page(client, api_path, params)
+            msg = response['msg']
+            items = msg.get('items') or []
+            params = _next_params(params, msg, len(items), limit)
+            if params is not None and executor is not None:
+                pending = executor.submit(_get_page, client, api_path, params)
+            yield items
+    finally:
+        # The caller may stop early, do not leave a request behind.
+        if pending is not None:
+            pending.cancel()
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+def _get_page(client, api_path, params):
+    response = client.command(api_method="GET", api_path=api_path, api_params=params)
+    if response.get('code') != 200:
+        raise RuntimeError('GET {} failed with {}: {}'.format(api_path, response.get('code'), response.get('msg')))
+    return response
+
+def _next_params(params, msg, count, limit):
+    # Query parameters of the page after this one, None on the last page.
+    if 'next' in msg:
+        following = msg['next']
+        if following in (None, ''):
+            return None
+        if isinstance(following, int) or str(following).isdigit():
+            # Guard against an endpoint pointing at the same page again
+            if int(following) <= params['offset']:
+                return None
+            return dict(params, offset=int(following))
+        # Cursor based endpoints
+        return dict(params, next=following)
+    offset = params['offset'] + count
+    if count == 0:
+        return None
+    if msg.get('total') is not None:
+        return dict(params, offset=offset) if offset < msg['total'] else None
+    return dict(params, offset=offset) if count >= limit else None
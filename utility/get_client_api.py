@@ -38,18 +38,39 @@ __email__ = "rick@rickkauffman.com"
 __status__ = "Alpha"
 
 '''
-import requests
+import atexit
+import threading
 from pycentral import NewCentralBase
 from utility.token_info import token_info
-import json
+
+# One client per process, shared by every request. It keeps the pooled
+# session and the access token, refreshed by the SDK when it expires, so a
+# page view costs a single upstream call instead of a token fetch and a call.
+_client = None
+_client_lock = threading.Lock()
 
 def get_client():
-    global token_info
+    global _client
+
+    client = _client
+    if client is None:
+        with _client_lock:
+            # Another request thread may have created it while we waited.
+            if _client is None:
+                _client = NewCentralBase(
+                            token_info=token_info
+                            )
+            client = _client
 
+    return client
 
-    client = NewCentralBase(
-                token_info=token_info
-                )
+def close_client():
+    # Drop the shared client, the next get_client() creates a new one.
+    global _client
 
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None and hasattr(client, 'close'):
+        client.close()
 
-    return client
+atexit.register(close_client)
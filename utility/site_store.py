@@ -0,0 +1,385 @@
+#!/usr/bin/python3
+
+'''
+
+
+ █████   █████          ████
+░░███   ░░███          ░░███
+ ░███    ░███   ██████  ░███   ██████
+ ░███    ░███  ███░░███ ░███  ███░░███
+ ░░███   ███  ░███ ░███ ░███ ░███████
+  ░░░█████░   ░███ ░███ ░███ ░███░░░
+    ░░███     ░░██████  █████░░██████
+     ░░░       ░░░░░░  ░░░░░  ░░░░░░
+
+An amimal who likes to dig.
+
+2025 wookieware..
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0.
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+
+__author__ = "@netwookie"
+__credits__ = ["Rick Kauffman"]
+__license__ = "Apache2"
+__version__ = "0.1.1"
+__maintainer__ = "Rick Kauffman"
+__email__ = "rick@rickkauffman.com"
+__status__ = "Alpha"
+
+'''
+import datetime
+import logging
+import re
+import threading
+import uuid
+import pymongo
+from utility.get_client_api import get_client
+from utility.api_caller import api_caller
+
+SITES_PATH = "network-config/v1alpha1/sites"
+
+# Seconds between two background refreshes of the sites collection.
+REFRESH_INTERVAL = 300
+
+# Sites written to Mongo per bulk write while a refresh streams them in.
+BATCH_SIZE = 500
+
+# Fields of the columns of the sites table, in column order.
+COLUMNS = [
+    "scopeName",
+    "scopeId",
+    "address",
+    "city",
+    "state",
+    "zipcode",
+    "timezone.timezoneId",
+]
+
+# Most rows returned for one page of the sites table.
+MAX_PAGE_LENGTH = 1000
+
+# Form fields of the site API payloads stored under another name by the
+# sites list API.
+FIELD_NAMES = {"name": "scopeName"}
+
+logger = logging.getLogger(__name__)
+
+
+class SiteStore(object):
+    '''
+    Read model of the Central sites kept in the Mongo "sites" collection.
+    Pages read the sites from Mongo, a background thread reloads them from
+    Central every interval seconds and the add, update and delete routes
+    write their changes through, so pages never wait for Central.
+    '''
+
+    def __init__(self, db, interval=REFRESH_INTERVAL):
+        self.sites = db["sites"]
+        self.status = db["sync_status"]
+        # Sites deleted through the app, kept until a refresh started after
+        # the delete, so a refresh already reading them from Central cannot
+        # put them back.
+        self.tombstones = db["site_tombstones"]
+        self.interval = interval
+        self._refresh_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._indexed = False
+
+    def _ensure_indexes(self):
+        if not self._indexed:
+            self.sites.create_index("scopeId", unique=True)
+            # Covers the name and ID list of the site choosers as well.
+            self.sites.create_index(
+                [("scopeName", pymongo.ASCENDING), ("scopeId", pymongo.ASCENDING)]
+            )
+            # Sorting the sites table by any other column.
+            for field in COLUMNS[2:]:
+                self.sites.create_index(
+                    [(field, pymongo.ASCENDING), ("scopeId", pymongo.ASCENDING)]
+                )
+            self.tombstones.create_index("scopeId", unique=True)
+            self._indexed = True
+
+    def start(self):
+        # Start the background refresher, once per process. Called on every
+        # request, the lock only matters for the first ones.
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="site-store-refresher", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Refreshing the sites collection failed")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def refresh_soon(self):
+        # Wake the background refresher up instead of waiting for interval.
+        self._wakeup.set()
+
+    def refresh(self):
+        # Reload every site from Central, replacing the collection content.
+        with self._refresh_lock:
+            self._ensure_indexes()
+            started = datetime.datetime.utcnow()
+            # Every site seen by this refresh is tagged with its ID, the
+            # others were deleted from Central.
+            sync_id = uuid.uuid4().hex
+            count = 0
+            try:
+                items = api_caller(get_client(), "GET", SITES_PATH, paginate=True)
+                for sites in _batches(items, BATCH_SIZE):
+                    deleted = self._deleted_since(started)
+                    sites = [site for site in sites if site["scopeId"] not in deleted]
+                    if not sites:
+                        continue
+                    self.sites.bulk_write(
+                        [
+                            pymongo.ReplaceOne(
+                                {"scopeId": site["scopeId"]},
+                                dict(site, _sync=sync_id),
+                                upsert=True,
+                            )
+                            for site in sites
+                        ],
+                        ordered=False,
+                    )
+                    count += len(sites)
+            except Exception as e:
+                self.status.update_one(
+                    {"_id": "sites"},
+                    {"$set": {"error": str(e), "failed_at": started}},
+                    upsert=True,
+                )
+                raise
+            # Sites deleted while their batch was being written.
+            self.sites.delete_many(
+                {"scopeId": {"$in": list(self._deleted_since(started))}}
+            )
+            # Deletes older than this refresh are reflected by Central.
+            self.tombstones.delete_many({"deleted_at": {"$lt": started}})
+            # Sites written through since the refresh started may be missing
+            # from what it read, keep them.
+            self.sites.delete_many(
+                {
+                    "_sync": {"$ne": sync_id},
+                    "$or": [
+                        {"_written": {"$exists": False}},
+                        {"_written": {"$lt": started}},
+                    ],
+                }
+            )
+            self.status.update_one(
+                {"_id": "sites"},
+                {
+                    "$set": {
+                        "refreshed_at": datetime.datetime.utcnow(),
+                        "count": count,
+                        "error": None,
+                    }
+                },
+                upsert=True,
+            )
+            return count
+
+    def _deleted_since(self, started):
+        # scopeIds of the sites deleted through the app since started.
+        return {
+            tombstone["scopeId"]
+            for tombstone in self.tombstones.find(
+                {"deleted_at": {"$gte": started}}, {"_id": 0, "scopeId": 1}
+            )
+        }
+
+    def _ensure_loaded(self):
+        # Load the sites from Central on first use.
+        self._ensure_indexes()
+        if self.freshness()["refreshed_at"] is None:
+            self.refresh()
+
+    def all(self):
+        # Every site sorted by name.
+        self._ensure_loaded()
+        return list(
+            self.sites.find({}, {"_id": 0, "_sync": 0, "_written": 0}).sort("scopeName", pymongo.ASCENDING)
+        )
+
+    def choices(self):
+        # Name and scopeId of every site sorted by name, for the site choosers.
+        self._ensure_loaded()
+        return list(
+            self.sites.find({}, {"_id": 0, "scopeName": 1, "scopeId": 1}).sort(
+                [("scopeName", pymongo.ASCENDING), ("scopeId", pymongo.ASCENDING)]
+            )
+        )
+
+    def page(self, start=0, length=10, search=None, order=None):
+        # One page of the sites table: the number of sites, the number
+        # matching search, and the matching sites from start on. search is
+        # matched as a prefix of any column, order is a list of (column
+        # index, "asc" or "desc"). The sort ends on scopeId, so pages are
+        # stable and follow an index.
+        self._ensure_loaded()
+        total = self.sites.estimated_document_count()
+        query = {}
+        if search:
+            query = _prefix_query(search)
+        filtered = self.sites.count_documents(query) if query else total
+        sort = []
+        for column, direction in order or [(0, "asc")]:
+            field = COLUMNS[column]
+            if field not in [f for f, _ in sort]:
+                sort.append((field, pymongo.DESCENDING if direction == "desc" else pymongo.ASCENDING))
+        if "scopeId" not in [f for f, _ in sort]:
+            sort.append(("scopeId", pymongo.ASCENDING))
+        cursor = self.sites.find(query, {"_id": 0, "_sync": 0, "_written": 0}).sort(sort)
+        # DataTables asks for every row with a length of -1.
+        length = MAX_PAGE_LENGTH if length < 0 else min(max(1, length), MAX_PAGE_LENGTH)
+        cursor = cursor.skip(max(0, start)).limit(length)
+        return total, filtered, list(cursor)
+
+    def get_by_name(self, scopeName):
+        # The site with this name, or None.
+        return self._lookup("scopeName", scopeName)
+
+    def get_by_id(self, scopeId):
+        # The site with this scopeId, or None.
+        return self._lookup("scopeId", scopeId)
+
+    def _lookup(self, field, value):
+        # Indexed lookup in Mongo. A site missing there, e.g. created since
+        # the last refresh, costs a single filtered call to Central.
+        if not value:
+            return None
+        self._ensure_indexes()
+        site = self.sites.find_one({field: value}, {"_id": 0, "_sync": 0, "_written": 0})
+        if site is None:
+            site = self._fetch(field, value)
+        return site
+
+    def _fetch(self, field, value):
+        # Quotes in the value are doubled, as OData string literals escape
+        # them, so a name cannot end the literal and extend the filter.
+        literal = str(value).replace("'", "''")
+        response = get_client().command(
+            api_method="GET",
+            api_path=SITES_PATH,
+            api_params={"filter": "{} eq '{}'".format(field, literal), "limit": 1},
+        )
+        if response.get('code') != 200:
+            return None
+        # Endpoints ignoring the filter return any site, check it is the one.
+        for site in response['msg'].get('items') or []:
+            if str(site.get(field)) == str(value):
+                self.sites.replace_one(
+                    {"scopeId": site["scopeId"]},
+                    dict(site, _written=datetime.datetime.utcnow()),
+                    upsert=True,
+                )
+                return site
+        return None
+
+    def freshness(self):
+        # Time of the last successful refresh, its age in seconds and the
+        # error of the last failed one, if any.
+        status = self.status.find_one({"_id": "sites"}) or {}
+        refreshed_at = status.get("refreshed_at")
+        age = None
+        if refreshed_at is not None:
+            age = int((datetime.datetime.utcnow() - refreshed_at).total_seconds())
+        return {
+            "refreshed_at": refreshed_at,
+            "age": age,
+            "count": status.get("count", 0),
+            "error": status.get("error"),
+        }
+
+    def upsert(self, site):
+        # Write an added or updated site through to the collection. The
+        # write time keeps a running refresh from sweeping it.
+        self._ensure_indexes()
+        fields = {FIELD_NAMES.get(k, k): v for k, v in site.items()}
+        fields["_written"] = datetime.datetime.utcnow()
+        self.sites.update_one(
+            {"scopeId": fields["scopeId"]}, {"$set": fields}, upsert=True
+        )
+
+    def remove(self, scopeId):
+        # Drop a deleted site from the collection. The tombstone is written
+        # first, so a running refresh sees it before the site is gone.
+        self._ensure_indexes()
+        self.tombstones.update_one(
+            {"scopeId": scopeId},
+            {"$set": {"deleted_at": datetime.datetime.utcnow()}},
+            upsert=True,
+        )
+        self.sites.delete_one({"scopeId": scopeId})
+
+
+def _prefix_query(search):
+    # Sites with a column starting with search. Every clause is an anchored,
+    # case-sensitive regex, which Mongo bounds by the index of its column,
+    # so a keystroke reads a range of index keys instead of every site. The
+    # usual spellings of search stand in for a case-insensitive match.
+    spellings = sorted({
+        search,
+        search.lower(),
+        search.upper(),
+        search[:1].upper() + search[1:].lower(),
+    })
+    return {
+        "$or": [
+            {field: {"$regex": "^" + re.escape(spelling)}}
+            for field in COLUMNS
+            for spelling in spellings
+        ]
+    }
+
+
+def _batches(items, size):
+    # Group the items of an iterator into lists of up to size items.
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_through(store, response, site=None, scopeId=None):
+    # Apply the change of a successful add, update or delete response to the
+    # store. Without a scopeId the new site is picked up by a refresh.
+    if not isinstance(response, dict) or response.get('code') not in (200, 201, 202, 204):
+        return
+    if scopeId is not None:
+        store.remove(scopeId)
+        return
+    msg = response.get('msg')
+    if isinstance(msg, dict) and msg.get('scopeId'):
+        site = dict(site or {}, **msg)
+    if site and site.get('scopeId'):
+        store.upsert(site)
+    else:
+        store.refresh_soon()